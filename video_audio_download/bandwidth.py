@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Limitation de la bande passante partagée par tous les téléchargements
+
+Seaux à jetons (token buckets) à deux niveaux: un seau global et un seau par
+site (per-host). Chaque téléchargement consomme des jetons dans les deux
+avant de lire la suite des données. Les téléchargements interactifs sont
+prioritaires: tant que l'un d'eux attend des jetons, les téléchargements
+par lot lui laissent la place. Sans attente interactive, le lot utilise
+toute la capacité restante.
+
+yt-dlp gère sa propre boucle de lecture: son progress_hook, appelé après
+chaque bloc reçu (y compris par les téléchargeurs de fragments HLS/DASH, qui
+travaillent sur une copie de ydl.params et ignorent donc toute limite
+"ratelimit" modifiée en cours de route), consomme les jetons correspondants
+et fait attendre le téléchargement.
+
+Paramètres (settings.json), en Kio/s (1024 octets par seconde):
+    bandwidth_limit_kib_s    limite globale (null: illimité)
+    bandwidth_host_limits    {"rumble.com": 2000, ...}
+    bandwidth_profiles       [{"start": "08:00", "end": "19:00", "limit_kib_s": 3000}]
+                             limite globale selon l'heure de la journée
+"""
+
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+from settings import get_setting
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Rafale maximale autorisée: une seconde de débit
+BURST_SECONDS = 1.0
+
+# Fréquence de réévaluation des profils horaires
+PROFILE_CHECK_SECONDS = 60
+
+
+class TokenBucket:
+    """Seau à jetons (octets); rate=None signifie illimité"""
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.tokens = rate * BURST_SECONDS if rate else 0
+        self.updated = time.monotonic()
+
+    def set_rate(self, rate):
+        self.rate = rate
+        if rate:
+            self.tokens = min(self.tokens, rate * BURST_SECONDS)
+
+    def refill(self, now):
+        if self.rate:
+            self.tokens = min(
+                self.rate * BURST_SECONDS,
+                self.tokens + (now - self.updated) * self.rate,
+            )
+        self.updated = now
+
+    def delay_for(self, amount):
+        """
+        Temps d'attente (s) avant de disposer de amount jetons.
+        Une demande plus grosse que le seau attend qu'il soit plein, puis le
+        met en négatif: les demandes suivantes attendent d'autant plus.
+        """
+        if not self.rate:
+            return 0.0
+        needed = min(amount, self.rate * BURST_SECONDS)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, amount):
+        if self.rate:
+            self.tokens -= amount
+
+
+def parse_time_of_day(value):
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def get_profile_limit(profiles, default, now=None):
+    """Limite globale (Kio/s) du profil horaire en cours, sinon default"""
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    for profile in profiles or []:
+        try:
+            start = parse_time_of_day(profile["start"])
+            end = parse_time_of_day(profile["end"])
+        except (KeyError, ValueError):
+            continue
+        # Une plage peut passer minuit (ex: 22:00-06:00)
+        inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+        if inside:
+            return profile.get("limit_kib_s")
+    return default
+
+
+def _kib_s_to_rate(kib_s):
+    return kib_s * 1024 if kib_s else None
+
+
+class BandwidthJob:
+    """Téléchargement inscrit auprès du limiteur"""
+
+    def __init__(self, scheduler, host, priority):
+        self.scheduler = scheduler
+        self.host = host
+        self.priority = priority
+
+    def throttle(self, amount):
+        """Attend d'avoir le droit de lire amount octets supplémentaires"""
+        self.scheduler.acquire(self, amount)
+
+    def attach_ydl(self, ydl):
+        """Limite le débit de yt-dlp, fragments HLS/DASH compris (voir make_ydl_throttle_hook)"""
+        ydl.add_progress_hook(make_ydl_throttle_hook(self))
+
+    def close(self):
+        self.scheduler.unregister(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class BandwidthScheduler:
+    """Seaux global et par site partagés par tous les téléchargements"""
+
+    def __init__(self, limit_kib_s=None, host_limits=None, profiles=None):
+        self.default_limit_kib_s = limit_kib_s
+        self.host_limits = {
+            host.lower(): limit for host, limit in (host_limits or {}).items()
+        }
+        self.profiles = profiles or []
+        self.condition = threading.Condition()
+        self.global_bucket = TokenBucket()
+        self.host_buckets = {}
+        self.jobs = []
+        self.interactive_waiting = 0
+        self._profile_checked = 0.0
+        self._refresh_profile(force=True)
+
+    def _refresh_profile(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._profile_checked < PROFILE_CHECK_SECONDS:
+            return
+        self._profile_checked = now
+        limit = get_profile_limit(self.profiles, self.default_limit_kib_s)
+        self.global_bucket.set_rate(_kib_s_to_rate(limit))
+
+    def _host_limit(self, host):
+        """Limite du site (les sous-domaines héritent de celle du domaine)"""
+        labels = host.split(".")
+        for i in range(len(labels) - 1):
+            limit = self.host_limits.get(".".join(labels[i:]))
+            if limit:
+                return limit
+        return None
+
+    def _host_bucket(self, host):
+        if host not in self.host_buckets:
+            self.host_buckets[host] = TokenBucket(_kib_s_to_rate(self._host_limit(host)))
+        return self.host_buckets[host]
+
+    def register(self, url_or_host, priority=INTERACTIVE):
+        """Inscrit un téléchargement; à fermer (close) une fois terminé"""
+        host = (urlparse(url_or_host).hostname or url_or_host or "").lower()
+        job = BandwidthJob(self, host, priority)
+        with self.condition:
+            self.jobs.append(job)
+        return job
+
+    def unregister(self, job):
+        with self.condition:
+            if job in self.jobs:
+                self.jobs.remove(job)
+            self.condition.notify_all()
+
+    def acquire(self, job, amount):
+        with self.condition:
+            self._refresh_profile()
+            host_bucket = self._host_bucket(job.host)
+            interactive = job.priority == INTERACTIVE
+            if interactive:
+                self.interactive_waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.global_bucket.refill(now)
+                    host_bucket.refill(now)
+                    # Les lots cèdent la place aux téléchargements interactifs
+                    if not interactive and self.interactive_waiting:
+                        self.condition.wait(0.1)
+                        continue
+                    delay = max(
+                        self.global_bucket.delay_for(amount),
+                        host_bucket.delay_for(amount),
+                    )
+                    if delay <= 0:
+                        self.global_bucket.take(amount)
+                        host_bucket.take(amount)
+                        return
+                    self.condition.wait(min(delay, 0.5))
+            finally:
+                if interactive:
+                    self.interactive_waiting -= 1
+                    self.condition.notify_all()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_bandwidth_scheduler():
+    """Limiteur partagé, configuré depuis settings.json"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BandwidthScheduler(
+                get_setting("bandwidth_limit_kib_s"),
+                get_setting("bandwidth_host_limits"),
+                get_setting("bandwidth_profiles"),
+            )
+        return _scheduler
+
+
+def make_ydl_throttle_hook(job):
+    """
+    progress_hook yt-dlp qui consomme les jetons des octets reçus depuis
+    l'appel précédent: attend tant que les limites globale et du site
+    sont atteintes (les téléchargements interactifs passent d'abord).
+
+    Une limite passée par params["ratelimit"] ne suffit pas: les
+    téléchargeurs de fragments (HLS/DASH) en reçoivent une copie au
+    démarrage. Le hook, lui, est appelé après chaque bloc par tous les
+    téléchargeurs, dans le thread qui lit les données.
+    """
+    received = {}
+    lock = threading.Lock()
+
+    def hook(d):
+        if d.get("status") != "downloading":
+            return
+        downloaded = d.get("downloaded_bytes") or 0
+        # Compteur propre à chaque fichier (pistes vidéo et audio séparées)
+        with lock:
+            previous = received.get(d.get("filename"), 0)
+            received[d.get("filename")] = downloaded
+        if downloaded > previous:
+            job.throttle(downloaded - previous)
+
+    return hook
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Surveillance du presse-papier pour détecter les nouvelles URL copiées
+
+Sous Windows, le numéro de séquence du presse-papier (incrémenté à chaque
+copie) est consulté à chaque tour: le contenu n'est relu que lorsqu'il a
+changé. Ailleurs, le texte est relu et comparé au précédent.
+"""
+
+import sys
+import time
+
+import pyperclip
+
+
+def _get_sequence_function():
+    """GetClipboardSequenceNumber sous Windows, sinon None"""
+    if sys.platform != "win32":
+        return None
+    try:
+        import ctypes
+
+        return ctypes.windll.user32.GetClipboardSequenceNumber
+    except Exception:
+        return None
+
+
+class ClipboardWatcher:
+    """Signale chaque nouveau texte copié dans le presse-papier"""
+
+    def __init__(self, on_text, poll_interval=0.5):
+        self.on_text = on_text
+        self.poll_interval = poll_interval
+        self.get_sequence = _get_sequence_function()
+        self.last_sequence = None
+        self.last_text = None
+
+    def snapshot(self):
+        """Mémorise le contenu actuel pour ne signaler que les copies suivantes"""
+        if self.get_sequence:
+            self.last_sequence = self.get_sequence()
+        self.last_text = self._paste()
+
+    def _paste(self):
+        try:
+            return pyperclip.paste() or ""
+        except pyperclip.PyperclipException as e:
+            print(f"Presse-papier illisible: {e}")
+            return ""
+
+    def poll(self):
+        """Relit le presse-papier s'il a changé et signale le nouveau texte"""
+        if self.get_sequence:
+            sequence = self.get_sequence()
+            if sequence == self.last_sequence:
+                return
+            self.last_sequence = sequence
+
+        text = self._paste()
+        # Une même URL copiée deux fois de suite n'est signalée qu'une fois
+        if text and text != self.last_text:
+            self.last_text = text
+            self.on_text(text)
+
+    def run(self, stop_event=None):
+        """Boucle de surveillance, jusqu'à stop_event (ou Ctrl+C)"""
+        self.snapshot()
+        while stop_event is None or not stop_event.is_set():
+            if stop_event is None:
+                time.sleep(self.poll_interval)
+            else:
+                stop_event.wait(self.poll_interval)
+            try:
+                self.poll()
+            except Exception as e:
+                # Une URL mal gérée ne doit pas arrêter la surveillance
+                print(f"Erreur lors du traitement du presse-papier: {e}")
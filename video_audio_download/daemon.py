@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Service résident et client léger
+
+Le service (python download_video_audio.py daemon) reste lancé: yt-dlp,
+Selenium et les autres modules sont importés une seule fois, les cookies
+vérifiés au démarrage. Il reçoit les URL par une API JSON/HTTP qui n'écoute
+que sur 127.0.0.1 et les ajoute à la file persistante (job_queue).
+
+Le client (python daemon.py) n'importe que la bibliothèque standard et
+pyperclip: il envoie les URL du presse-papier au service et rend la main en
+quelques millisecondes. Sans service lancé, ou sans URL dans le
+presse-papier (chemin local, presse-papier vide), il se termine avec le code
+CLIENT_NO_DAEMON pour laisser le script complet prendre le relais.
+
+API:
+    GET  /status      état du service et nombre de tâches par état
+    GET  /jobs        liste des tâches
+    GET  /jobs/<id>   détail d'une tâche
+    POST /jobs        {"url": "...", "force": false, "options": {...}} ajoute
+                      une URL (options: voir DOWNLOAD_OPTION_DEFAULTS); les
+                      chemins locaux sont refusés
+    POST /shutdown    arrête le service
+
+Les requêtes dont l'en-tête Host n'est pas 127.0.0.1:<port> ou
+localhost:<port> sont refusées: une page web ne peut pas atteindre l'API
+par un nom de domaine qui pointerait vers 127.0.0.1 (DNS rebinding).
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from settings import get_setting
+from url_extractor import extract_urls
+
+DAEMON_HOST = "127.0.0.1"
+
+# Le client doit répondre vite: un service absent ne doit pas le ralentir
+CLIENT_TIMEOUT = 0.5
+
+# Codes de sortie du client
+CLIENT_SUBMITTED = 0
+CLIENT_ERROR = 1
+CLIENT_NO_DAEMON = 2
+
+_JOB_PATH = re.compile(r"^/jobs/(\d+)$")
+
+
+def get_daemon_address():
+    return DAEMON_HOST, int(get_setting("daemon_port"))
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    # Renseignés par start_api_server
+    queue = None
+    classify = None
+    default_options = None
+    started_at = None
+    stop_event = None
+
+    def log_message(self, format, *args):
+        # Pas de journal par requête dans la console du service
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _host_allowed(self):
+        port = self.server.server_address[1]
+        host = (self.headers.get("Host") or "").strip().lower()
+        return host in (f"{DAEMON_HOST}:{port}", f"localhost:{port}")
+
+    def _read_json(self):
+        # Exiger du JSON: une page web ne peut pas en envoyer à 127.0.0.1
+        # sans requête préalable CORS, à laquelle le service ne répond pas
+        if not self.headers.get("Content-Type", "").startswith("application/json"):
+            return None
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return None
+        if length < 0:
+            return None
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def do_GET(self):
+        if not self._host_allowed():
+            self._send_json(403, {"error": "Hôte refusé"})
+            return
+        job_match = _JOB_PATH.match(self.path)
+        if self.path == "/status":
+            self._send_json(
+                200,
+                {
+                    "pid": os.getpid(),
+                    "uptime": round(time.time() - self.started_at),
+                    "jobs": self.queue.count_by_state(),
+                },
+            )
+        elif self.path == "/jobs":
+            self._send_json(200, {"jobs": self.queue.list_jobs()})
+        elif job_match:
+            job = self.queue.get(int(job_match.group(1)))
+            if job is None:
+                self._send_json(404, {"error": "Tâche inconnue"})
+            else:
+                self._send_json(200, job)
+        else:
+            self._send_json(404, {"error": "Chemin inconnu"})
+
+    def do_POST(self):
+        if not self._host_allowed():
+            self._send_json(403, {"error": "Hôte refusé"})
+            return
+        data = self._read_json()
+        if data is None:
+            self._send_json(400, {"error": "Corps JSON attendu"})
+            return
+
+        if self.path == "/jobs":
+            url = str(data.get("url") or "").strip()
+            handler = self.classify(url) if url else None
+            if handler is None:
+                self._send_json(400, {"error": f"URL non reconnue: {url!r}"})
+                return
+            # Un chemin local donnerait accès aux fichiers de la machine
+            if handler == "local":
+                self._send_json(400, {"error": "Chemins locaux refusés par l'API"})
+                return
+            # Options de la requête prioritaires sur celles du service
+            options = data.get("options")
+            options = {**self.default_options, **(options if isinstance(options, dict) else {})}
+            job_id, queued = self.queue.add(
+                url, handler, options, force=bool(data.get("force"))
+            )
+            print(f"{'Ajouté' if queued else 'Déjà dans la file'} (#{job_id}): {url}")
+            self._send_json(201 if queued else 200, {"id": job_id, "queued": queued})
+        elif self.path == "/shutdown":
+            self._send_json(200, {"stopping": True})
+            self.stop_event.set()
+        else:
+            self._send_json(404, {"error": "Chemin inconnu"})
+
+
+def start_api_server(queue, classify, stop_event, default_options=None):
+    """
+    Démarre l'API dans un thread.
+
+    Args:
+        queue (JobQueue): File où ajouter les URL reçues
+        classify (callable): Retourne le type d'une URL (None si invalide)
+        stop_event (threading.Event): Positionné par POST /shutdown
+        default_options (dict): Options de téléchargement des URL reçues
+
+    Returns:
+        ThreadingHTTPServer: Serveur démarré (à arrêter avec shutdown())
+    """
+    handler = type(
+        "ApiHandler",
+        (_ApiHandler,),
+        {
+            "queue": queue,
+            "classify": staticmethod(classify),
+            "default_options": dict(default_options or {}),
+            "started_at": time.time(),
+            "stop_event": stop_event,
+        },
+    )
+    server = ThreadingHTTPServer(get_daemon_address(), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="api", daemon=True).start()
+    return server
+
+
+def call_daemon(method, path, payload=None, timeout=CLIENT_TIMEOUT):
+    """
+    Appelle l'API du service.
+
+    Returns:
+        dict: Réponse JSON, None si le service ne répond pas
+    """
+    host, port = get_daemon_address()
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(
+        f"http://{host}:{port}{path}",
+        data=data,
+        method=method,
+        headers={"Content-Type": "application/json"} if data is not None else {},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        # Erreur de l'API (URL refusée...): le service répond bien
+        try:
+            return json.loads(e.read())
+        except ValueError:
+            return {"error": f"HTTP {e.code}"}
+    except (OSError, ValueError):
+        return None
+
+
+def is_daemon_running():
+    return call_daemon("GET", "/status") is not None
+
+
+def submit_to_daemon(url, force=False):
+    """Envoie une URL au service; None si aucun service ne répond"""
+    return call_daemon("POST", "/jobs", {"url": url, "force": force})
+
+
+def main():
+    """Client léger: envoie le contenu du presse-papier au service"""
+    import pyperclip
+
+    # Toutes les URL du texte copié. Sans URL (presse-papier vide, chemin
+    # local refusé par l'API), le script complet prend le relais
+    urls = extract_urls((pyperclip.paste() or "").strip().strip("\"'"))
+    if not urls:
+        return CLIENT_NO_DAEMON
+
+    status = CLIENT_SUBMITTED
+    for url in urls:
+        result = submit_to_daemon(url)
+        if result is None:
+            return CLIENT_NO_DAEMON
+        if "error" in result:
+            print(f"Refusé par le service: {result['error']}")
+            status = CLIENT_ERROR
+        elif result["queued"]:
+            print(f"Ajouté à la file du service (#{result['id']}): {url}")
+        else:
+            print(f"Déjà dans la file (#{result['id']}): {url}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
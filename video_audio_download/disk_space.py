@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Vérification de l'espace disque avant téléchargement et préallocation des
+fichiers de destination
+"""
+
+import os
+import shutil
+import time
+
+from job_queue import ask_user
+
+# Marge laissée libre sur le disque après le téléchargement
+DISK_SPACE_MARGIN = 200 * 1024 * 1024
+
+# Fusion vidéo+audio: les pistes séparées et le fichier fusionné coexistent
+# jusqu'à la fin de la fusion
+MERGE_OVERHEAD_FACTOR = 2
+
+# Délai entre deux vérifications quand on attend que de l'espace se libère
+WAIT_POLL_SECONDS = 30
+
+
+def format_bytes(size):
+    """Taille lisible (Mo ou Go)"""
+    if size >= 1024**3:
+        return f"{size / 1024**3:.1f} Go"
+    return f"{size / 1024**2:.0f} Mo"
+
+
+def get_free_space(path):
+    """Espace libre (octets) sur le volume contenant path"""
+    while path and not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return shutil.disk_usage(path or ".").free
+
+
+def estimate_download_size(info):
+    """
+    Estime la taille d'un téléchargement yt-dlp à partir du dictionnaire info.
+
+    Additionne les formats demandés (vidéo+audio) en utilisant filesize,
+    filesize_approx ou le débit x la durée, et applique le surcoût de fusion
+    quand plusieurs pistes sont réunies par ffmpeg.
+
+    Returns:
+        int: Taille estimée en octets, ou None si elle est inconnue
+    """
+    duration = info.get("duration")
+    formats = info.get("requested_formats") or [info]
+
+    total = 0
+    for fmt in formats:
+        size = fmt.get("filesize") or fmt.get("filesize_approx")
+        if not size:
+            bitrate = fmt.get("tbr")
+            if not (bitrate and duration):
+                return None
+            size = int(bitrate * 1000 / 8 * duration)
+        total += size
+
+    if len(formats) > 1:
+        total *= MERGE_OVERHEAD_FACTOR
+    return total
+
+
+def ensure_disk_space(path, required_bytes, interactive=True):
+    """
+    Vérifie qu'il reste assez de place pour required_bytes (plus une marge).
+
+    Si l'espace manque, propose d'attendre qu'il se libère (le téléchargement
+    reprend automatiquement) ou d'annuler. Sans interaction (ligne de
+    commande, file), le téléchargement est annulé.
+
+    Returns:
+        bool: True si le téléchargement peut commencer
+    """
+    if not required_bytes:
+        return True
+
+    needed = required_bytes + DISK_SPACE_MARGIN
+    free = get_free_space(path)
+    if free >= needed:
+        return True
+
+    print("\n" + "=" * 60)
+    print("ESPACE DISQUE INSUFFISANT")
+    print(f"Nécessaire (estimation): {format_bytes(needed)}")
+    print(f"Disponible: {format_bytes(free)}")
+    print("=" * 60)
+
+    if not interactive:
+        print("Téléchargement annulé.")
+        return False
+
+    while True:
+        choice = ask_user(
+            "Attendre que de l'espace se libère (a) ou annuler (n) ? "
+        ).lower()
+        if choice in ["n", "non", "no"]:
+            print("Téléchargement annulé.")
+            return False
+        if choice in ["a", "attendre"]:
+            break
+        print("Veuillez répondre par 'a' (attendre) ou 'n' (annuler).")
+
+    print(f"En attente de {format_bytes(needed - free)} d'espace libre (Ctrl+C pour annuler)...")
+    try:
+        while get_free_space(path) < needed:
+            time.sleep(WAIT_POLL_SECONDS)
+    except KeyboardInterrupt:
+        print("\nTéléchargement annulé.")
+        return False
+
+    print("Espace disque suffisant, reprise du téléchargement.")
+    return True
+
+
+def preallocate_file(f, size):
+    """
+    Réserve size octets pour le fichier ouvert f.
+
+    Les blocs sont alloués d'un seul tenant autant que possible et un disque
+    plein est signalé immédiatement plutôt qu'en cours de téléchargement.
+    Le fichier doit être tronqué à la taille réelle une fois écrit.
+    """
+    if not size:
+        return
+    if hasattr(os, "posix_fallocate"):
+        os.posix_fallocate(f.fileno(), 0, size)
+    else:
+        # Windows: étendre le fichier réserve les clusters sur NTFS
+        f.truncate(size)
+    f.seek(0)
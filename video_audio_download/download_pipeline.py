@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Téléchargement HTTP en producteur/consommateur
+
+Le thread appelant lit le réseau directement dans des tampons réutilisables
+(readinto dans des bytearray préalloués) et un thread d'écriture les vide sur
+le disque par blocs de plusieurs Mo. La file bornée des tampons pleins
+applique la contre-pression: si le disque ralentit, la lecture réseau attend
+qu'un tampon se libère au lieu d'accumuler des données en mémoire, et un
+disque lent ne bloque plus la lecture de chaque petit morceau.
+"""
+
+import queue
+import threading
+
+# Taille d'un tampon: chaque écriture disque porte sur un tampon entier
+BUFFER_SIZE = 4 * 1024 * 1024
+
+# Nombre de tampons en circulation (mémoire maximale: BUFFER_COUNT x BUFFER_SIZE)
+BUFFER_COUNT = 4
+
+# Débit limité: lectures de cette taille, chacune précédée d'une demande de jetons
+THROTTLE_READ_SIZE = 256 * 1024
+
+
+def _fill_buffer(raw, view, throttle=None):
+    """Remplit un tampon autant que possible; retourne le nombre d'octets lus"""
+    filled = 0
+    while filled < len(view):
+        if throttle:
+            chunk = view[filled:filled + THROTTLE_READ_SIZE]
+            throttle(len(chunk))
+        else:
+            chunk = view[filled:]
+        n = raw.readinto(chunk)
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+def stream_to_file(response, f, hasher=None, on_progress=None, throttle=None):
+    """
+    Copie le corps d'une réponse requests (stream=True) dans le fichier f.
+
+    Args:
+        response: Réponse requests ouverte en mode stream
+        f: Fichier ouvert en écriture binaire
+        hasher: Empreinte incrémentale (hashlib) mise à jour par le thread
+            d'écriture, au fil des octets écrits
+        on_progress (callable): Appelé avec le nombre d'octets reçus
+        throttle (callable): Appelé avant chaque lecture avec le nombre
+            d'octets demandés; bloque tant que la bande passante est épuisée
+
+    Returns:
+        int: Nombre total d'octets écrits
+    """
+    raw = response.raw
+    # Décompresser comme iter_content le ferait (gzip/deflate)
+    raw.decode_content = True
+
+    free_buffers = queue.Queue()
+    for _ in range(BUFFER_COUNT):
+        free_buffers.put(bytearray(BUFFER_SIZE))
+    # Bornée: le lecteur attend quand tous les tampons attendent d'être écrits
+    filled_buffers = queue.Queue(maxsize=BUFFER_COUNT)
+
+    written = 0
+    write_error = []
+
+    def writer():
+        nonlocal written
+        while True:
+            item = filled_buffers.get()
+            if item is None:
+                return
+            buffer, length = item
+            if not write_error:
+                try:
+                    data = memoryview(buffer)[:length]
+                    f.write(data)
+                    if hasher is not None:
+                        hasher.update(data)
+                    written += length
+                except Exception as e:
+                    # Continuer à vider la file pour ne pas bloquer le lecteur
+                    write_error.append(e)
+            free_buffers.put(buffer)
+
+    writer_thread = threading.Thread(target=writer, name="disk-writer", daemon=True)
+    writer_thread.start()
+
+    try:
+        while not write_error:
+            buffer = free_buffers.get()
+            length = _fill_buffer(raw, memoryview(buffer), throttle)
+            if length:
+                filled_buffers.put((buffer, length))
+                if on_progress:
+                    on_progress(length)
+            if length < BUFFER_SIZE:
+                break  # Fin du flux
+    finally:
+        filled_buffers.put(None)
+        writer_thread.join()
+
+    if write_error:
+        raise write_error[0]
+    return written
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import subprocess
 import os
@@ -7,17 +8,52 @@ import json
 import tempfile
 import http.cookiejar
 import shutil
+import glob
+import hashlib
+import threading
 
-from urllib.parse import urlparse
+from concurrent.futures import as_completed
 import pyperclip
 import yt_dlp
+from yt_dlp.utils import download_range_func
 from bs4 import BeautifulSoup
-from tqdm import tqdm
 import requests
 import browser_cookie3
 
 # Import du KVS extractor
 from kvs_extractor import KVSExtractor
+from folder_watcher import FolderWatcher
+from settings import get_setting
+from disk_space import (
+    MERGE_OVERHEAD_FACTOR,
+    ensure_disk_space,
+    estimate_download_size,
+    format_bytes,
+    preallocate_file,
+)
+from media_validator import MediaValidationError, check_duration, inspect_media_file
+from download_pipeline import stream_to_file
+from progress import get_progress_manager, make_ydl_progress_hook
+from bandwidth import BATCH, INTERACTIVE, get_bandwidth_scheduler
+from job_scheduler import JobScheduler, estimate_job_cost
+from job_queue import (
+    HEARTBEAT_SECONDS,
+    JobQueue,
+    ask_user,
+    get_current_job,
+    get_job_priority,
+    note_job_error,
+    note_job_format,
+    note_job_output,
+    note_job_size,
+    run_job,
+    staging_key,
+)
+from daemon import start_api_server
+from clipboard_watcher import ClipboardWatcher
+from url_extractor import extract_urls
+from site_registry import find_site, get_site, register_site
+from integrity import make_ydl_post_hook, new_hasher, record_file_hash, verify_library
 
 # Platform specific
 if sys.platform == "win32":
@@ -27,10 +63,15 @@ if sys.platform == "win32":
 def open_file_explorer(path):
     """
     Open Windows file explorer at specified location.
+    Inside a job (batch mode, downloader API), the path is recorded as the
+    job output instead: a batch must not open one window per download.
 
     Args:
         path (str): Path of file or folder to open
     """
+    if note_job_output(path):
+        return
+
     # Normalize path to avoid issues with slashes
     normalized_path = os.path.normpath(path)
 
@@ -126,6 +167,105 @@ def get_download_path(source_type):
     return path
 
 
+# Dossier caché de staging, créé à côté de la destination finale
+STAGING_DIR_NAME = ".staging"
+# Âge au-delà duquel un dossier de staging est considéré comme orphelin
+STAGING_MAX_AGE_HOURS = 24
+
+
+def hide_path(path):
+    """
+    Marque un fichier ou dossier comme caché sous Windows.
+    Sur les autres systèmes, le préfixe '.' suffit.
+    """
+    if sys.platform != "win32":
+        return
+    try:
+        import ctypes
+
+        FILE_ATTRIBUTE_HIDDEN = 0x02
+        ctypes.windll.kernel32.SetFileAttributesW(path, FILE_ATTRIBUTE_HIDDEN)
+    except Exception:
+        pass
+
+
+def get_staging_dir(local_path, prefix):
+    """
+    Crée un dossier de staging unique dans '<local_path>/.staging'.
+
+    Le staging étant sur le même volume que la destination, le déplacement
+    final est un simple renommage (os.replace) au lieu d'une copie complète
+    du fichier entre disques.
+
+    Pour une tâche de la file (mode lot), le nom est stable: après un arrêt
+    brutal, la tâche reprise retrouve ses fichiers .part et ses fragments.
+
+    Args:
+        local_path (str): Dossier de destination final (voir get_download_path)
+        prefix (str): Préfixe du nom du dossier de staging
+
+    Returns:
+        str: Chemin du dossier de staging créé
+    """
+    staging_root = os.path.join(local_path, STAGING_DIR_NAME)
+    if not os.path.isdir(staging_root):
+        os.makedirs(staging_root, exist_ok=True)
+        hide_path(staging_root)
+    key = staging_key()
+    if key:
+        staging_dir = os.path.join(staging_root, prefix + key)
+        os.makedirs(staging_dir, exist_ok=True)
+        return staging_dir
+    return tempfile.mkdtemp(prefix=prefix, dir=staging_root)
+
+
+def _latest_mtime(path):
+    """Retourne la date de modification la plus récente dans une arborescence"""
+    latest = os.path.getmtime(path)
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+            except OSError:
+                continue
+    return latest
+
+
+def cleanup_orphaned_staging_dirs():
+    """
+    Supprime les dossiers de staging laissés par une exécution interrompue.
+
+    Un dossier est considéré comme orphelin si rien n'y a été écrit depuis
+    STAGING_MAX_AGE_HOURS, ce qui évite de toucher un téléchargement en cours
+    dans une autre instance du script.
+    """
+    downloads_folder = get_windows_downloads_folder()
+    max_age = STAGING_MAX_AGE_HOURS * 3600
+    now = time.time()
+
+    for main_folder in ("Video", "Audio"):
+        base = os.path.join(downloads_folder, main_folder)
+        if not os.path.isdir(base):
+            continue
+
+        for entry in os.scandir(base):
+            staging_root = os.path.join(entry.path, STAGING_DIR_NAME)
+            if not entry.is_dir() or not os.path.isdir(staging_root):
+                continue
+
+            for staging in os.scandir(staging_root):
+                try:
+                    if now - _latest_mtime(staging.path) < max_age:
+                        continue
+                    if staging.is_dir():
+                        shutil.rmtree(staging.path)
+                    else:
+                        os.remove(staging.path)
+                    print(f"Dossier de staging orphelin supprimé: {staging.path}")
+                except Exception as e:
+                    print(f"Impossible de supprimer {staging.path}: {e}")
+
+
 def check_and_export_cookies():
     """Check if cookies.txt file exists, otherwise export from Chrome"""
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -219,40 +359,26 @@ def update_yt_dlp():
         print(f"Error updating yt-dlp: {e}")
 
 
-def detect_kvs_sites(url):
-    """
-    Détecte si l'URL appartient à un site utilisant KVS (Kernel Video Sharing)
-    """
-    kvs_sites = [
-        "pervarchive.com",
-        "www.pervarchive.com",
-        "pervertium.com",
-        "www.pervertium.com",
-        "tezfiles.com",
-        "www.tezfiles.com",
-        # Ajoutez d'autres sites KVS ici
-    ]
-    
-    domain = urlparse(url).netloc.lower()
-    
-    for kvs_domain in kvs_sites:
-        if domain == kvs_domain or domain.endswith("." + kvs_domain):
-            print(f"Site KVS détecté: {domain}")
-            return True
-    
-    return False
-
-
-def download_kvs_video(url):
-    """Télécharge une vidéo depuis un site KVS"""
+@register_site(
+    "kvs",
+    # Sites utilisant KVS (Kernel Video Sharing)
+    ["pervarchive.com", "pervertium.com", "tezfiles.com"],
+    capabilities=("clip",),
+    label="KVS",
+)
+def download_kvs_video(url, options=None):
+    """Télécharge une vidéo depuis un site KVS (options=None: mode interactif)"""
     print("\nAnalyse de la vidéo KVS...")
     
     # Déterminer le chemin de destination
     local_path = get_download_path("generic")
-    
+
+    # Mode extrait: ne télécharger qu'une plage de la vidéo
+    clip = get_time_range(options)
+
     # Utiliser le fichier cookies s'il existe
     cookies_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cookies.txt")
-    
+
     try:
         # Créer l'extracteur KVS
         extractor = KVSExtractor(cookies_file if os.path.exists(cookies_file) else None)
@@ -267,112 +393,118 @@ def download_kvs_video(url):
             for i, source in enumerate(video_info['sources']):
                 print(f"  {i+1}. {source}")
             
+            if clip is not None:
+                # Extrait: ffmpeg ne lit que les octets de la plage demandée
+                video_url = video_info['sources'][0]
+                filename = re.sub(r'[<>:"/\\|?*]', '_', video_info['title'] or 'video')
+                output_path = os.path.join(local_path, f"{filename} {format_clip_label(clip)}.mp4")
+                headers = extractor.get_request_headers(video_url, referer=url)
+                if download_clip_with_ffmpeg(video_url, output_path, clip, headers):
+                    print(f"Fichier téléchargé: {output_path}")
+                    open_file_explorer(output_path)
+                else:
+                    print("Échec du téléchargement")
+                    note_job_error("Échec du téléchargement de l'extrait")
+                return
+
             # Télécharger automatiquement
             print("\nTéléchargement en cours...")
-            success = extractor.download_video(video_info, local_path)
-            
+            success = extractor.download_video(
+                video_info, local_path, interactive=options is None
+            )
+
             if success:
-                # Trouver le fichier téléchargé le plus récent
-                files = [f for f in os.listdir(local_path) if f.endswith('.mp4')]
-                if files:
-                    latest_file = os.path.join(
-                        local_path,
-                        max(files, key=lambda x: os.path.getctime(os.path.join(local_path, x)))
-                    )
-                    print(f"Fichier téléchargé: {latest_file}")
-                    open_file_explorer(latest_file)
-                else:
-                    print("Téléchargement terminé")
-                    open_file_explorer(local_path)
+                print(f"Fichier téléchargé: {success}")
+                open_file_explorer(success)
             else:
                 print("Échec du téléchargement")
+                note_job_error("Échec du téléchargement KVS")
         else:
             print("Aucune source vidéo trouvée")
             print("Tentative avec yt-dlp comme fallback...")
-            download_generic_video_with_fallback(url)
+            download_generic_video_with_fallback(url, clip, options)
             
     except Exception as e:
         print(f"Erreur avec l'extracteur KVS: {e}")
         print("Tentative avec yt-dlp comme fallback...")
-        download_generic_video_with_fallback(url)
-
-
-def detect_protected_sites(url):
-    """
-    Detect if the URL belongs to a protected site that requires yt-dlp specialized handling
-    Returns the site type or 'generic' if not protected
-    """
-    protected_sites = {
-        "m6.fr": "m6",
-        "www.m6.fr": "m6",
-        "m6plus.fr": "m6",
-        "www.m6plus.fr": "m6",
-        "tf1.fr": "tf1",
-        "www.tf1.fr": "tf1",
-        "lci.tf1.fr": "tf1",
-        "france.tv": "francetv",
-        "www.france.tv": "francetv",
-        "francetvinfo.fr": "francetv",
-        "www.francetvinfo.fr": "francetv",
-        "6play.fr": "m6",
-        "www.6play.fr": "m6",
-        "tf1play.fr": "tf1",
-        "www.tf1play.fr": "tf1",
-        "pluzz.francetv.fr": "francetv",
-        "rumble.com": "rumble",
-        "www.rumble.com": "rumble",
-        "twitter.com": "twitter",
-        "www.twitter.com": "twitter",
-        "x.com": "twitter",
-        "www.x.com": "twitter",
-    }
+        download_generic_video_with_fallback(url, clip, options)
+
 
-    domain = urlparse(url).netloc.lower()
+MPEG_TS_PACKET_SIZE = 188
 
-    for site_domain, site_type in protected_sites.items():
-        if domain == site_domain or domain.endswith("." + site_domain):
-            print(f"Protected site detected: {site_type} ({domain})")
-            return site_type
 
-    return "generic"
+def is_mpeg_ts(header):
+    """
+    Flux MPEG-TS: octet de synchronisation 0x47 au début de chacun des trois
+    premiers paquets (un seul "G" initial peut être une page texte)
+    """
+    return len(header) >= 3 * MPEG_TS_PACKET_SIZE and all(
+        header[i * MPEG_TS_PACKET_SIZE] == 0x47 for i in range(3)
+    )
 
 
-def validate_downloaded_file(filepath, expected_min_size_mb=10):
+def validate_downloaded_file(filepath, expected_min_size_mb=10, expected_duration=None):
     """
     Validate that the downloaded file is complete and not just a chunk
+
+    MP4/MOV/M4A and MKV/WebM files are checked structurally (complete boxes,
+    moov + mdat present, no truncation) and their duration is compared to
+    expected_duration (yt-dlp info['duration']). The minimum size is only
+    used when no duration is known or the container is not recognized.
     """
     if not os.path.exists(filepath):
         return False, "File does not exist"
 
     file_size_mb = os.path.getsize(filepath) / (1024 * 1024)
 
+    try:
+        container, duration = inspect_media_file(filepath)
+    except MediaValidationError as e:
+        return False, f"Invalid container: {e}"
+    except Exception as e:
+        return False, f"Error validating file: {e}"
+
+    if container:
+        if not check_duration(duration, expected_duration):
+            return (
+                False,
+                f"Truncated {container.upper()}: {duration:.0f}s of "
+                f"{expected_duration:.0f}s expected",
+            )
+        if duration and expected_duration:
+            return (
+                True,
+                f"File validation successful: {file_size_mb:.2f} MB, "
+                f"{container.upper()} {duration:.0f}s",
+            )
+
     if file_size_mb < expected_min_size_mb:
         return (
             False,
             f"File too small: {file_size_mb:.2f} MB (minimum: {expected_min_size_mb} MB)",
         )
 
-    # Try to detect if file is corrupted by checking first few bytes
+    if container:
+        return True, f"File validation successful: {file_size_mb:.2f} MB, {container.upper()}"
+
+    # Unknown container: reject error pages, accept other known signatures
     try:
         with open(filepath, "rb") as f:
-            header = f.read(100)
+            # 3 paquets MPEG-TS de 188 octets pour vérifier l'octet de synchro
+            header = f.read(3 * MPEG_TS_PACKET_SIZE)
             if b"<html" in header.lower() or b"<!doctype" in header.lower():
                 return False, "File appears to be HTML (likely error page)"
 
-            # Check if file starts with typical video file headers
             video_headers = [
-                b"\x00\x00\x00\x20ftyp",  # MP4
-                b"\x00\x00\x00\x18ftyp",  # MP4
                 b"RIFF",  # AVI/WAV
-                b"\x1a\x45\xdf\xa3",  # MKV
-                b"FWS",  # Flash Video
                 b"FLV",  # FLV
-                b"\x00\x00\x00\x20ftypmp4",  # MP4 variant
-                b"\x00\x00\x00\x20ftypM4A",  # M4A audio
-                b"\x00\x00\x00\x20ftypf4v",  # FLV variant
+                b"ID3",  # MP3
+                b"OggS",  # Ogg/Opus
             ]
 
-            is_valid_video = any(header.startswith(h) for h in video_headers)
+            is_valid_video = any(
+                header.startswith(h) for h in video_headers
+            ) or is_mpeg_ts(header)
             if not is_valid_video:
                 return False, "File does not appear to be a valid video/audio format"
 
@@ -382,11 +514,137 @@ def validate_downloaded_file(filepath, expected_min_size_mb=10):
     return True, f"File validation successful: {file_size_mb:.2f} MB"
 
 
-def get_available_video_qualities(available_formats):
+# Codecs audio acceptés tels quels dans un conteneur MP4 (copie de flux possible)
+MP4_COPY_AUDIO_CODECS = ("mp4a", "aac", "mp3", "ac-3", "ec-3")
+
+
+def _codec_matches(codec, families):
+    """Vérifie si un identifiant de codec yt-dlp (ex: 'mp4a.40.2') appartient à une famille"""
+    if not codec or codec == "none":
+        return False
+    codec = codec.lower()
+    return any(codec == family or codec.startswith(family + ".") for family in families)
+
+
+def get_selected_codecs(info):
+    """
+    Retourne le couple (vcodec, acodec) des formats choisis par yt-dlp.
+
+    Pour une sélection 'video+audio', les codecs sont dans 'requested_formats',
+    sinon directement dans le dictionnaire info.
+    """
+    vcodec = acodec = None
+    for fmt in info.get("requested_formats") or [info]:
+        if fmt.get("vcodec") and fmt.get("vcodec") != "none":
+            vcodec = fmt["vcodec"]
+        if fmt.get("acodec") and fmt.get("acodec") != "none":
+            acodec = fmt["acodec"]
+    return vcodec, acodec
+
+
+def get_remux_postprocessor_args(info, audio_bitrate="192k"):
+    """
+    Choisit les arguments ffmpeg de post-traitement selon les codecs sources.
+
+    Si la piste audio est déjà compatible MP4 (AAC...), un simple remux par
+    copie de flux suffit. L'audio n'est réencodé en AAC que si nécessaire,
+    ou si son codec est inconnu.
+
+    Returns:
+        list: Arguments ffmpeg à passer dans postprocessor_args
+    """
+    acodec = get_selected_codecs(info)[1]
+
+    if _codec_matches(acodec, MP4_COPY_AUDIO_CODECS):
+        return ["-c", "copy"]
+
+    return ["-c:v", "copy", "-c:a", "aac", "-b:a", audio_bitrate]
+
+
+# Efficacité de compression des codecs vidéo (à hauteur égale, plus c'est
+# élevé, plus le fichier est petit pour une qualité comparable)
+VIDEO_CODEC_EFFICIENCY = (
+    (("av01",), 3),
+    (("vp09", "vp9", "hev1", "hvc1", "hevc", "h265"), 2),
+    (("avc1", "avc3", "h264"), 1),
+)
+
+
+def get_codec_efficiency(vcodec):
+    """Rang d'efficacité d'un codec vidéo (0 si inconnu)"""
+    for families, rank in VIDEO_CODEC_EFFICIENCY:
+        if _codec_matches(vcodec, families):
+            return rank
+    return 0
+
+
+def estimate_format_size(fmt, duration):
+    """
+    Estime la taille d'un format en octets.
+    Utilise filesize, sinon filesize_approx, sinon le débit (tbr) x la durée.
+    """
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if size:
+        return size
+    bitrate = fmt.get("tbr") or fmt.get("vbr") or fmt.get("abr")
+    if bitrate and duration:
+        return int(bitrate * 1000 / 8 * duration)
+    return None
+
+
+def find_progressive_format(formats, height, min_efficiency=0, max_fps=None):
+    """
+    Cherche un format progressif (audio et vidéo dans le même fichier) de la
+    hauteur demandée, avec un codec au moins aussi efficace que min_efficiency.
+    Le télécharger évite la fusion ffmpeg qui relit et réécrit tout le fichier.
+
+    Returns:
+        dict: Le format progressif au meilleur débit, ou None
+    """
+    candidates = [
+        f
+        for f in formats
+        if f.get("format_id")
+        and f.get("height") == height
+        and f.get("ext") == "mp4"  # Sortie MP4 sans remux
+        and f.get("vcodec") not in (None, "none")
+        and f.get("acodec") not in (None, "none")
+        and get_codec_efficiency(f.get("vcodec")) >= min_efficiency
+        and not (max_fps and (f.get("fps") or 0) > max_fps)
+        # Les manifestes (HLS/DASH) ne sont pas des fichiers uniques
+        and not str(f.get("protocol", "")).startswith(("m3u8", "http_dash"))
+    ]
+    return max(candidates, key=lambda f: f.get("tbr") or 0, default=None)
+
+
+def get_available_video_qualities(
+    available_formats, duration=None, size_budget_mb=None, max_fps=None
+):
     """
     Récupère les formats vidéo disponibles, limités à 1080p maximum.
     Retourne une liste de formats triés par qualité.
+
+    Pour chaque résolution, le couple vidéo+audio retenu est le plus efficace:
+    codec le plus performant (AV1, puis VP9/HEVC, puis H.264), images par
+    seconde plafonnées à max_fps si demandé. La taille estimée est affichée
+    et les options dépassant le budget (taille ou débit) sont écartées.
+    Si le paramètre prefer_progressive est actif, un format progressif de
+    même hauteur et de codec équivalent est préféré: pas de fusion ffmpeg.
+
+    Args:
+        available_formats (list): Formats renvoyés par yt-dlp
+        duration (float): Durée de la vidéo en secondes (pour estimer la taille)
+        size_budget_mb (float): Taille maximale souhaitée (paramètre
+            video_size_budget_mb par défaut)
+        max_fps (int): Images par seconde maximales (paramètre max_fps par défaut)
     """
+    if size_budget_mb is None:
+        size_budget_mb = get_setting("video_size_budget_mb")
+    if max_fps is None:
+        max_fps = get_setting("max_fps")
+    bitrate_budget = get_setting("video_bitrate_budget_kbps")
+    prefer_progressive = get_setting("prefer_progressive")
+
     # Définir les résolutions standard à proposer
     standard_resolutions = [1080, 720, 480]
 
@@ -396,10 +654,27 @@ def get_available_video_qualities(available_formats):
     # Filtrer les formats qui contiennent de la vidéo (pas seulement audio)
     video_formats = [f for f in available_formats if f.get("vcodec") != "none"]
 
+    # Pistes séparées: vidéo seule et audio seul, identifiables par format_id
+    video_only = [
+        f
+        for f in video_formats
+        if f.get("acodec") == "none" and f.get("format_id") and f.get("height")
+    ]
+    audio_only = [
+        f
+        for f in available_formats
+        if f.get("vcodec") == "none"
+        and f.get("acodec") not in (None, "none")
+        and f.get("format_id")
+    ]
+    best_audio = max(
+        audio_only, key=lambda f: f.get("abr") or f.get("tbr") or 0, default=None
+    )
+
     # Extraire les hauteurs disponibles
     available_heights = set()
     for fmt in video_formats:
-        height = fmt.get("height", 0)
+        height = fmt.get("height") or 0
         if (
             height > 0 and height <= 1080
         ):  # Ignorer les résolutions > 1080p et les formats sans hauteur
@@ -422,13 +697,66 @@ def get_available_video_qualities(available_formats):
 
         # Créer une chaîne de format qui combine vidéo+audio pour cette résolution
         format_string = f"bestvideo[height<={res}]+bestaudio/best[height<={res}]"
+        display_name = f"{res}p"
+        estimated_size = None
+        bitrate = None
+        video = progressive = None
+
+        candidates = [f for f in video_only if f["height"] == closest_height]
+        if max_fps and any((f.get("fps") or 0) <= max_fps for f in candidates):
+            candidates = [f for f in candidates if (f.get("fps") or 0) <= max_fps]
+
+        if candidates and best_audio:
+            # Codec le plus efficace, puis le meilleur débit pour ce codec
+            video = max(
+                candidates,
+                key=lambda f: (get_codec_efficiency(f.get("vcodec")), f.get("tbr") or 0),
+            )
+            # Formats explicites, avec le sélecteur générique en secours
+            format_string = (
+                f"{video['format_id']}+{best_audio['format_id']}/{format_string}"
+            )
+
+            codec = (video.get("vcodec") or "?").split(".")[0]
+            fps = video.get("fps")
+            display_name += f" {codec}" + (f" {fps:g} fps" if fps else "")
+
+            video_size = estimate_format_size(video, duration)
+            audio_size = estimate_format_size(best_audio, duration)
+            if video_size and audio_size:
+                estimated_size = video_size + audio_size
+                display_name += f" (~{format_bytes(estimated_size)})"
+            if video.get("tbr") and best_audio.get("tbr"):
+                bitrate = video["tbr"] + best_audio["tbr"]
+
+        if prefer_progressive:
+            # Codec au moins aussi efficace que celui de la paire séparée
+            min_efficiency = get_codec_efficiency(video.get("vcodec")) if video else 0
+            progressive = find_progressive_format(
+                available_formats, closest_height, min_efficiency, max_fps
+            )
+
+        if progressive:
+            # Un seul fichier à télécharger: yt-dlp n'a rien à fusionner
+            format_string = f"{progressive['format_id']}/{format_string}"
+            codec = (progressive.get("vcodec") or "?").split(".")[0]
+            fps = progressive.get("fps")
+            display_name = f"{res}p {codec}" + (f" {fps:g} fps" if fps else "")
+            estimated_size = estimate_format_size(progressive, duration)
+            bitrate = progressive.get("tbr")
+            if estimated_size:
+                display_name += f" (~{format_bytes(estimated_size)})"
+            display_name += " [sans fusion]"
 
         quality_options.append(
             {
                 "format_string": format_string,
                 "height": res,
-                "display_name": f"{res}p",
+                "display_name": display_name,
                 "ext": "mp4",  # On force mp4 comme format de sortie
+                "estimated_size": estimated_size,
+                "bitrate": bitrate,
+                "progressive": progressive is not None,
             }
         )
 
@@ -436,6 +764,35 @@ def get_available_video_qualities(available_formats):
         if len(quality_options) >= 3:
             break
 
+    # Écarter les options hors budget (on garde toujours au moins la plus légère)
+    if quality_options and (size_budget_mb or bitrate_budget):
+
+        def within_budget(option):
+            if size_budget_mb and option["estimated_size"]:
+                if option["estimated_size"] > size_budget_mb * 1024 * 1024:
+                    return False
+            if bitrate_budget and option["bitrate"]:
+                if option["bitrate"] > bitrate_budget:
+                    return False
+            return True
+
+        kept = [option for option in quality_options if within_budget(option)]
+        if len(kept) < len(quality_options):
+            print(
+                f"{len(quality_options) - len(kept)} format(s) écarté(s): "
+                "au-delà du budget de taille ou de débit"
+            )
+        if not kept:
+            # Aucune option dans le budget: garder le plus petit fichier estimé
+            # (à taille inconnue, la résolution la plus basse)
+            kept = [
+                min(
+                    reversed(quality_options),
+                    key=lambda q: q.get("estimated_size") or float("inf"),
+                )
+            ]
+        quality_options = kept
+
     # Si aucune option n'a été ajoutée (cas rare), ajouter une option par défaut
     if not quality_options and sorted_heights:
         height = sorted_heights[0]
@@ -445,31 +802,15 @@ def get_available_video_qualities(available_formats):
                 "height": height,
                 "display_name": f"{height}p",
                 "ext": "mp4",
+                "estimated_size": None,
+                "bitrate": None,
+                "progressive": False,
             }
         )
 
     return quality_options
 
 
-def is_valid_youtube_url(url):
-    youtube_regex = (
-        r"(https?://)?(www\.)?"
-        r"(youtube|youtu|youtube-nocookie)\.(com|be)/"
-        r"(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})"
-    )
-    return bool(re.match(youtube_regex, url))
-
-
-def is_valid_odysee_url(url):
-    odysee_regex = r"https?://odysee\.com/([a-zA-Z0-9\-_@:]+)"
-    return bool(re.match(odysee_regex, url))
-
-
-def is_valid_instagram_url(url):
-    instagram_regex = r"https?://(www\.)?instagram\.com/(p|reel|tv)/([a-zA-Z0-9_-]+)"
-    return bool(re.match(instagram_regex, url))
-
-
 def is_valid_url(url):
     """Vérifie si la chaîne est une URL valide"""
     url_regex = r"^https?:\/\/(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&\/=]*)$"
@@ -477,7 +818,13 @@ def is_valid_url(url):
 
 
 def get_url_from_clipboard():
-    """Récupère et valide l'URL ou le chemin local depuis le presse-papier"""
+    """
+    Récupère et valide l'URL ou le chemin local depuis le presse-papier.
+
+    Le presse-papier peut contenir un texte quelconque (conversation, HTML,
+    markdown): toutes les URL qu'il contient sont relevées et normalisées.
+    Plusieurs URL donnent ("batch", [urls]), traitées par la file du mode lot.
+    """
     print("\nRécupération de l'URL depuis le presse-papier...")
     content = pyperclip.paste()
 
@@ -493,118 +840,965 @@ def get_url_from_clipboard():
         content = content[1:-1]
     print(f"Contenu du presse-papier : '{content}'")
 
+    urls = extract_urls(content)
+    if len(urls) > 1:
+        print(f"{len(urls)} URL trouvées dans le presse-papier.")
+        return ("batch", urls)
+    if urls:
+        content = urls[0]
+
+    type_url = classify_url(content)
+    if type_url is None:
+        print(
+            "Le contenu du presse-papier n'est pas une URL valide ni un chemin local existant."
+        )
+        return None
+    print(get_url_type_message(type_url))
+    return (type_url, content)
+
+
+URL_TYPE_MESSAGES = {
+    "generic": "URL générique trouvée.",
+    "local": "Chemin local détecté.",
+}
+
+
+def get_url_type_message(type_url):
+    """Message affiché pour un type d'URL (voir classify_url)"""
+    site = get_site(type_url)
+    if site is not None:
+        return f"URL {site.label} valide trouvée."
+    return URL_TYPE_MESSAGES.get(type_url, URL_TYPE_MESSAGES["generic"])
+
+
+def classify_url(content):
+    """
+    Détermine le type d'une URL ou d'un chemin local.
+
+    Returns:
+        str: Nom du site enregistré (voir site_registry), "generic",
+            "local" ou None
+    """
     if is_valid_url(content):
-        if is_valid_youtube_url(content):
-            print("URL YouTube valide trouvée.")
-            return ("youtube", content)
-        elif is_valid_odysee_url(content):
-            print("URL Odysee valide trouvée.")
-            return ("odysee", content)
-        elif is_valid_instagram_url(content):
-            print("URL Instagram valide trouvée.")
-            return ("instagram", content)
-        else:
-            print("URL générique trouvée.")
-            return ("generic", content)
-    else:
-        # Vérifier si c'est un chemin local
-        if os.path.exists(content):
-            print("Chemin local détecté.")
-            return ("local", content)
-        else:
-            print(
-                "Le contenu du presse-papier n'est pas une URL valide ni un chemin local existant."
-            )
-            return None
+        site = find_site(content)
+        return site.name if site else "generic"
+    # Chemin local (fichier, dossier ou motif glob)
+    if os.path.exists(content):
+        return "local"
+    if is_glob_pattern(content) and collect_local_videos(content):
+        return "local"
+    return None
+
+
+# Options de qualité audio proposées pour les téléchargements audio
+NATIVE_AUDIO = "native"
+AUDIO_QUALITY_OPTIONS = [
+    {"bitrate": "192", "display_name": "Haute qualité (192 kbps)"},
+    {"bitrate": "128", "display_name": "Qualité standard (128 kbps)"},
+    {"bitrate": "96", "display_name": "Basse qualité (96 kbps)"},
+    {
+        "bitrate": NATIVE_AUDIO,
+        "display_name": "Format natif sans réencodage (m4a/opus)",
+    },
+]
+# Extensions possibles d'une piste audio conservée telle quelle
+NATIVE_AUDIO_EXTENSIONS = (".m4a", ".opus", ".ogg", ".webm", ".aac", ".mp3")
+
+
+def get_audio_extensions(audio_bitrate):
+    """Retourne les extensions possibles du fichier audio final"""
+    if audio_bitrate == NATIVE_AUDIO:
+        return NATIVE_AUDIO_EXTENSIONS
+    return (".mp3",)
+
+
+def get_audio_ydl_options(audio_bitrate):
+    """
+    Options yt-dlp d'extraction audio pour une qualité donnée.
 
+    En mode natif, FFmpegExtractAudio avec 'best' fait une simple copie du
+    flux (m4a/opus...) au lieu de décoder puis réencoder en MP3.
+    """
+    if audio_bitrate == NATIVE_AUDIO:
+        return {
+            "postprocessors": [
+                {
+                    "key": "FFmpegExtractAudio",
+                    "preferredcodec": "best",
+                }
+            ]
+        }
 
-def download_youtube_video(url):
-    print("\nAnalyse de la vidéo YouTube...")
+    return {
+        "extractaudio": True,
+        "audioformat": "mp3",
+        "audioquality": audio_bitrate,
+        "postprocessors": [
+            {
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": audio_bitrate,
+            }
+        ],
+    }
 
-    # Demander à l'utilisateur s'il souhaite télécharger la vidéo ou seulement l'audio
-    print("\nQue souhaitez-vous télécharger ?")
-    print("1. Vidéo (avec audio)")
-    print("2. Audio uniquement (MP3)")
 
-    download_type = None
-    while download_type is None:
+def get_audio_cli_args(audio_bitrate):
+    """Arguments de la ligne de commande yt-dlp pour l'extraction audio"""
+    if audio_bitrate == NATIVE_AUDIO:
+        return ["--extract-audio", "--audio-format", "best"]
+    return [
+        "--extract-audio",
+        "--audio-format",
+        "mp3",
+        "--audio-quality",
+        audio_bitrate,
+    ]
+
+
+def get_audio_renditions(default=None):
+    """
+    Rendus audio par défaut: settings.json 'audio_renditions' (plusieurs
+    formats produits en une passe), sinon une seule qualité.
+
+    Args:
+        default (str): Qualité utilisée si aucun rendu n'est configuré
+            (défaut: 'audio_quality' des paramètres)
+
+    Returns:
+        list: Qualités ("192", "128", "96", "native") sans doublon
+    """
+    renditions = get_setting("audio_renditions") or [
+        default or get_setting("audio_quality")
+    ]
+    return list(dict.fromkeys(str(r) for r in renditions))
+
+
+def ask_audio_renditions(options=None):
+    """
+    Demande la qualité audio à l'utilisateur.
+    Plusieurs numéros séparés par des virgules produisent plusieurs rendus
+    en une seule passe. Entrée sélectionne le choix par défaut des paramètres.
+
+    Args:
+        options (dict): Choix sans questions (voir get_download_option):
+            audio_bitrate, sinon le choix par défaut
+
+    Returns:
+        list: Qualités choisies ("192", "128", "96", "native"), la première
+            étant le rendu principal
+    """
+    bitrates = [option["bitrate"] for option in AUDIO_QUALITY_OPTIONS]
+    if options is not None:
+        audio_bitrate = get_download_option(options, "audio_bitrate")
+        renditions = [str(audio_bitrate)] if audio_bitrate else get_audio_renditions()
+        renditions = [r for r in renditions if r in bitrates] or [bitrates[0]]
+        note_job_format(f"audio {', '.join(renditions)}")
+        return renditions
+
+    default_choices = [
+        bitrates.index(r) + 1 for r in get_audio_renditions() if r in bitrates
+    ] or [1]
+    default_label = ",".join(str(c) for c in default_choices)
+
+    # Afficher les options de qualité audio
+    print("\nFormats audio disponibles:")
+    for i, option in enumerate(AUDIO_QUALITY_OPTIONS, 1):
+        print(f"  {i}. {option['display_name']}")
+
+    # Demander à l'utilisateur de choisir
+    choices = None
+    while choices is None:
         try:
-            choice = input(
-                "\nEntrez votre choix (1-2) ou appuyez sur Entrée pour la vidéo: "
+            user_input = ask_user(
+                f"\nChoisissez la qualité audio (numéro, ou plusieurs séparés par des virgules) "
+                f"ou appuyez sur Entrée pour le choix par défaut ({default_label}): "
             )
-            if not choice.strip():
-                download_type = "video"
+            if not user_input.strip():
+                choices = default_choices
             else:
-                choice = int(choice)
-                if choice == 1:
-                    download_type = "video"
-                elif choice == 2:
-                    download_type = "audio"
-                else:
-                    print("Veuillez entrer 1 ou 2")
+                choices = [int(part) for part in user_input.split(",") if part.strip()]
+                if not choices or any(
+                    c < 1 or c > len(AUDIO_QUALITY_OPTIONS) for c in choices
+                ):
+                    print(
+                        f"Veuillez entrer des nombres entre 1 et {len(AUDIO_QUALITY_OPTIONS)}"
+                    )
+                    choices = None
         except ValueError:
             print("Veuillez entrer un nombre valide")
 
-    # Déterminer le chemin de destination en fonction du type de téléchargement
-    if download_type == "video":
-        local_path = get_download_path("youtube")
-    else:  # audio
-        local_path = get_download_path("youtube_audio")
+    selected = [AUDIO_QUALITY_OPTIONS[c - 1] for c in dict.fromkeys(choices)]
+    names = ", ".join(option["display_name"] for option in selected)
+    print(f"\nTéléchargement audio en {names}...")
+    note_job_format(f"audio {names}")
+    return [option["bitrate"] for option in selected]
 
-    # Add cookies file if available
-    cookies_file = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "cookies.txt"
-    )
-    use_cookies = os.path.exists(cookies_file)
 
-    # Options pour l'extraction des informations
-    info_opts = {
-        "noplaylist": True,
-        "nocheckcertificate": True,
-        "ignoreerrors": True,
-        "no_color": True,
-        "geo_bypass": True,
-        "geo_bypass_country": "US",
-        "extractor_retries": 10,
-        "socket_timeout": 60,
-        "extractor_args": {
-            "youtube": {
-                "player_client": ["android", "web"],
-                "player_skip": ["js", "configs"],
-            }
-        },
-    }
+FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
 
-    # Use cookies if available
-    if use_cookies:
-        info_opts["cookiefile"] = cookies_file
-        print(f"Utilisation du fichier de cookies: {cookies_file}")
 
-    try:
-        # Extraire les informations de la vidéo sans télécharger
-        with yt_dlp.YoutubeDL(info_opts) as ydl:
-            print("Extraction des informations de la vidéo...")
-            info = ydl.extract_info(url, download=False)
-            video_title = info.get("title", "video")
+def can_stream_audio(audio_bitrate):
+    """Le mode streaming (settings.json: stream_audio) ne concerne que le MP3"""
+    return bool(get_setting("stream_audio")) and audio_bitrate != NATIVE_AUDIO
 
-            # Déterminer l'extension en fonction du type de téléchargement
-            file_ext = ".mp3" if download_type == "audio" else ".mp4"
-            filename = f"{video_title}{file_ext}"
-            filepath = os.path.join(local_path, filename)
 
-            # Vérifier si le fichier existe déjà AVANT de choisir la qualité
-            file_exists = False
+def stream_audio_to_ffmpeg(url, output_path, audio_bitrate, extra_args=None):
+    """
+    Télécharge la piste audio et l'encode en MP3 en un seul flux.
 
-            try:
-                # Vérifier directement si le fichier existe (méthode standard)
-                if os.path.exists(filepath):
-                    file_exists = True
-                else:
-                    # Méthode avancée: vérifier tous les fichiers du dossier en normalisant les guillemets
-                    if os.path.exists(local_path):
-                        # Normaliser le titre de la vidéo pour la comparaison
-                        normalized_title = (
-                            (video_title or "")
+    La sortie standard de yt-dlp est branchée sur l'entrée de ffmpeg: le
+    réseau et l'encodage se chevauchent, le MP3 est prêt quelques secondes
+    après le dernier octet reçu et aucun fichier intermédiaire n'est écrit.
+
+    Args:
+        url (str): URL de la vidéo
+        output_path (str): Chemin du fichier MP3 à créer
+        audio_bitrate (str): Débit MP3 en kbps ("192", "128", "96")
+        extra_args (list): Arguments yt-dlp supplémentaires (cookies...)
+
+    Returns:
+        bool: True si l'extraction a réussi
+    """
+    downloader_cmd = [
+        sys.executable,
+        "-m",
+        "yt_dlp",
+        "--format",
+        "bestaudio/best",
+        "--output",
+        "-",
+        "--no-part",
+        "--no-playlist",
+        "--no-check-certificate",
+        "--quiet",
+        "--no-warnings",
+    ]
+    downloader_cmd += extra_args or []
+    downloader_cmd.append(url)
+
+    encoder_cmd = [
+        FFMPEG_PATH,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        "pipe:0",
+        "-vn",
+        "-c:a",
+        "libmp3lame",
+        "-b:a",
+        f"{audio_bitrate}k",
+        output_path,
+    ]
+
+    print("Téléchargement et encodage en flux continu...")
+    try:
+        downloader = subprocess.Popen(downloader_cmd, stdout=subprocess.PIPE)
+        try:
+            encoder = subprocess.Popen(
+                encoder_cmd, stdin=downloader.stdout, stderr=subprocess.PIPE
+            )
+        except Exception:
+            downloader.kill()
+            raise
+        # Fermer notre copie du pipe pour que yt-dlp s'arrête si ffmpeg échoue
+        downloader.stdout.close()
+
+        _, encoder_errors = encoder.communicate()
+        downloader.wait()
+    except Exception as e:
+        print(f"Erreur du mode streaming: {e}")
+        return False
+
+    if downloader.returncode == 0 and encoder.returncode == 0:
+        return True
+
+    print(
+        f"Échec du mode streaming (yt-dlp: {downloader.returncode}, ffmpeg: {encoder.returncode})"
+    )
+    if encoder_errors:
+        print(encoder_errors.decode(errors="replace").strip())
+    if os.path.exists(output_path):
+        try:
+            os.remove(output_path)
+        except Exception:
+            pass
+    return False
+
+
+FFPROBE_PATH = r"C:\ffmpeg\bin\ffprobe.exe"
+
+# Extension du fichier pour une copie de la piste audio selon son codec
+AUDIO_CODEC_EXTENSIONS = {
+    "aac": ".m4a",
+    "mp4a": ".m4a",
+    "alac": ".m4a",
+    "opus": ".opus",
+    "vorbis": ".ogg",
+    "mp3": ".mp3",
+    "flac": ".flac",
+    "ac3": ".ac3",
+    "ac-3": ".ac3",
+}
+# Matroska audio accepte n'importe quel codec
+DEFAULT_NATIVE_EXTENSION = ".mka"
+
+
+def get_native_audio_extension(codec):
+    """Extension à utiliser pour conserver une piste audio dans son codec d'origine"""
+    family = (codec or "").lower().split(".")[0]
+    return AUDIO_CODEC_EXTENSIONS.get(family, DEFAULT_NATIVE_EXTENSION)
+
+
+def probe_audio_codec(file_path):
+    """Retourne le codec de la première piste audio (ffprobe), ou None"""
+    cmd = [
+        FFPROBE_PATH,
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-show_entries",
+        "stream=codec_name",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        file_path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def get_rendition_outputs(base_path, renditions, native_extension):
+    """
+    Associe un fichier de sortie à chaque rendu audio.
+
+    Le premier MP3 garde le nom simple, les suivants reçoivent le débit en
+    suffixe ('Titre (96k).mp3'); le rendu natif garde l'extension du codec.
+
+    Args:
+        base_path (str): Chemin de sortie sans extension
+        renditions (list): Qualités ("192", "native"...)
+        native_extension (str): Extension du rendu natif
+
+    Returns:
+        list: Couples (chemin de sortie, qualité)
+    """
+    outputs = []
+    has_plain_mp3 = False
+    for bitrate in renditions:
+        if bitrate == NATIVE_AUDIO:
+            path = base_path + native_extension
+        elif not has_plain_mp3:
+            path = base_path + ".mp3"
+            has_plain_mp3 = True
+        else:
+            path = f"{base_path} ({bitrate}k).mp3"
+        outputs.append((path, bitrate))
+    return outputs
+
+
+def build_audio_renditions_command(input_path, outputs):
+    """
+    Commande ffmpeg produisant tous les rendus audio en une passe: la source
+    n'est lue et décodée qu'une fois, chaque sortie a son propre encodeur.
+    """
+    # -nostdin: plusieurs ffmpeg en parallèle ne doivent pas lire la console
+    cmd = [FFMPEG_PATH, "-hide_banner", "-nostdin", "-y", "-i", input_path]
+    for output_path, bitrate in outputs:
+        cmd += ["-map", "0:a:0", "-vn"]
+        if bitrate == NATIVE_AUDIO:
+            cmd += ["-c:a", "copy"]
+        else:
+            cmd += ["-c:a", "libmp3lame", "-b:a", f"{bitrate}k"]
+        cmd.append(output_path)
+    return cmd
+
+
+def extract_audio_renditions(input_path, outputs):
+    """
+    Extrait un ou plusieurs rendus audio d'un fichier avec un seul ffmpeg.
+
+    Returns:
+        tuple: (succès, message d'erreur ou None)
+    """
+    for output_path, _ in outputs:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    try:
+        result = subprocess.run(
+            build_audio_renditions_command(input_path, outputs),
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+        )
+    except Exception as e:
+        return False, str(e)
+
+    if result.returncode != 0:
+        # Ne pas laisser de rendus partiels
+        for output_path, _ in outputs:
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except Exception:
+                    pass
+        return False, result.stderr
+    return True, None
+
+
+def download_audio_renditions(url, ydl_opts, local_path, title, renditions):
+    """
+    Télécharge la piste audio une seule fois puis produit tous les rendus
+    demandés en une passe ffmpeg.
+
+    Args:
+        url (str): URL de la vidéo
+        ydl_opts (dict): Options yt-dlp de base (cookies, extracteur...)
+        local_path (str): Dossier de destination
+        title (str): Titre de la vidéo (nom des fichiers)
+        renditions (list): Qualités à produire
+
+    Returns:
+        list: Chemins des fichiers produits (vide en cas d'échec)
+    """
+    staging_dir = get_staging_dir(local_path, "audio_")
+    try:
+        opts = dict(ydl_opts)
+        opts.pop("postprocessors", None)
+        opts.update(
+            {
+                "format": "bestaudio/best",
+                "outtmpl": os.path.join(staging_dir, "source.%(ext)s"),
+            }
+        )
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+
+        sources = [f for f in os.listdir(staging_dir) if f.startswith("source.")]
+        if not info or not sources:
+            print("Aucune piste audio téléchargée.")
+            return []
+        source_path = os.path.join(staging_dir, sources[0])
+
+        clean_title = re.sub(r'[<>:"/\\|?*]', "_", title or "audio")
+        outputs = get_rendition_outputs(
+            os.path.join(local_path, clean_title),
+            renditions,
+            get_native_audio_extension(info.get("acodec")),
+        )
+
+        print(f"Encodage de {len(outputs)} rendus audio en une passe...")
+        success, error = extract_audio_renditions(source_path, outputs)
+        if not success:
+            print(f"Échec de l'encodage: {error}")
+            return []
+        return [output_path for output_path, _ in outputs]
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def parse_timestamp(value):
+    """
+    Convertit un horodatage en secondes.
+    Formats acceptés: '90', '1:30', '1:02:03', '1:02:03.5'
+    """
+    seconds = 0.0
+    for part in value.strip().split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_timestamp(seconds):
+    """Horodatage compatible avec les noms de fichiers (ex: '1h02m03s')"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{secs:02d}s"
+    return f"{minutes}m{secs:02d}s"
+
+
+def parse_time_range(value):
+    """
+    Convertit une plage 'début-fin' (ex: '1:00:00-1:05:00', '10:00-').
+
+    Returns:
+        tuple: (début, fin) en secondes, fin à None jusqu'à la fin de la vidéo
+
+    Raises:
+        ValueError: Format invalide ou fin avant le début
+    """
+    start_text, _, end_text = value.strip().partition("-")
+    try:
+        start = parse_timestamp(start_text) if start_text.strip() else 0.0
+        end = parse_timestamp(end_text) if end_text.strip() else None
+    except ValueError:
+        raise ValueError("Format invalide. Exemple: 1:00:00-1:05:00")
+    if start < 0 or (end is not None and end <= start):
+        raise ValueError("La fin doit être après le début.")
+    return (start, end)
+
+
+def get_time_range(options=None):
+    """
+    Plage à télécharger (mode extrait), donnée par l'option clip
+    ('début-fin', ligne de commande ou préréglage).
+
+    Le mode interactif ne pose pas de question: la vidéo entière est
+    téléchargée, un extrait se demande avec --clip.
+
+    Returns:
+        tuple: (début, fin) en secondes, fin à None jusqu'à la fin de la vidéo,
+            ou None pour télécharger la vidéo entière
+    """
+    clip = get_download_option(options, "clip")
+    return parse_time_range(clip) if clip else None
+
+
+def format_clip_label(clip):
+    """Suffixe de nom de fichier d'un extrait, ex: '[1h00m00s-1h05m00s]'"""
+    start, end = clip
+    end_label = format_timestamp(end) if end is not None else "fin"
+    return f"[{format_timestamp(start)}-{end_label}]"
+
+
+def get_clip_outtmpl(directory, clip):
+    """Modèle de nom yt-dlp, avec la plage en suffixe pour un extrait"""
+    if clip is None:
+        return os.path.join(directory, "%(title)s.%(ext)s")
+    return os.path.join(directory, f"%(title)s {format_clip_label(clip)}.%(ext)s")
+
+
+def get_clip_ydl_options(clip):
+    """
+    Options yt-dlp pour ne télécharger que la plage demandée.
+    Les coupes se font sur les images clés: pas de réencodage.
+    """
+    if clip is None:
+        return {}
+    start, end = clip
+    return {
+        "download_ranges": download_range_func(
+            None, [(start, end if end is not None else float("inf"))]
+        ),
+    }
+
+
+def get_clip_cli_args(clip):
+    """Équivalent ligne de commande de get_clip_ydl_options"""
+    if clip is None:
+        return []
+    start, end = clip
+    return ["--download-sections", f"*{start}-{end if end is not None else 'inf'}"]
+
+
+def download_clip_with_ffmpeg(source_url, output_path, clip, headers=None):
+    """
+    Télécharge un extrait d'un MP4 distant sans récupérer le fichier entier.
+
+    ffmpeg lit l'index du MP4 puis ne demande (requêtes HTTP Range) que les
+    octets de la plage voulue; la coupe se fait sur l'image clé précédente,
+    en copie de flux.
+
+    Args:
+        source_url (str): URL directe du fichier vidéo
+        output_path (str): Fichier de sortie
+        clip (tuple): (début, fin) en secondes
+        headers (dict): En-têtes HTTP (User-Agent, Cookie...)
+
+    Returns:
+        bool: True si l'extrait a été téléchargé
+    """
+    start, end = clip
+    cmd = [FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-y"]
+    if headers:
+        cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+    cmd += ["-ss", str(start), "-i", source_url]
+    if end is not None:
+        cmd += ["-t", str(end - start)]
+    cmd += ["-map", "0", "-c", "copy", "-avoid_negative_ts", "make_zero", output_path]
+
+    print(f"Téléchargement de l'extrait {format_clip_label(clip)}...")
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except Exception as e:
+        print(f"Erreur ffmpeg: {e}")
+        return False
+
+    if result.returncode != 0:
+        print(f"Échec du téléchargement de l'extrait: {result.stderr.strip()}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return False
+    return True
+
+
+# Téléchargement sans questions (ligne de commande, file, service): les
+# fonctions download_* reçoivent un dictionnaire d'options. options=None
+# garde les questions; sinon chaque choix absent prend la réponse par
+# défaut de la question correspondante (touche Entrée).
+DOWNLOAD_TYPES = ("video", "audio")
+ON_EXISTS_CHOICES = ("skip", "overwrite", "rename")
+DOWNLOAD_OPTION_DEFAULTS = {
+    "type": "video",
+    # "best", "worst" ou hauteur maximale ("720")
+    "quality": "best",
+    # None: paramètres audio_quality / audio_renditions
+    "audio_bitrate": None,
+    # Fichier déjà présent: "skip", "overwrite" ou "rename"
+    "on_exists": "skip",
+    # Plage 'début-fin' (mode extrait), None pour la vidéo entière
+    "clip": None,
+}
+
+
+def get_download_option(options, key):
+    """Valeur d'une option de téléchargement, ou sa valeur par défaut"""
+    value = (options or {}).get(key)
+    return DOWNLOAD_OPTION_DEFAULTS.get(key) if value is None else value
+
+
+def ask_download_type(options=None):
+    """Demande s'il faut télécharger la vidéo ou seulement l'audio"""
+    if options is not None:
+        return get_download_option(options, "type")
+
+    print("\nQue souhaitez-vous télécharger ?")
+    print("1. Vidéo (avec audio)")
+    print("2. Audio uniquement (MP3 ou format natif)")
+
+    download_type = None
+    while download_type is None:
+        try:
+            choice = ask_user(
+                "\nEntrez votre choix (1-2) ou appuyez sur Entrée pour la vidéo: "
+            )
+            if not choice.strip():
+                download_type = "video"
+            else:
+                choice = int(choice)
+                if choice == 1:
+                    download_type = "video"
+                elif choice == 2:
+                    download_type = "audio"
+                else:
+                    print("Veuillez entrer 1 ou 2")
+        except ValueError:
+            print("Veuillez entrer un nombre valide")
+    return download_type
+
+
+def select_quality_option(quality_options, quality):
+    """
+    Option correspondant à une qualité demandée: "best", "worst" ou hauteur
+    maximale (la meilleure option qui ne la dépasse pas)
+    """
+    quality = str(quality).lower().rstrip("p")
+    if quality == "worst":
+        return quality_options[-1]
+    if quality.isdigit():
+        for option in quality_options:
+            if option["height"] <= int(quality):
+                return option
+        return quality_options[-1]
+    return quality_options[0]
+
+
+def ask_video_quality(quality_options, options=None):
+    """
+    Affiche les qualités vidéo disponibles et retourne l'option choisie.
+
+    Args:
+        quality_options (list): Options de get_available_video_qualities
+        options (dict): Choix sans questions: quality
+    """
+    print("\nFormats vidéo disponibles:")
+    for i, option in enumerate(quality_options, 1):
+        print(f"  {i}. {option['display_name']}")
+
+    if options is not None:
+        selected = select_quality_option(
+            quality_options, get_download_option(options, "quality")
+        )
+        note_job_format(selected["display_name"])
+        return selected
+
+    # Demander à l'utilisateur de choisir
+    choice = None
+    while choice is None:
+        try:
+            user_input = ask_user(
+                "\nChoisissez la qualité (numéro) ou appuyez sur Entrée pour la meilleure qualité: "
+            )
+            if not user_input.strip():
+                choice = 1  # Meilleure qualité par défaut
+            else:
+                choice = int(user_input)
+                if choice < 1 or choice > len(quality_options):
+                    print(
+                        f"Veuillez entrer un nombre entre 1 et {len(quality_options)}"
+                    )
+                    choice = None
+        except ValueError:
+            print("Veuillez entrer un nombre valide")
+
+    note_job_format(quality_options[choice - 1]["display_name"])
+    return quality_options[choice - 1]
+
+
+FALLBACK_VIDEO_FORMATS = [
+    ("Meilleure qualité (jusqu'à 1080p)", 1080),
+    ("Qualité moyenne (720p)", 720),
+    ("Qualité basse (480p ou moins)", 480),
+]
+
+
+def ask_fallback_video_format(options=None):
+    """Qualité vidéo de la méthode alternative (yt-dlp en ligne de commande)"""
+    print("\nOptions de qualité vidéo pour la méthode alternative:")
+    for i, (label, _height) in enumerate(FALLBACK_VIDEO_FORMATS, 1):
+        print(f"  {i}. {label}")
+
+    if options is not None:
+        heights = [{"height": height} for _label, height in FALLBACK_VIDEO_FORMATS]
+        height = select_quality_option(
+            heights, get_download_option(options, "quality")
+        )["height"]
+    else:
+        choice = None
+        while choice is None:
+            try:
+                user_input = ask_user(
+                    "\nChoisissez la qualité (1-3) ou appuyez sur Entrée pour la meilleure qualité: "
+                )
+                if not user_input.strip():
+                    choice = 1
+                else:
+                    choice = int(user_input)
+                    if choice < 1 or choice > 3:
+                        print("Veuillez entrer un nombre entre 1 et 3")
+                        choice = None
+            except ValueError:
+                print("Veuillez entrer un nombre valide")
+        height = FALLBACK_VIDEO_FORMATS[choice - 1][1]
+
+    format_option = f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"
+    note_job_format(format_option)
+    return format_option
+
+
+def get_unique_path(filepath):
+    """Premier nom libre de la forme 'nom (2).ext', 'nom (3).ext'..."""
+    base, ext = os.path.splitext(filepath)
+    counter = 2
+    while os.path.exists(f"{base} ({counter}){ext}"):
+        counter += 1
+    return f"{base} ({counter}){ext}"
+
+
+def resolve_existing_file(filepath, options=None, remove=True):
+    """
+    Décide quoi faire d'un fichier de destination déjà présent.
+
+    En mode interactif, demande s'il faut le remplacer. Sans questions,
+    applique l'option on_exists: "skip" (le fichier existant est le
+    résultat), "overwrite" ou "rename" (nouveau fichier 'nom (2).ext').
+
+    Args:
+        filepath (str): Fichier existant
+        options (dict): Choix sans questions
+        remove (bool): Supprimer le fichier remplacé (sinon il sera écrasé)
+
+    Returns:
+        str: Chemin où écrire le téléchargement, None pour l'annuler
+    """
+    if options is None:
+        while True:
+            choice = ask_user("Voulez-vous remplacer ce fichier ? (o/n): ").lower()
+            if choice in ["o", "oui", "y", "yes"]:
+                on_exists = "overwrite"
+                break
+            elif choice in ["n", "non", "no"]:
+                print("Téléchargement annulé.")
+                return None
+            else:
+                print("Veuillez répondre par 'o' (oui) ou 'n' (non).")
+    else:
+        on_exists = get_download_option(options, "on_exists")
+
+    if on_exists == "rename":
+        new_path = get_unique_path(filepath)
+        print(f"Nouveau fichier: {os.path.basename(new_path)}")
+        return new_path
+
+    if on_exists != "overwrite":
+        print("Fichier existant conservé, téléchargement ignoré.")
+        # Dans la file, le fichier existant est le résultat de la tâche
+        note_job_output(filepath)
+        return None
+
+    print("Le fichier existant sera remplacé.")
+    if remove:
+        try:
+            os.remove(filepath)
+            print("Fichier existant supprimé.")
+        except Exception as e:
+            print(f"Impossible de supprimer le fichier existant: {e}")
+            return None
+    return filepath
+
+
+def get_named_outtmpl(filepath):
+    """Modèle de sortie yt-dlp produisant exactement ce fichier (extension près)"""
+    return os.path.splitext(filepath)[0].replace("%", "%%") + ".%(ext)s"
+
+
+# yt-dlp en ligne de commande: afficher le fichier final une fois déplacé
+YDL_PRINT_FILEPATH_ARGS = ["--print", "after_move:filepath"]
+
+
+def track_ydl_outputs(ydl_opts):
+    """
+    Ajoute aux options yt-dlp un post_hook qui relève les fichiers finaux
+    (après fusion et conversion).
+
+    Returns:
+        list: Fichiers produits, remplie pendant le téléchargement
+    """
+    outputs = []
+    ydl_opts.setdefault("post_hooks", []).append(outputs.append)
+    return outputs
+
+
+def run_ydl_download(ydl, url, outputs):
+    """
+    Lance ydl.download et retourne le fichier produit.
+
+    Avec ignoreerrors, yt-dlp n'ajoute pas d'exception en cas d'échec: seul
+    son code de retour le signale.
+
+    Raises:
+        Exception: Échec de yt-dlp ou aucun fichier produit
+    """
+    if ydl.download([url]) != 0:
+        raise Exception("yt-dlp n'a pas pu télécharger la vidéo")
+    return get_ydl_output(outputs)
+
+
+def get_ydl_output(paths):
+    """Dernier fichier existant parmi ceux signalés par yt-dlp"""
+    path = next((p for p in reversed(paths) if p and os.path.isfile(p)), None)
+    if path is None:
+        raise Exception("yt-dlp n'a produit aucun fichier")
+    return path
+
+
+@register_site(
+    "youtube",
+    ["youtube.com", "youtu.be", "youtube-nocookie.com"],
+    capabilities=("audio", "quality", "clip"),
+    url_pattern=(
+        r"(https?://)?(www\.)?"
+        r"(youtube|youtu|youtube-nocookie)\.(com|be)/"
+        r"(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})"
+    ),
+    label="YouTube",
+)
+def download_youtube_video(url, options=None):
+    """
+    Télécharge une vidéo YouTube (ou son audio) avec choix de la qualité.
+    options: choix sans questions (voir get_download_option)
+    """
+    print("\nAnalyse de la vidéo YouTube...")
+
+    # Demander à l'utilisateur s'il souhaite télécharger la vidéo ou seulement l'audio
+    download_type = ask_download_type(options)
+
+    # Déterminer le chemin de destination en fonction du type de téléchargement
+    if download_type == "video":
+        local_path = get_download_path("youtube")
+    else:  # audio
+        local_path = get_download_path("youtube_audio")
+
+    # Mode extrait: ne télécharger qu'une plage de la vidéo
+    clip = get_time_range(options)
+    # Modèle de sortie yt-dlp (remplacé si le fichier est renommé)
+    outtmpl = get_clip_outtmpl(local_path, clip)
+
+    # Add cookies file if available
+    cookies_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "cookies.txt"
+    )
+    use_cookies = os.path.exists(cookies_file)
+
+    # Options pour l'extraction des informations
+    info_opts = {
+        "noplaylist": True,
+        "nocheckcertificate": True,
+        "ignoreerrors": True,
+        "no_color": True,
+        "geo_bypass": True,
+        "geo_bypass_country": "US",
+        "extractor_retries": 10,
+        "socket_timeout": 60,
+        "extractor_args": {
+            "youtube": {
+                "player_client": ["android", "web"],
+                "player_skip": ["js", "configs"],
+            }
+        },
+    }
+
+    # Use cookies if available
+    if use_cookies:
+        info_opts["cookiefile"] = cookies_file
+        print(f"Utilisation du fichier de cookies: {cookies_file}")
+
+    try:
+        # Extraire les informations de la vidéo sans télécharger
+        with yt_dlp.YoutubeDL(info_opts) as ydl:
+            print("Extraction des informations de la vidéo...")
+            info = ydl.extract_info(url, download=False)
+            # Coût de la tâche si elle est reprise (voir process_queue)
+            note_job_size(estimate_job_cost(info))
+            video_title = info.get("title", "video")
+            output_title = video_title
+            if clip is not None:
+                output_title = f"{video_title} {format_clip_label(clip)}"
+
+            # Pour l'audio, la qualité détermine l'extension du fichier final
+            if download_type == "audio":
+                audio_renditions = ask_audio_renditions(options)
+                audio_bitrate = audio_renditions[0]
+                file_exts = get_audio_extensions(audio_bitrate)
+            else:
+                file_exts = (".mp4",)
+
+            # Déterminer l'extension en fonction du type de téléchargement
+            file_ext = file_exts[0]
+            filename = f"{output_title}{file_ext}"
+            filepath = os.path.join(local_path, filename)
+
+            # Vérifier si le fichier existe déjà AVANT de choisir la qualité vidéo
+            file_exists = False
+
+            try:
+                # Vérifier directement si le fichier existe (méthode standard)
+                if os.path.exists(filepath):
+                    file_exists = True
+                else:
+                    # Méthode avancée: vérifier tous les fichiers du dossier en normalisant les guillemets
+                    if os.path.exists(local_path):
+                        # Normaliser le titre de la vidéo pour la comparaison
+                        normalized_title = (
+                            (output_title or "")
                             .replace('"', "")
                             .replace(
                                 """, "")
@@ -615,6 +1809,10 @@ def download_youtube_video(url):
                         )
 
                         for file in os.listdir(local_path):
+                            # Ignorer les fichiers d'un autre format
+                            if not file.lower().endswith(file_exts):
+                                continue
+
                             # Obtenir le nom du fichier sans extension et le normaliser
                             file_name_without_ext = os.path.splitext(file)[0]
                             normalized_file_name = (
@@ -638,33 +1836,25 @@ def download_youtube_video(url):
 
             if file_exists:
                 print("\n" + "=" * 60)
-                print(f"ATTENTION: Le fichier '{video_title}' existe déjà !")
+                print(f"ATTENTION: Le fichier '{output_title}' existe déjà !")
                 print(f"Chemin: {filepath}")
                 print("=" * 60)
 
-                # Demander à l'utilisateur s'il souhaite remplacer le fichier
-                while True:
-                    choice = input("Voulez-vous remplacer ce fichier ? (o/n): ").lower()
-                    if choice in ["o", "oui", "y", "yes"]:
-                        print("Le fichier existant sera remplacé.")
-                        try:
-                            # Supprimer le fichier existant
-                            os.remove(filepath)
-                            print("Fichier existant supprimé.")
-                            break  # Sortir de la boucle et continuer le téléchargement
-                        except Exception as e:
-                            print(f"Impossible de supprimer le fichier existant: {e}")
-                            return
-                    elif choice in ["n", "non", "no"]:
-                        print("Téléchargement annulé.")
-                        return
-                    else:
-                        print("Veuillez répondre par 'o' (oui) ou 'n' (non).")
+                # Remplacer, ignorer ou renommer (option on_exists)
+                target_path = resolve_existing_file(filepath, options)
+                if target_path is None:
+                    return
+                if target_path != filepath:
+                    output_title = os.path.splitext(os.path.basename(target_path))[0]
+                    filename = f"{output_title}{file_ext}"
+                    outtmpl = get_named_outtmpl(target_path)
 
             # Gérer différemment selon le type de téléchargement (vidéo ou audio)
             if download_type == "video":
                 # Récupérer les formats disponibles pour la vidéo
-                quality_options = get_available_video_qualities(info.get("formats", []))
+                quality_options = get_available_video_qualities(
+                    info.get("formats", []), info.get("duration")
+                )
 
                 if not quality_options:
                     print(
@@ -672,85 +1862,46 @@ def download_youtube_video(url):
                     )
                     format_option = "best"
                 else:
-                    # Afficher les options de qualité disponibles
-                    print("\nFormats vidéo disponibles:")
-                    for i, option in enumerate(quality_options, 1):
-                        print(f"  {i}. {option['display_name']}")
-
-                    # Demander à l'utilisateur de choisir
-                    choice = None
-                    while choice is None:
-                        try:
-                            user_input = input(
-                                "\nChoisissez la qualité (numéro) ou appuyez sur Entrée pour la meilleure qualité: "
-                            )
-                            if not user_input.strip():
-                                choice = 1  # Meilleure qualité par défaut
-                            else:
-                                choice = int(user_input)
-                                if choice < 1 or choice > len(quality_options):
-                                    print(
-                                        f"Veuillez entrer un nombre entre 1 et {len(quality_options)}"
-                                    )
-                                    choice = None
-                        except ValueError:
-                            print("Veuillez entrer un nombre valide")
-
-                    # Récupérer le format choisi
-                    selected_option = quality_options[choice - 1]
+                    # Afficher les options de qualité et récupérer le format choisi
+                    selected_option = ask_video_quality(quality_options, options)
                     format_option = selected_option["format_string"]
                     print(f"\nTéléchargement en {selected_option['display_name']}...")
 
-                # Format vidéo sélectionné
-
-            else:  # Audio uniquement
-                # Options de qualité audio
-                audio_quality_options = [
-                    {"bitrate": "192", "display_name": "Haute qualité (192 kbps)"},
-                    {"bitrate": "128", "display_name": "Qualité standard (128 kbps)"},
-                    {"bitrate": "96", "display_name": "Basse qualité (96 kbps)"},
-                ]
-
-                # Afficher les options de qualité audio
-                print("\nFormats audio disponibles:")
-                for i, option in enumerate(audio_quality_options, 1):
-                    print(f"  {i}. {option['display_name']}")
-
-                # Demander à l'utilisateur de choisir
-                choice = None
-                while choice is None:
-                    try:
-                        user_input = input(
-                            "\nChoisissez la qualité audio (numéro) ou appuyez sur Entrée pour la meilleure qualité: "
-                        )
-                        if not user_input.strip():
-                            choice = 1  # Meilleure qualité par défaut
-                        else:
-                            choice = int(user_input)
-                            if choice < 1 or choice > len(audio_quality_options):
-                                print(
-                                    f"Veuillez entrer un nombre entre 1 et {len(audio_quality_options)}"
-                                )
-                                choice = None
-                    except ValueError:
-                        print("Veuillez entrer un nombre valide")
+                    # Pistes séparées: elles coexistent avec le fichier fusionné
+                    required = selected_option["estimated_size"]
+                    if required and not selected_option["progressive"]:
+                        required *= MERGE_OVERHEAD_FACTOR
+                    if not ensure_disk_space(local_path, required, options is None):
+                        return
 
-                # Récupérer la qualité audio choisie
-                selected_audio_option = audio_quality_options[choice - 1]
-                audio_bitrate = selected_audio_option["bitrate"]
-                print(
-                    f"\nTéléchargement audio en {selected_audio_option['display_name']}..."
-                )
+                # Format vidéo sélectionné
 
+            else:  # Audio uniquement (qualité déjà choisie)
                 # Pour l'audio, on utilise le meilleur format audio disponible
                 format_option = "bestaudio/best"
 
-                # Format audio sélectionné
+                # Mode streaming: yt-dlp alimente ffmpeg directement
+                if (
+                    clip is None
+                    and len(audio_renditions) == 1
+                    and can_stream_audio(audio_bitrate)
+                ):
+                    clean_title = re.sub(r'[<>:"/\\|?*]', "_", output_title or "video")
+                    output_path = os.path.join(local_path, f"{clean_title}.mp3")
+                    stream_args = ["--geo-bypass"]
+                    if use_cookies:
+                        stream_args += ["--cookies", cookies_file]
+                    if stream_audio_to_ffmpeg(url, output_path, audio_bitrate, stream_args):
+                        print("Téléchargement terminé avec succès.")
+                        print(f"Fichier enregistré dans: {output_path}")
+                        open_file_explorer(output_path)
+                        return
+                    print("Passage au téléchargement classique...")
 
             # Options pour le téléchargement
             ydl_opts = {
                 "format": format_option,
-                "outtmpl": os.path.join(local_path, "%(title)s.%(ext)s"),
+                "outtmpl": outtmpl,
                 "ffmpeg_location": r"C:\ffmpeg\bin",
                 "noplaylist": True,
                 "nocheckcertificate": True,
@@ -773,54 +1924,46 @@ def download_youtube_video(url):
                 # Pour la vidéo, forcer la sortie en MP4
                 ydl_opts["merge_output_format"] = "mp4"
             else:  # Audio uniquement
-                # Pour l'audio, extraire l'audio et convertir en MP3
-                ydl_opts["extractaudio"] = True
-                ydl_opts["audioformat"] = "mp3"
-                ydl_opts["audioquality"] = (
-                    audio_bitrate  # Utiliser la qualité choisie par l'utilisateur
-                )
-                # Options supplémentaires pour la conversion audio
-                ydl_opts["postprocessors"] = [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": audio_bitrate,
-                    }
-                ]
+                # Extraire l'audio: MP3 au débit choisi ou copie du flux natif
+                ydl_opts.update(get_audio_ydl_options(audio_bitrate))
+
+            ydl_opts.update(get_clip_ydl_options(clip))
 
             # Pas besoin de forcer le remplacement car on a déjà supprimé le fichier existant si nécessaire
 
             if use_cookies:
                 ydl_opts["cookiefile"] = cookies_file
 
+            # Plusieurs rendus: un seul téléchargement et une seule passe ffmpeg
+            if download_type == "audio" and len(audio_renditions) > 1:
+                output_paths = download_audio_renditions(
+                    url, ydl_opts, local_path, output_title, audio_renditions
+                )
+                if not output_paths:
+                    raise Exception("Échec de la production des rendus audio")
+                print("Téléchargement terminé avec succès.")
+                for output_path in output_paths:
+                    print(f"Fichier enregistré dans: {output_path}")
+                open_file_explorer(output_paths[0])
+                return
+
             # Télécharger la vidéo avec le format choisi
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-                # Vérifier le fichier réel (au cas où le nom aurait été modifié par yt-dlp)
-                file_ext = ".mp3" if download_type == "audio" else ".mp4"
-                final_path = os.path.join(local_path, filename)
-
-                # Si le fichier n'existe pas avec le nom prévu, chercher le fichier réel
-                if not os.path.exists(final_path):
-                    files = os.listdir(local_path)
-                    matching_files = [
-                        os.path.join(local_path, f)
-                        for f in files
-                        if f.endswith(file_ext)
-                    ]
-
-                    if matching_files:
-                        newest_file = max(
-                            matching_files, key=os.path.getctime, default=None
-                        )
-                        if newest_file:
-                            final_path = newest_file
-                    else:
-                        # Si aucun fichier correspondant n'est trouvé, utiliser le dossier
-                        print(
-                            f"Aucun fichier {file_ext} récent trouvé, ouverture du dossier."
-                        )
-                        final_path = local_path
+            # Empreinte du fichier final pour l'index d'intégrité
+            ydl_opts["post_hooks"] = [make_ydl_post_hook()]
+            # Fichier réel (au cas où le nom aurait été modifié par yt-dlp)
+            outputs = track_ydl_outputs(ydl_opts)
+
+            # Progression affichée par le gestionnaire commun (pas par yt-dlp)
+            progress_job = get_progress_manager().start_job(video_title)
+            ydl_opts["progress_hooks"] = [make_ydl_progress_hook(progress_job)]
+            ydl_opts["noprogress"] = True
+            bandwidth_job = get_bandwidth_scheduler().register(url, get_job_priority())
+
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl, progress_job, bandwidth_job:
+                # Part de la bande passante partagée, réajustée en cours de route
+                bandwidth_job.attach_ydl(ydl)
+                final_path = run_ydl_download(ydl, url, outputs)
+                progress_job.finish()
 
                 print("Téléchargement terminé avec succès.")
                 print(f"Fichier enregistré dans: {final_path}")
@@ -837,37 +1980,7 @@ def download_youtube_video(url):
             # Options différentes selon le type de téléchargement
             if download_type == "video":
                 # Demander à l'utilisateur de choisir la qualité vidéo pour la méthode alternative
-                print("\nOptions de qualité vidéo pour la méthode alternative:")
-                print("  1. Meilleure qualité (jusqu'à 1080p)")
-                print("  2. Qualité moyenne (720p)")
-                print("  3. Qualité basse (480p ou moins)")
-
-                choice = None
-                while choice is None:
-                    try:
-                        user_input = input(
-                            "\nChoisissez la qualité (1-3) ou appuyez sur Entrée pour la meilleure qualité: "
-                        )
-                        if not user_input.strip():
-                            choice = 1
-                        else:
-                            choice = int(user_input)
-                            if choice < 1 or choice > 3:
-                                print("Veuillez entrer un nombre entre 1 et 3")
-                                choice = None
-                    except ValueError:
-                        print("Veuillez entrer un nombre valide")
-
-                # Définir le format en fonction du choix
-                format_option = (
-                    "bestvideo[height<=1080]+bestaudio/best[height<=1080]"
-                    if choice == 1
-                    else (
-                        "bestvideo[height<=720]+bestaudio/best[height<=720]"
-                        if choice == 2
-                        else "bestvideo[height<=480]+bestaudio/best[height<=480]"
-                    )
-                )
+                format_option = ask_fallback_video_format(options)
 
                 cmd = [
                     sys.executable,
@@ -876,7 +1989,7 @@ def download_youtube_video(url):
                     "--format",
                     format_option,
                     "--output",
-                    os.path.join(local_path, "%(title)s.%(ext)s"),
+                    outtmpl,
                     "--ffmpeg-location",
                     r"C:\ffmpeg\bin",
                     "--no-playlist",
@@ -889,30 +2002,7 @@ def download_youtube_video(url):
             else:  # Audio uniquement
                 # Demander à l'utilisateur de choisir la qualité audio pour la méthode alternative
                 print("\nOptions de qualité audio pour la méthode alternative:")
-                print("  1. Haute qualité (192 kbps)")
-                print("  2. Qualité standard (128 kbps)")
-                print("  3. Basse qualité (96 kbps)")
-
-                choice = None
-                while choice is None:
-                    try:
-                        user_input = input(
-                            "\nChoisissez la qualité audio (1-3) ou appuyez sur Entrée pour la meilleure qualité: "
-                        )
-                        if not user_input.strip():
-                            choice = 1
-                        else:
-                            choice = int(user_input)
-                            if choice < 1 or choice > 3:
-                                print("Veuillez entrer un nombre entre 1 et 3")
-                                choice = None
-                    except ValueError:
-                        print("Veuillez entrer un nombre valide")
-
-                # Définir la qualité audio en fonction du choix
-                audio_quality = (
-                    "192" if choice == 1 else ("128" if choice == 2 else "96")
-                )
+                audio_bitrate = ask_audio_renditions(options)[0]
 
                 cmd = [
                     sys.executable,
@@ -921,24 +2011,23 @@ def download_youtube_video(url):
                     "--format",
                     "bestaudio/best",
                     "--output",
-                    os.path.join(local_path, "%(title)s.%(ext)s"),
+                    outtmpl,
                     "--ffmpeg-location",
                     r"C:\ffmpeg\bin",
                     "--no-playlist",
                     "--no-check-certificate",
                     "--geo-bypass",
-                    "--extract-audio",
-                    "--audio-format",
-                    "mp3",
-                    "--audio-quality",
-                    audio_quality,
-                ]
+                ] + get_audio_cli_args(audio_bitrate)
 
             # Pas besoin de forcer le remplacement car on a déjà supprimé le fichier existant si nécessaire
 
+            cmd.extend(get_clip_cli_args(clip))
+
             if use_cookies:
                 cmd.extend(["--cookies", cookies_file])
 
+            # yt-dlp affiche le chemin du fichier final
+            cmd.extend(YDL_PRINT_FILEPATH_ARGS)
             cmd.append(url)
 
             print("\nTéléchargement avec la qualité sélectionnée...")
@@ -948,63 +2037,30 @@ def download_youtube_video(url):
                 print(f"Erreur subprocess: {result.stderr}")
                 raise Exception(result.stderr)
 
-            # Essayer de trouver le fichier le plus récent avec la bonne extension
-            try:
-                file_ext = ".mp3" if download_type == "audio" else ".mp4"
-                files = os.listdir(local_path)
-                matching_files = [
-                    os.path.join(local_path, f) for f in files if f.endswith(file_ext)
-                ]
-
-                if matching_files:
-                    newest_file = max(matching_files, key=os.path.getctime)
-                    print("Téléchargement terminé avec succès.")
-                    print(f"Fichier enregistré dans: {newest_file}")
-                    open_file_explorer(newest_file)
-                else:
-                    # Si aucun fichier correspondant n'est trouvé, ouvrir le dossier
-                    print("Téléchargement terminé avec succès.")
-                    print(f"Fichier enregistré dans le dossier: {local_path}")
-                    open_file_explorer(local_path)
-            except Exception as e:
-                print(f"Erreur lors de la recherche du fichier: {e}")
-                print("Téléchargement terminé avec succès.")
-                print(f"Fichier enregistré dans le dossier: {local_path}")
-                # En cas d'erreur, ouvrir simplement le dossier
-                open_file_explorer(local_path)
+            final_path = get_ydl_output(result.stdout.splitlines())
+            print("Téléchargement terminé avec succès.")
+            print(f"Fichier enregistré dans: {final_path}")
+            open_file_explorer(final_path)
 
         except Exception as e2:
             print(f"Toutes les tentatives ont échoué. Erreur finale : {str(e2)}")
+            note_job_error(e2)
             return
 
 
-def download_odysee_video(url):
+@register_site(
+    "odysee",
+    ["odysee.com"],
+    capabilities=("audio", "quality", "clip"),
+    url_pattern=r"https?://odysee\.com/([a-zA-Z0-9\-_@:]+)",
+    label="Odysee",
+)
+def download_odysee_video(url, options=None):
     """Télécharge une vidéo depuis Odysee avec options audio/vidéo et choix de qualité"""
     print("\nAnalyse de la vidéo Odysee...")
 
     # Demander à l'utilisateur s'il souhaite télécharger la vidéo ou seulement l'audio
-    print("\nQue souhaitez-vous télécharger ?")
-    print("1. Vidéo (avec audio)")
-    print("2. Audio uniquement (MP3)")
-
-    download_type = None
-    while download_type is None:
-        try:
-            choice = input(
-                "\nEntrez votre choix (1-2) ou appuyez sur Entrée pour la vidéo: "
-            )
-            if not choice.strip():
-                download_type = "video"
-            else:
-                choice = int(choice)
-                if choice == 1:
-                    download_type = "video"
-                elif choice == 2:
-                    download_type = "audio"
-                else:
-                    print("Veuillez entrer 1 ou 2")
-        except ValueError:
-            print("Veuillez entrer un nombre valide")
+    download_type = ask_download_type(options)
 
     # Déterminer le chemin de destination en fonction du type de téléchargement
     if download_type == "video":
@@ -1012,6 +2068,11 @@ def download_odysee_video(url):
     else:  # audio
         local_path = get_download_path("odysee_audio")
 
+    # Mode extrait: ne télécharger qu'une plage de la vidéo
+    clip = get_time_range(options)
+    # Modèle de sortie yt-dlp (remplacé si le fichier est renommé)
+    outtmpl = get_clip_outtmpl(local_path, clip)
+
     # Essayer d'abord avec yt-dlp (méthode recommandée pour Odysee)
     try:
         print("Extraction des informations de la vidéo...")
@@ -1028,15 +2089,29 @@ def download_odysee_video(url):
 
         with yt_dlp.YoutubeDL(info_opts) as ydl:
             info = ydl.extract_info(url, download=False)
+            # Coût de la tâche si elle est reprise (voir process_queue)
+            note_job_size(estimate_job_cost(info))
             video_title = info.get("title", "video_odysee")
 
             # Nettoyer le titre pour le nom de fichier
             clean_title = re.sub(r'[<>:"/\\|?*]', "_", video_title or "video_odysee")
+            output_title = video_title
+            if clip is not None:
+                output_title = f"{video_title} {format_clip_label(clip)}"
+                clean_title = f"{clean_title} {format_clip_label(clip)}"
+
+            # Pour l'audio, la qualité détermine l'extension du fichier final
+            if download_type == "audio":
+                audio_renditions = ask_audio_renditions(options)
+                audio_bitrate = audio_renditions[0]
+                file_exts = get_audio_extensions(audio_bitrate)
+            else:
+                file_exts = (".mp4",)
 
-            # Déterminer l'extension en fonction du type de téléchargement
-            file_ext = ".mp3" if download_type == "audio" else ".mp4"
-            filename = f"{clean_title}{file_ext}"
-            filepath = os.path.join(local_path, filename)
+            # Chemin attendu, ou fichier existant dans l'un des formats possibles
+            candidates = [os.path.join(local_path, clean_title + ext) for ext in file_exts]
+            filepath = next((c for c in candidates if os.path.exists(c)), candidates[0])
+            filename = os.path.basename(filepath)
 
             # Vérifier si le fichier existe déjà
             if os.path.exists(filepath):
@@ -1045,28 +2120,23 @@ def download_odysee_video(url):
                 print(f"Chemin: {filepath}")
                 print("=" * 60)
 
-                while True:
-                    choice = input("Voulez-vous remplacer ce fichier ? (o/n): ").lower()
-                    if choice in ["o", "oui", "y", "yes"]:
-                        print("Le fichier existant sera remplacé.")
-                        try:
-                            os.remove(filepath)
-                            print("Fichier existant supprimé.")
-                            break
-                        except Exception as e:
-                            print(f"Impossible de supprimer le fichier existant: {e}")
-                            return
-                    elif choice in ["n", "non", "no"]:
-                        print("Téléchargement annulé.")
-                        return
-                    else:
-                        print("Veuillez répondre par 'o' (oui) ou 'n' (non).")
+                # Remplacer, ignorer ou renommer (option on_exists)
+                target_path = resolve_existing_file(filepath, options)
+                if target_path is None:
+                    return
+                if target_path != filepath:
+                    filepath = target_path
+                    filename = os.path.basename(filepath)
+                    clean_title = output_title = os.path.splitext(filename)[0]
+                    outtmpl = get_named_outtmpl(filepath)
 
             # Configuration en fonction du type de téléchargement
             if download_type == "video":
                 # Récupérer les formats disponibles pour la vidéo
                 available_formats = info.get("formats", [])
-                quality_options = get_available_video_qualities(available_formats)
+                quality_options = get_available_video_qualities(
+                    available_formats, info.get("duration")
+                )
 
                 if not quality_options:
                     print(
@@ -1074,81 +2144,40 @@ def download_odysee_video(url):
                     )
                     format_option = "best"
                 else:
-                    # Afficher les options de qualité disponibles
-                    print("\nFormats vidéo disponibles:")
-                    for i, option in enumerate(quality_options, 1):
-                        print(f"  {i}. {option['display_name']}")
-
-                    # Demander à l'utilisateur de choisir
-                    choice = None
-                    while choice is None:
-                        try:
-                            user_input = input(
-                                "\nChoisissez la qualité (numéro) ou appuyez sur Entrée pour la meilleure qualité: "
-                            )
-                            if not user_input.strip():
-                                choice = 1  # Meilleure qualité par défaut
-                            else:
-                                choice = int(user_input)
-                                if choice < 1 or choice > len(quality_options):
-                                    print(
-                                        f"Veuillez entrer un nombre entre 1 et {len(quality_options)}"
-                                    )
-                                    choice = None
-                        except ValueError:
-                            print("Veuillez entrer un nombre valide")
-
-                    # Récupérer le format choisi
-                    selected_option = quality_options[choice - 1]
+                    # Afficher les options de qualité et récupérer le format choisi
+                    selected_option = ask_video_quality(quality_options, options)
                     format_option = selected_option["format_string"]
                     print(f"\nTéléchargement en {selected_option['display_name']}...")
 
-            else:  # Audio uniquement
-                # Options de qualité audio
-                audio_quality_options = [
-                    {"bitrate": "192", "display_name": "Haute qualité (192 kbps)"},
-                    {"bitrate": "128", "display_name": "Qualité standard (128 kbps)"},
-                    {"bitrate": "96", "display_name": "Basse qualité (96 kbps)"},
-                ]
-
-                # Afficher les options de qualité audio
-                print("\nFormats audio disponibles:")
-                for i, option in enumerate(audio_quality_options, 1):
-                    print(f"  {i}. {option['display_name']}")
-
-                # Demander à l'utilisateur de choisir
-                choice = None
-                while choice is None:
-                    try:
-                        user_input = input(
-                            "\nChoisissez la qualité audio (numéro) ou appuyez sur Entrée pour la meilleure qualité: "
-                        )
-                        if not user_input.strip():
-                            choice = 1  # Meilleure qualité par défaut
-                        else:
-                            choice = int(user_input)
-                            if choice < 1 or choice > len(audio_quality_options):
-                                print(
-                                    f"Veuillez entrer un nombre entre 1 et {len(audio_quality_options)}"
-                                )
-                                choice = None
-                    except ValueError:
-                        print("Veuillez entrer un nombre valide")
-
-                # Récupérer la qualité audio choisie
-                selected_audio_option = audio_quality_options[choice - 1]
-                audio_bitrate = selected_audio_option["bitrate"]
-                print(
-                    f"\nTéléchargement audio en {selected_audio_option['display_name']}..."
-                )
+                    # Pistes séparées: elles coexistent avec le fichier fusionné
+                    required = selected_option["estimated_size"]
+                    if required and not selected_option["progressive"]:
+                        required *= MERGE_OVERHEAD_FACTOR
+                    if not ensure_disk_space(local_path, required, options is None):
+                        return
 
+            else:  # Audio uniquement (qualité déjà choisie)
                 # Pour l'audio, on utilise le meilleur format audio disponible
                 format_option = "bestaudio/best"
 
+                # Mode streaming: yt-dlp alimente ffmpeg directement
+                if (
+                    clip is None
+                    and len(audio_renditions) == 1
+                    and can_stream_audio(audio_bitrate)
+                ):
+                    output_path = os.path.join(local_path, f"{clean_title}.mp3")
+                    if stream_audio_to_ffmpeg(url, output_path, audio_bitrate):
+                        print("Téléchargement terminé avec succès.")
+                        print(f"Fichier enregistré dans: {output_path}")
+                        open_file_explorer(output_path)
+                        return
+                    print("Passage au téléchargement classique...")
+
             # Options pour le téléchargement
             ydl_opts = {
                 "format": format_option,
-                "outtmpl": os.path.join(local_path, "%(title)s.%(ext)s"),
+                "outtmpl": outtmpl,
                 "ffmpeg_location": r"C:\ffmpeg\bin",
                 "noplaylist": True,
                 "nocheckcertificate": True,
@@ -1163,40 +2192,41 @@ def download_odysee_video(url):
                 # Pour la vidéo, forcer la sortie en MP4
                 ydl_opts["merge_output_format"] = "mp4"
             else:  # Audio uniquement
-                # Pour l'audio, extraire l'audio et convertir en MP3
-                ydl_opts["extractaudio"] = True
-                ydl_opts["audioformat"] = "mp3"
-                ydl_opts["audioquality"] = audio_bitrate
-                # Options supplémentaires pour la conversion audio
-                ydl_opts["postprocessors"] = [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": audio_bitrate,
-                    }
-                ]
+                # Extraire l'audio: MP3 au débit choisi ou copie du flux natif
+                ydl_opts.update(get_audio_ydl_options(audio_bitrate))
 
-            # Télécharger avec yt-dlp
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-
-            # Vérifier le fichier téléchargé
-            file_ext = ".mp3" if download_type == "audio" else ".mp4"
-            final_path = filepath
-
-            # Si le fichier n'existe pas avec le nom prévu, chercher le fichier réel
-            if not os.path.exists(final_path):
-                files = os.listdir(local_path)
-                matching_files = [
-                    os.path.join(local_path, f) for f in files if f.endswith(file_ext)
-                ]
+            ydl_opts.update(get_clip_ydl_options(clip))
 
-                if matching_files:
-                    newest_file = max(
-                        matching_files, key=os.path.getctime, default=None
-                    )
-                    if newest_file:
-                        final_path = newest_file
+            # Plusieurs rendus: un seul téléchargement et une seule passe ffmpeg
+            if download_type == "audio" and len(audio_renditions) > 1:
+                output_paths = download_audio_renditions(
+                    url, ydl_opts, local_path, output_title, audio_renditions
+                )
+                if not output_paths:
+                    raise Exception("Échec de la production des rendus audio")
+                print("Téléchargement terminé avec succès.")
+                for output_path in output_paths:
+                    print(f"Fichier enregistré dans: {output_path}")
+                open_file_explorer(output_paths[0])
+                return
+
+            # Télécharger avec yt-dlp
+            # Empreinte du fichier final pour l'index d'intégrité
+            ydl_opts["post_hooks"] = [make_ydl_post_hook()]
+            # Fichier réel (au cas où le nom aurait été modifié par yt-dlp)
+            outputs = track_ydl_outputs(ydl_opts)
+
+            # Progression affichée par le gestionnaire commun (pas par yt-dlp)
+            progress_job = get_progress_manager().start_job(video_title)
+            ydl_opts["progress_hooks"] = [make_ydl_progress_hook(progress_job)]
+            ydl_opts["noprogress"] = True
+            bandwidth_job = get_bandwidth_scheduler().register(url, get_job_priority())
+
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl, progress_job, bandwidth_job:
+                # Part de la bande passante partagée, réajustée en cours de route
+                bandwidth_job.attach_ydl(ydl)
+                final_path = run_ydl_download(ydl, url, outputs)
+                progress_job.finish()
 
             print("Téléchargement terminé avec succès.")
             print(f"Fichier enregistré dans: {final_path}")
@@ -1214,7 +2244,10 @@ def download_odysee_video(url):
 
                 # Extraire le titre depuis la balise title
                 title_tag = soup.find("title")
-                video_name = (title_tag.text if title_tag else "video_odysee") + ".mp4"
+                video_name = title_tag.text if title_tag else "video_odysee"
+                if clip is not None:
+                    video_name = f"{video_name} {format_clip_label(clip)}"
+                video_name += ".mp4"
                 video_name = re.sub(r'[<>:"/\\|?*]', "_", video_name)
                 video_path = os.path.join(local_path, video_name)
 
@@ -1223,18 +2256,10 @@ def download_odysee_video(url):
                     print(
                         f"\nAttention: Le fichier '{video_name}' existe déjà dans '{local_path}'."
                     )
-                    while True:
-                        choice = input(
-                            "Voulez-vous remplacer ce fichier ? (o/n): "
-                        ).lower()
-                        if choice in ["o", "oui", "y", "yes"]:
-                            print("Le fichier existant sera remplacé.")
-                            break
-                        elif choice in ["n", "non", "no"]:
-                            print("Téléchargement annulé.")
-                            return
-                        else:
-                            print("Veuillez répondre par 'o' (oui) ou 'n' (non).")
+                    # Le fichier remplacé est simplement réécrit
+                    video_path = resolve_existing_file(video_path, options, remove=False)
+                    if video_path is None:
+                        return
 
                 # Chercher l'URL de la vidéo dans les métadonnées JSON-LD
                 script_tag = soup.find("script", type="application/ld+json")
@@ -1242,7 +2267,15 @@ def download_odysee_video(url):
                     json_content = json.loads(script_tag.string)
                     video_url = json_content.get("contentUrl")
 
-                    if video_url:
+                    if video_url and clip is not None:
+                        # Seuls les octets de la plage demandée sont récupérés
+                        if download_clip_with_ffmpeg(video_url, video_path, clip):
+                            print("Téléchargement terminé avec succès.")
+                            print(f"Fichier enregistré dans: {video_path}")
+                            open_file_explorer(video_path)
+                        else:
+                            note_job_error("Échec du téléchargement de l'extrait")
+                    elif video_url:
                         print("Téléchargement de la vidéo...")
                         response = requests.get(video_url, stream=True)
 
@@ -1256,52 +2289,51 @@ def download_odysee_video(url):
                         open_file_explorer(video_path)
                     else:
                         print("URL de la vidéo non trouvée dans les métadonnées.")
+                        note_job_error("URL de la vidéo non trouvée dans les métadonnées")
                 else:
                     print("Métadonnées JSON-LD non trouvées.")
+                    note_job_error("Métadonnées JSON-LD non trouvées")
 
             except Exception as e2:
                 print(f"Erreur avec la méthode alternative: {str(e2)}")
+                note_job_error(e2)
 
         else:  # Audio demandé mais yt-dlp a échoué
             print("Désolé, l'extraction audio depuis Odysee nécessite yt-dlp.")
             print(
                 "Veuillez réessayer ou vérifier que yt-dlp est correctement installé."
             )
+            note_job_error(e)
 
 
-def download_instagram_video(url):
+@register_site(
+    "instagram",
+    ["instagram.com"],
+    capabilities=("audio",),
+    url_pattern=r"https?://(www\.)?instagram\.com/(p|reel|tv)/([a-zA-Z0-9_-]+)",
+    label="Instagram",
+)
+def download_instagram_video(url, options=None):
     """Télécharge une vidéo depuis Instagram avec yt-dlp"""
     print("\nAnalyse de la vidéo Instagram...")
 
     # Demander à l'utilisateur s'il souhaite télécharger la vidéo ou seulement l'audio
-    print("\nQue souhaitez-vous télécharger ?")
-    print("1. Vidéo (avec audio)")
-    print("2. Audio uniquement (MP3)")
-
-    download_type = None
-    while download_type is None:
-        try:
-            choice = input(
-                "\nEntrez votre choix (1-2) ou appuyez sur Entrée pour la vidéo: "
-            )
-            if not choice.strip():
-                download_type = "video"
-            else:
-                choice = int(choice)
-                if choice == 1:
-                    download_type = "video"
-                elif choice == 2:
-                    download_type = "audio"
-                else:
-                    print("Veuillez entrer 1 ou 2")
-        except ValueError:
-            print("Veuillez entrer un nombre valide")
+    download_type = ask_download_type(options)
 
     # Déterminer le chemin de destination en fonction du type de téléchargement
     if download_type == "video":
         local_path = get_download_path("generic")
+        file_exts = (".mp4",)
     else:  # audio
         local_path = get_download_path("generic_audio")
+        # Pas de choix de qualité pour Instagram: rendus par défaut des
+        # paramètres, ou débit demandé par l'option audio_bitrate
+        if options is not None:
+            audio_renditions = ask_audio_renditions(options)
+        else:
+            audio_renditions = get_audio_renditions()
+        audio_bitrate = audio_renditions[0]
+        file_exts = get_audio_extensions(audio_bitrate)
 
     # Add cookies file if available
     cookies_file = os.path.join(
@@ -1309,6 +2341,9 @@ def download_instagram_video(url):
     )
     use_cookies = os.path.exists(cookies_file)
 
+    # Modèle de sortie yt-dlp (remplacé si le fichier est renommé)
+    outtmpl = os.path.join(local_path, "%(title)s.%(ext)s")
+
     try:
         # Options pour l'extraction des informations
         info_opts = {
@@ -1330,15 +2365,16 @@ def download_instagram_video(url):
         with yt_dlp.YoutubeDL(info_opts) as ydl:
             print("Extraction des informations de la vidéo Instagram...")
             info = ydl.extract_info(url, download=False)
+            # Coût de la tâche si elle est reprise (voir process_queue)
+            note_job_size(estimate_job_cost(info))
             video_title = info.get("title", "instagram_video")
 
             # Nettoyer le titre pour le nom de fichier
             clean_title = re.sub(r'[<>:"/\\|?*]', "_", video_title or "instagram_video")
 
-            # Déterminer l'extension en fonction du type de téléchargement
-            file_ext = ".mp3" if download_type == "audio" else ".mp4"
-            filename = f"{clean_title}{file_ext}"
-            filepath = os.path.join(local_path, filename)
+            # Chemin attendu, ou fichier existant dans l'un des formats possibles
+            candidates = [os.path.join(local_path, clean_title + ext) for ext in file_exts]
+            filepath = next((c for c in candidates if os.path.exists(c)), candidates[0])
 
             # Vérifier si le fichier existe déjà
             if os.path.exists(filepath):
@@ -1347,27 +2383,19 @@ def download_instagram_video(url):
                 print(f"Chemin: {filepath}")
                 print("=" * 60)
 
-                while True:
-                    choice = input("Voulez-vous remplacer ce fichier ? (o/n): ").lower()
-                    if choice in ["o", "oui", "y", "yes"]:
-                        print("Le fichier existant sera remplacé.")
-                        try:
-                            os.remove(filepath)
-                            print("Fichier existant supprimé.")
-                            break
-                        except Exception as e:
-                            print(f"Impossible de supprimer le fichier existant: {e}")
-                            return
-                    elif choice in ["n", "non", "no"]:
-                        print("Téléchargement annulé.")
-                        return
-                    else:
-                        print("Veuillez répondre par 'o' (oui) ou 'n' (non).")
+                # Remplacer, ignorer ou renommer (option on_exists)
+                target_path = resolve_existing_file(filepath, options)
+                if target_path is None:
+                    return
+                if target_path != filepath:
+                    filepath = target_path
+                    video_title = os.path.splitext(os.path.basename(filepath))[0]
+                    outtmpl = get_named_outtmpl(filepath)
 
             # Options pour le téléchargement
             ydl_opts = {
                 "format": "best" if download_type == "video" else "bestaudio/best",
-                "outtmpl": os.path.join(local_path, "%(title)s.%(ext)s"),
+                "outtmpl": outtmpl,
                 "ffmpeg_location": r"C:\ffmpeg\bin",
                 "noplaylist": True,
                 "nocheckcertificate": True,
@@ -1382,44 +2410,43 @@ def download_instagram_video(url):
                 # Pour la vidéo, forcer la sortie en MP4
                 ydl_opts["merge_output_format"] = "mp4"
             else:  # Audio uniquement
-                # Pour l'audio, extraire l'audio et convertir en MP3
-                ydl_opts["extractaudio"] = True
-                ydl_opts["audioformat"] = "mp3"
-                ydl_opts["audioquality"] = "192"
-                # Options supplémentaires pour la conversion audio
-                ydl_opts["postprocessors"] = [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": "192",
-                    }
-                ]
+                # Extraire l'audio: MP3 au débit choisi ou copie du flux natif
+                ydl_opts.update(get_audio_ydl_options(audio_bitrate))
 
             if use_cookies:
                 ydl_opts["cookiefile"] = cookies_file
 
+            # Plusieurs rendus: un seul téléchargement et une seule passe ffmpeg
+            if download_type == "audio" and len(audio_renditions) > 1:
+                output_paths = download_audio_renditions(
+                    url, ydl_opts, local_path, video_title, audio_renditions
+                )
+                if not output_paths:
+                    raise Exception("Échec de la production des rendus audio")
+                print("Téléchargement Instagram terminé avec succès.")
+                for output_path in output_paths:
+                    print(f"Fichier enregistré dans: {output_path}")
+                open_file_explorer(output_paths[0])
+                return
+
             # Télécharger la vidéo avec yt-dlp
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # Empreinte du fichier final pour l'index d'intégrité
+            ydl_opts["post_hooks"] = [make_ydl_post_hook()]
+            # Fichier réel (au cas où le nom aurait été modifié par yt-dlp)
+            outputs = track_ydl_outputs(ydl_opts)
+
+            # Progression affichée par le gestionnaire commun (pas par yt-dlp)
+            progress_job = get_progress_manager().start_job(video_title)
+            ydl_opts["progress_hooks"] = [make_ydl_progress_hook(progress_job)]
+            ydl_opts["noprogress"] = True
+            bandwidth_job = get_bandwidth_scheduler().register(url, get_job_priority())
+
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl, progress_job, bandwidth_job:
+                # Part de la bande passante partagée, réajustée en cours de route
+                bandwidth_job.attach_ydl(ydl)
                 print(f"\nTéléchargement Instagram en cours...")
-                ydl.download([url])
-
-                # Vérifier le fichier téléchargé
-                file_ext = ".mp3" if download_type == "audio" else ".mp4"
-                final_path = filepath
-
-                # Si le fichier n'existe pas avec le nom prévu, chercher le fichier réel
-                if not os.path.exists(final_path):
-                    files = os.listdir(local_path)
-                    matching_files = [
-                        os.path.join(local_path, f) for f in files if f.endswith(file_ext)
-                    ]
-
-                    if matching_files:
-                        newest_file = max(
-                            matching_files, key=os.path.getctime, default=None
-                        )
-                        if newest_file:
-                            final_path = newest_file
+                final_path = run_ydl_download(ydl, url, outputs)
+                progress_job.finish()
 
                 print("Téléchargement Instagram terminé avec succès.")
                 print(f"Fichier enregistré dans: {final_path}")
@@ -1438,7 +2465,7 @@ def download_instagram_video(url):
                 "--format",
                 "best" if download_type == "video" else "bestaudio/best",
                 "--output",
-                os.path.join(local_path, "%(title)s.%(ext)s"),
+                outtmpl,
                 "--ffmpeg-location",
                 r"C:\ffmpeg\bin",
                 "--no-playlist",
@@ -1448,143 +2475,511 @@ def download_instagram_video(url):
             if download_type == "video":
                 cmd.extend(["--merge-output-format", "mp4"])
             else:
-                cmd.extend([
-                    "--extract-audio",
-                    "--audio-format",
-                    "mp3",
-                    "--audio-quality",
-                    "192",
-                ])
+                cmd.extend(get_audio_cli_args(audio_bitrate))
+
+            if use_cookies:
+                cmd.extend(["--cookies", cookies_file])
+
+            # yt-dlp affiche le chemin du fichier final
+            cmd.extend(YDL_PRINT_FILEPATH_ARGS)
+            cmd.append(url)
+
+            print("\nTéléchargement Instagram avec subprocess...")
+            result = subprocess.run(cmd, capture_output=True, text=True)
+
+            if result.returncode != 0:
+                print(f"Erreur subprocess: {result.stderr}")
+                raise Exception(result.stderr)
+
+            final_path = get_ydl_output(result.stdout.splitlines())
+            print("Téléchargement Instagram terminé avec succès.")
+            print(f"Fichier enregistré dans: {final_path}")
+            open_file_explorer(final_path)
+
+        except Exception as e2:
+            print(f"Toutes les tentatives Instagram ont échoué. Erreur finale : {str(e2)}")
+            note_job_error(e2)
+            return
+
+
+# Extensions des fichiers vidéo pris en compte pour l'extraction audio locale
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm", ".avi", ".mov", ".m4v", ".flv", ".wmv", ".ts")
+
+
+def is_glob_pattern(path):
+    """Vérifie si un chemin contient des caractères de motif glob"""
+    return any(char in path for char in "*?[")
+
+
+def collect_local_videos(path):
+    """
+    Liste les fichiers vidéo désignés par un chemin local.
+
+    Args:
+        path (str): Fichier, dossier (parcouru récursivement) ou motif glob
+
+    Returns:
+        list: Chemins des fichiers vidéo trouvés, triés
+    """
+    if os.path.isfile(path):
+        return [path]
+
+    if os.path.isdir(path):
+        files = []
+        for root, _dirs, names in os.walk(path):
+            for name in names:
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    files.append(os.path.join(root, name))
+        return sorted(files)
+
+    if is_glob_pattern(path):
+        return sorted(
+            f
+            for f in glob.glob(path, recursive=True)
+            if os.path.isfile(f) and f.lower().endswith(VIDEO_EXTENSIONS)
+        )
+
+    return []
+
+
+def get_local_audio_output_path(file_path, extension=".mp3"):
+    """
+    Détermine le fichier audio de sortie pour une vidéo locale.
+
+    Une vidéo située sous 'Video/...' est extraite dans le dossier 'Audio/...'
+    correspondant, sinon dans le même dossier que la vidéo.
+    """
+    input_dir = os.path.dirname(os.path.abspath(file_path))
+    input_filename = os.path.basename(file_path)
+    name_without_ext = os.path.splitext(input_filename)[0]
+    output_filename = name_without_ext + extension
+
+    # Obtenir les dossiers de base
+    downloads_folder = get_windows_downloads_folder()
+    video_folder = os.path.join(downloads_folder, "Video")
+    audio_folder = os.path.join(downloads_folder, "Audio")
+
+    if input_dir.startswith(video_folder):
+        # Obtenir le sous-dossier relatif
+        relative_path = os.path.relpath(input_dir, video_folder)
+        if relative_path and not relative_path.startswith("."):
+            return os.path.join(audio_folder, relative_path, output_filename)
+
+    # Pas dans un dossier Video, mettre dans le même dossier
+    return os.path.join(input_dir, output_filename)
+
+
+def get_local_audio_outputs(file_path):
+    """
+    Fichiers audio à produire pour une vidéo locale: MP3 192 kbps, ou les
+    rendus de 'audio_renditions' (settings.json), dans le dossier Audio miroir.
+
+    Returns:
+        list: Couples (chemin de sortie, qualité), le premier étant le principal
+    """
+    renditions = get_audio_renditions(default="192")
+
+    native_extension = DEFAULT_NATIVE_EXTENSION
+    if NATIVE_AUDIO in renditions:
+        native_extension = get_native_audio_extension(probe_audio_codec(file_path))
+
+    base_path = os.path.splitext(get_local_audio_output_path(file_path))[0]
+    return get_rendition_outputs(base_path, renditions, native_extension)
+
+
+# Manifeste des extractions audio locales (mode incrémental)
+AUDIO_MANIFEST_NAME = ".audio_manifest.json"
+# Taille lue au début et à la fin du fichier pour l'empreinte rapide
+PARTIAL_HASH_CHUNK = 1024 * 1024
+
+
+def get_audio_manifest_path():
+    """Chemin du manifeste, à la racine du dossier Audio"""
+    return os.path.join(get_windows_downloads_folder(), "Audio", AUDIO_MANIFEST_NAME)
+
+
+def load_audio_manifest():
+    """Charge le manifeste des extractions (dictionnaire vide si absent)"""
+    manifest_path = get_audio_manifest_path()
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Manifeste illisible, il sera recréé: {e}")
+        return {}
+
+
+def save_audio_manifest(manifest):
+    """Enregistre le manifeste de manière atomique"""
+    manifest_path = get_audio_manifest_path()
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, manifest_path)
+    hide_path(manifest_path)
+
+
+def partial_file_hash(file_path):
+    """
+    Empreinte rapide d'un fichier: taille + premier et dernier Mo.
+    Suffisant pour détecter un fichier remplacé sans relire des Go de vidéo.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    size = os.path.getsize(file_path)
+    digest.update(str(size).encode())
+    with open(file_path, "rb") as f:
+        digest.update(f.read(PARTIAL_HASH_CHUNK))
+        if size > 2 * PARTIAL_HASH_CHUNK:
+            f.seek(-PARTIAL_HASH_CHUNK, os.SEEK_END)
+            digest.update(f.read(PARTIAL_HASH_CHUNK))
+    return digest.hexdigest()
+
+
+def record_audio_conversion(manifest, file_path, outputs, file_hash=None):
+    """
+    Enregistre l'état de la vidéo source après une extraction réussie
+
+    Args:
+        outputs (list): Couples (chemin de sortie, qualité) de tous les rendus
+    """
+    stat = os.stat(file_path)
+    manifest[os.path.abspath(file_path)] = {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "hash": file_hash or partial_file_hash(file_path),
+        "outputs": [os.path.abspath(output_path) for output_path, _ in outputs],
+    }
+
+
+def is_audio_up_to_date(manifest, file_path, outputs):
+    """
+    Vérifie si l'audio extrait d'une vidéo est à jour (comme 'make'): tous
+    les rendus doivent exister et avoir été produits depuis cette vidéo.
+
+    La taille et la date suffisent dans le cas courant; l'empreinte partielle
+    n'est calculée que si la date a changé sans changement de taille.
+
+    Args:
+        outputs (list): Couples (chemin de sortie, qualité) de tous les rendus
+    """
+    output_paths = [os.path.abspath(output_path) for output_path, _ in outputs]
+    if not all(os.path.exists(output_path) for output_path in output_paths):
+        return False
+
+    stat = os.stat(file_path)
+    entry = manifest.get(os.path.abspath(file_path))
+
+    if entry is None:
+        # Sorties existantes sans historique: à jour si plus récentes que la source
+        if all(os.path.getmtime(path) >= stat.st_mtime for path in output_paths):
+            record_audio_conversion(manifest, file_path, outputs)
+            return True
+        return False
+
+    # Un rendu ajouté à audio_renditions depuis l'extraction: à refaire
+    if not set(output_paths) <= set(entry.get("outputs") or [entry.get("output")]):
+        return False
+    if entry.get("size") != stat.st_size:
+        return False
+    if entry.get("mtime") == stat.st_mtime:
+        return True
+
+    # Même taille mais date différente (copie, restauration...): comparer le contenu
+    file_hash = partial_file_hash(file_path)
+    if entry.get("hash") == file_hash:
+        entry["mtime"] = stat.st_mtime
+        return True
+    return False
+
+
+def download_local_audio(file_path, options=None):
+    """
+    Extrait l'audio d'un fichier vidéo local, ou de tous les fichiers
+    vidéo d'un dossier ou d'un motif glob (voir download_local_audio_batch)
+
+    Args:
+        file_path (str): Fichier, dossier ou motif glob
+        options (dict): Options de téléchargement (None: mode interactif)
+    """
+    print("\nExtraction de l'audio depuis le fichier local...")
+
+    files = collect_local_videos(file_path)
+    if not files:
+        print("Le fichier n'existe pas.")
+        return
+
+    if len(files) > 1 or not os.path.isfile(file_path):
+        download_local_audio_batch(files, options=options)
+        return
+
+    # Déterminer les fichiers de sortie (le premier est le fichier principal)
+    outputs = get_local_audio_outputs(file_path)
+    output_path = outputs[0][0]
+    output_filename = os.path.basename(output_path)
+    manifest = load_audio_manifest()
+
+    # Mode incrémental: rien à faire si la vidéo n'a pas changé
+    if get_setting("incremental_audio") and is_audio_up_to_date(
+        manifest, file_path, outputs
+    ):
+        save_audio_manifest(manifest)
+        print(f"Le fichier audio '{output_filename}' est déjà à jour.")
+        note_job_output(output_path)
+        return
+
+    # Vérifier si le fichier de sortie existe déjà
+    if os.path.exists(output_path):
+        print(f"\nLe fichier audio '{output_filename}' existe déjà.")
+        # Les rendus sont nommés d'après la vidéo: pas de renommage possible
+        if get_download_option(options, "on_exists") == "rename":
+            print("Renommage impossible pour l'extraction locale, fichier ignoré.")
+            note_job_output(output_path)
+            return
+        if resolve_existing_file(output_path, options) is None:
+            return
+
+    # Extraire l'audio avec ffmpeg (tous les rendus en une passe)
+    print("Extraction en cours...")
+    success, error = extract_audio_renditions(file_path, outputs)
+
+    if success:
+        record_audio_conversion(manifest, file_path, outputs)
+        save_audio_manifest(manifest)
+        print("Extraction d'audio terminée.")
+        for rendition_path, _ in outputs:
+            print(f"Fichier enregistré dans: {rendition_path}")
+        open_file_explorer(output_path)
+    else:
+        print("Échec de l'extraction audio.")
+        print(f"Erreur: {error}")
+        note_job_error(f"Échec de l'extraction audio: {error}")
+        print(
+            "Le fichier n'est peut-être pas un fichier vidéo dont on peut extraire l'audio."
+        )
+
+
+def download_local_audio_batch(files, workers=None, options=None):
+    """
+    Extrait l'audio de plusieurs vidéos locales en parallèle.
+
+    Chaque extraction est un processus ffmpeg séparé; un pool de threads
+    limite le nombre de processus simultanés au nombre de cœurs. Les plus
+    petites vidéos passent en premier (avec vieillissement): une longue
+    vidéo ne retarde pas toute une série de courts extraits.
+
+    Args:
+        files (list): Chemins des fichiers vidéo
+        workers (int): Nombre d'extractions simultanées (défaut: nombre de cœurs)
+        options (dict): Options de téléchargement (None: mode interactif);
+            on_exists décide du sort des fichiers audio déjà présents
+    """
+    workers = workers or os.cpu_count() or 2
+    # (vidéo, fichier audio principal, rendus à produire)
+    jobs = []
+    # Deux vidéos peuvent donner le même fichier audio (cours.mp4 et
+    # cours.mkv -> cours.mp3): seule la première est extraite
+    claimed = {}
+    for f in files:
+        outputs = get_local_audio_outputs(f)
+        collision = next(
+            (claimed[os.path.normcase(path)] for path, _ in outputs
+             if os.path.normcase(path) in claimed),
+            None,
+        )
+        if collision:
+            print(f"Ignoré: {f} donnerait le même fichier audio que {collision}")
+            continue
+        for path, _ in outputs:
+            claimed[os.path.normcase(path)] = f
+        jobs.append((f, outputs[0][0], outputs))
+    manifest = load_audio_manifest()
+    incremental = get_setting("incremental_audio")
+
+    print(f"\n{len(jobs)} fichiers vidéo trouvés.")
+
+    # Une seule question pour tous les fichiers audio déjà présents
+    existing = [job for job in jobs if os.path.exists(job[1])]
+    if existing and not incremental and options is not None:
+        print(f"{len(existing)} fichiers audio existent déjà.")
+        if get_download_option(options, "on_exists") == "overwrite":
+            print("Ils seront remplacés.")
+        else:
+            # rename n'a pas de sens ici: les rendus sont nommés d'après la vidéo
+            print("Ils seront ignorés.")
+            jobs = [job for job in jobs if job not in existing]
+    elif existing and not incremental:
+        print(f"{len(existing)} fichiers audio existent déjà.")
+        while True:
+            choice = ask_user(
+                "Voulez-vous les remplacer ? (o = remplacer, n = les ignorer, "
+                "i = uniquement les vidéos nouvelles ou modifiées): "
+            ).lower()
+            if choice in ["o", "oui", "y", "yes"]:
+                break
+            elif choice in ["n", "non", "no"]:
+                jobs = [job for job in jobs if job not in existing]
+                break
+            elif choice in ["i"]:
+                incremental = True
+                break
+            else:
+                print("Veuillez répondre par 'o', 'n' ou 'i'.")
+
+    # Mode incrémental: ne garder que les vidéos nouvelles ou modifiées
+    if incremental:
+        candidates = len(jobs)
+        jobs = [
+            job for job in jobs if not is_audio_up_to_date(manifest, job[0], job[2])
+        ]
+        print(f"{candidates - len(jobs)} fichiers audio déjà à jour.")
+
+    for _, output_path, _ in jobs:
+        if os.path.exists(output_path):
+            try:
+                os.remove(output_path)
+            except Exception as e:
+                print(f"Impossible de supprimer {output_path}: {e}")
 
-            if use_cookies:
-                cmd.extend(["--cookies", cookies_file])
+    if not jobs:
+        save_audio_manifest(manifest)
+        print("Rien à extraire.")
+        # Tout est déjà extrait: la tâche de la file a abouti
+        note_job_output(os.path.dirname(get_local_audio_outputs(files[0])[0][0]))
+        return
 
-            cmd.append(url)
+    total = len(jobs)
+    total_bytes = sum(os.path.getsize(job[0]) for job in jobs)
+    print(f"Extraction de {total} fichiers avec {workers} processus ffmpeg...")
 
-            print("\nTéléchargement Instagram avec subprocess...")
-            result = subprocess.run(cmd, capture_output=True, text=True)
+    start_time = time.time()
+    done_bytes = 0
+    failures = []
 
-            if result.returncode != 0:
-                print(f"Erreur subprocess: {result.stderr}")
-                raise Exception(result.stderr)
+    with JobScheduler(workers) as scheduler:
+        futures = {
+            scheduler.submit(
+                extract_audio_renditions, f, outputs, cost=os.path.getsize(f)
+            ): (f, outputs)
+            for f, _, outputs in jobs
+        }
+        for index, future in enumerate(as_completed(futures), 1):
+            file_path, outputs = futures[future]
+            success, error = future.result()
+            done_bytes += os.path.getsize(file_path)
+
+            elapsed = time.time() - start_time
+            speed = done_bytes / (1024 * 1024 * elapsed) if elapsed > 0 else 0
+            status = "OK" if success else "ÉCHEC"
+            print(
+                f"[{index}/{total}] {status} {os.path.basename(file_path)} "
+                f"({done_bytes * 100 / max(total_bytes, 1):.0f}% - {speed:.1f} MB/s)"
+            )
+            if success:
+                record_audio_conversion(manifest, file_path, outputs)
+            else:
+                failures.append((file_path, error))
 
-            # Essayer de trouver le fichier le plus récent avec la bonne extension
-            try:
-                file_ext = ".mp3" if download_type == "audio" else ".mp4"
-                files = os.listdir(local_path)
-                matching_files = [
-                    os.path.join(local_path, f) for f in files if f.endswith(file_ext)
-                ]
+    save_audio_manifest(manifest)
 
-                if matching_files:
-                    newest_file = max(matching_files, key=os.path.getctime)
-                    print("Téléchargement Instagram terminé avec succès.")
-                    print(f"Fichier enregistré dans: {newest_file}")
-                    open_file_explorer(newest_file)
-                else:
-                    print("Téléchargement Instagram terminé avec succès.")
-                    print(f"Fichier enregistré dans le dossier: {local_path}")
-                    open_file_explorer(local_path)
-            except Exception as e:
-                print(f"Erreur lors de la recherche du fichier: {e}")
-                print("Téléchargement Instagram terminé avec succès.")
-                print(f"Fichier enregistré dans le dossier: {local_path}")
-                open_file_explorer(local_path)
+    elapsed = time.time() - start_time
+    print("\n" + "=" * 60)
+    print(f"Extraction terminée: {total - len(failures)}/{total} fichiers")
+    print(
+        f"Temps total: {elapsed:.1f} s - {total_bytes / (1024 * 1024 * max(elapsed, 0.001)):.1f} MB/s, "
+        f"{total / max(elapsed, 0.001):.2f} fichiers/s"
+    )
+    for file_path, error in failures:
+        last_line = (error or "").strip().splitlines()[-1:] or ["erreur inconnue"]
+        print(f"  Échec: {file_path}: {last_line[0]}")
+        note_job_error(f"{file_path}: {last_line[0]}")
+    print("=" * 60)
 
-        except Exception as e2:
-            print(f"Toutes les tentatives Instagram ont échoué. Erreur finale : {str(e2)}")
-            return
+    open_file_explorer(os.path.dirname(jobs[0][1]))
 
 
-def download_local_audio(file_path):
-    """Extrait l'audio d'un fichier vidéo local"""
-    print("\nExtraction de l'audio depuis le fichier local...")
+def watch_video_folder(workers=None):
+    """
+    Surveille le dossier Video et extrait automatiquement l'audio de chaque
+    nouvelle vidéo complètement écrite dans le dossier Audio correspondant.
 
-    if not os.path.exists(file_path):
-        print("Le fichier n'existe pas.")
-        return
+    Args:
+        workers (int): Nombre d'extractions simultanées (défaut: nombre de cœurs)
+    """
+    video_folder = os.path.join(get_windows_downloads_folder(), "Video")
+    os.makedirs(video_folder, exist_ok=True)
+    workers = workers or os.cpu_count() or 2
 
-    # Déterminer le chemin de sortie
-    input_dir = os.path.dirname(file_path)
-    input_filename = os.path.basename(file_path)
-    name_without_ext = os.path.splitext(input_filename)[0]
-    output_filename = name_without_ext + ".mp3"
+    manifest = load_audio_manifest()
+    manifest_lock = threading.Lock()
 
-    # Obtenir les dossiers de base
-    downloads_folder = get_windows_downloads_folder()
-    video_folder = os.path.join(downloads_folder, "Video")
-    audio_folder = os.path.join(downloads_folder, "Audio")
+    def convert(file_path):
+        # Les exceptions d'une tâche de l'ordonnanceur ne sont lues par
+        # personne: les afficher ici
+        try:
+            extract(file_path)
+        except Exception as e:
+            print(f"Échec de l'extraction de {file_path}: {e}")
 
-    output_path = None
-    if input_dir.startswith(video_folder):
-        # Obtenir le sous-dossier relatif
-        relative_path = os.path.relpath(input_dir, video_folder)
-        if relative_path and not relative_path.startswith("."):
-            audio_subfolder = os.path.join(audio_folder, relative_path)
-            os.makedirs(audio_subfolder, exist_ok=True)
-            output_path = os.path.join(audio_subfolder, output_filename)
+    def extract(file_path):
+        outputs = get_local_audio_outputs(file_path)
+        output_path = outputs[0][0]
+        with manifest_lock:
+            if is_audio_up_to_date(manifest, file_path, outputs):
+                return
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+        print(f"\nExtraction: {file_path}")
+        success, error = extract_audio_renditions(file_path, outputs)
+        if success:
+            with manifest_lock:
+                record_audio_conversion(manifest, file_path, outputs)
+                save_audio_manifest(manifest)
+            print(f"Audio enregistré: {output_path}")
         else:
-            output_path = os.path.join(input_dir, output_filename)
-    else:
-        # Pas dans un dossier Video, mettre dans le même dossier
-        output_path = os.path.join(input_dir, output_filename)
+            last_line = (error or "").strip().splitlines()[-1:] or ["erreur inconnue"]
+            print(f"Échec de l'extraction de {file_path}: {last_line[0]}")
 
-    # Vérifier si le fichier de sortie existe déjà
-    if os.path.exists(output_path):
-        print(f"\nLe fichier audio '{output_filename}' existe déjà.")
-        while True:
-            choice = input("Voulez-vous remplacer ce fichier ? (o/n): ").lower()
-            if choice in ["o", "oui", "y", "yes"]:
-                try:
-                    os.remove(output_path)
-                    print("Fichier existant supprimé.")
-                    break
-                except Exception as e:
-                    print(f"Impossible de supprimer le fichier existant: {e}")
-                    return
-            elif choice in ["n", "non", "no"]:
-                print("Extraction annulée.")
-                return
-            else:
-                print("Veuillez répondre par 'o' (oui) ou 'n' (non).")
+    # Les vidéos courtes arrivées en même temps qu'une longue passent avant
+    scheduler = JobScheduler(workers)
 
-    # Extraire l'audio avec ffmpeg
-    ffmpeg_path = r"C:\ffmpeg\bin\ffmpeg.exe"
-    cmd = [
-        ffmpeg_path,
-        "-i",
-        file_path,
-        "-vn",
-        "-acodec",
-        "mp3",
-        "-ab",
-        "192k",
-        output_path,
-    ]
+    def submit(file_path):
+        try:
+            cost = os.path.getsize(file_path)
+        except OSError:
+            # Fichier supprimé ou renommé entre-temps
+            return
+        scheduler.submit(convert, file_path, cost=cost)
 
-    try:
-        print("Extraction en cours...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+    watcher = FolderWatcher(
+        video_folder,
+        submit,
+        VIDEO_EXTENSIONS,
+        stable_seconds=get_setting("watch_stable_seconds"),
+    )
 
-        if result.returncode == 0:
-            print("Extraction d'audio terminée.")
-            print(f"Fichier enregistré dans: {output_path}")
-            open_file_explorer(output_path)
-        else:
-            print("Échec de l'extraction audio.")
-            print(f"Erreur: {result.stderr}")
-            print(
-                "Le fichier n'est peut-être pas un fichier vidéo dont on peut extraire l'audio."
-            )
-    except Exception as e:
-        print(f"Erreur lors de l'extraction: {e}")
+    print(f"Surveillance de {video_folder} ({workers} extractions simultanées)")
+    print("Appuyez sur Ctrl+C pour arrêter.")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\nArrêt de la surveillance, fin des extractions en cours...")
+    finally:
+        scheduler.shutdown(wait=True)
 
 
-def download_rumble_video(url):
+@register_site(
+    "rumble", ["rumble.com"], capabilities=("clip",), label="Rumble"
+)
+def download_rumble_video(url, options=None):
     """
     Download video from Rumble using yt-dlp CLI with browser impersonation
     Rumble requires --impersonate flag which works better via CLI than Python API
     """
+    clip = get_time_range(options)
     print("\nDownloading from Rumble...")
     print("Using browser impersonation to bypass anti-bot protection...")
 
@@ -1599,14 +2994,15 @@ def download_rumble_video(url):
         "chrome-116",  # Use specific Chrome version (Windows-10)
         # Don't specify format - let yt-dlp choose the best automatically
         "--output",
-        os.path.join(local_path, "%(title)s.%(ext)s"),
+        get_clip_outtmpl(local_path, clip),
         "--ffmpeg-location",
         r"C:\ffmpeg\bin",
         "--no-playlist",
         "--merge-output-format",
         "mp4",
-        url,
     ]
+    cmd.extend(get_clip_cli_args(clip))
+    cmd.append(url)
 
     # Add cookies if available
     cookies_file = os.path.join(
@@ -1616,6 +3012,11 @@ def download_rumble_video(url):
         cmd.extend(["--cookies", cookies_file])
         print(f"Using cookies: {cookies_file}")
 
+    # Final file path written by yt-dlp (--print would silence its output)
+    fd, filepath_log = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    cmd.extend(["--print-to-file", "after_move:filepath", filepath_log])
+
     try:
         print("\nStarting download...")
         print("(You can press Ctrl+C to stop)")
@@ -1629,43 +3030,40 @@ def download_rumble_video(url):
         )
 
         if result.returncode == 0:
+            with open(filepath_log, encoding="utf-8") as f:
+                final_path = get_ydl_output(f.read().splitlines())
             print("\n✅ Download completed successfully!")
+            print(f"File: {final_path}")
 
-            # Find the downloaded file
-            files = [f for f in os.listdir(local_path) if f.endswith(".mp4")]
-            if files:
-                latest_file = os.path.join(
-                    local_path,
-                    max(
-                        files,
-                        key=lambda x: os.path.getctime(os.path.join(local_path, x)),
-                    ),
-                )
-                print(f"File: {latest_file}")
-
-                # Get file size
-                size_mb = os.path.getsize(latest_file) / (1024 * 1024)
-                print(f"Size: {size_mb:.2f} MB")
+            # Get file size
+            size_mb = os.path.getsize(final_path) / (1024 * 1024)
+            print(f"Size: {size_mb:.2f} MB")
 
-                # Open file explorer
-                open_file_explorer(latest_file)
+            # Open file explorer
+            open_file_explorer(final_path)
         else:
             print(f"\n❌ Download failed with exit code: {result.returncode}")
             print("Please check the error messages above.")
+            note_job_error(f"yt-dlp exited with code {result.returncode}")
 
     except KeyboardInterrupt:
         print("\n\n⚠️  Download interrupted by user")
+        note_job_error("Download interrupted by user")
     except Exception as e:
         print(f"\n❌ Error: {e}")
+        note_job_error(e)
         import traceback
 
         traceback.print_exc()
+    finally:
+        os.remove(filepath_log)
 
 
-def download_protected_site_video(url, site_type):
+def download_protected_site_video(url, site_type, clip=None, options=None):
     """
     Download video from protected sites using yt-dlp specialized handling
-    Uses temporary directory to avoid yt-dlp cache issues
+    Uses a staging directory on the destination volume to avoid yt-dlp cache
+    issues while keeping the final move a same-filesystem rename
     FIXED: Forces video track selection from DASH manifests
     """
     print(f"\nDownloading from protected site: {site_type}")
@@ -1673,13 +3071,14 @@ def download_protected_site_video(url, site_type):
     # Determine final destination path
     local_path = get_download_path("generic")
 
-    # Create TEMPORARY directory to avoid yt-dlp cache
+    # Create STAGING directory to avoid yt-dlp cache
 
     temp_dir = None
+    keep_staging = False
     try:
-        # Create unique temporary directory
-        temp_dir = tempfile.mkdtemp(prefix=f"ytdl_{site_type}_")
-        print(f"Using temporary directory: {temp_dir}")
+        # Create unique staging directory next to the destination
+        temp_dir = get_staging_dir(local_path, f"ytdl_{site_type}_")
+        print(f"Using staging directory: {temp_dir}")
 
         # Add cookies file if available
         cookies_file = os.path.join(
@@ -1727,7 +3126,7 @@ def download_protected_site_video(url, site_type):
             "write_chapters": False,
             "write_annotations": False,
             "ffmpeg_location": r"C:\ffmpeg\bin",
-            "outtmpl": os.path.join(temp_dir, "%(title)s.%(ext)s"),
+            "outtmpl": get_clip_outtmpl(temp_dir, clip),
             "nooverwrites": True,
             "merge_output_format": "mp4",
             # HTTP headers to bypass 403 errors (especially for Rumble)
@@ -1752,6 +3151,7 @@ def download_protected_site_video(url, site_type):
             ],
             "postprocessor_args": {
                 # Copy video stream, encode audio to AAC
+                # (relaxed to a plain stream copy once codecs are known)
                 "ffmpeg": ["-c:v", "copy", "-c:a", "aac", "-b:a", "192k"]
             },
             # CRITICAL FIX: Force yt-dlp to list ALL formats including video
@@ -1818,6 +3218,11 @@ def download_protected_site_video(url, site_type):
             ydl_opts["cookiefile"] = cookies_file
             print(f"Using cookies: {cookies_file}")
 
+        # Clip mode: yt-dlp only fetches the fragments covering the range
+        if clip is not None:
+            ydl_opts.update(get_clip_ydl_options(clip))
+            print(f"Clip mode: {format_clip_label(clip)}")
+
         # DIAGNOSTIC: First, list all available formats
         print("\n" + "=" * 60)
         print("DIAGNOSTIC: Analyzing available formats...")
@@ -1886,6 +3291,26 @@ def download_protected_site_video(url, site_type):
                     except Exception as e:
                         print(f"Manifest extraction failed: {e}")
 
+                # Progressive format at the best height: no merge, no remux
+                if get_setting("prefer_progressive") and video_formats:
+                    best_height = max(f.get("height") or 0 for f in video_formats)
+                    min_efficiency = max(
+                        get_codec_efficiency(f.get("vcodec"))
+                        for f in video_formats
+                        if (f.get("height") or 0) == best_height
+                    )
+                    progressive = find_progressive_format(
+                        formats, best_height, min_efficiency, get_setting("max_fps")
+                    )
+                    if progressive:
+                        print(
+                            f"\nProgressive format {progressive['format_id']} "
+                            f"({best_height}p): skipping the ffmpeg merge"
+                        )
+                        format_selector = f"{progressive['format_id']}/{format_selector}"
+                        ydl_opts["format"] = format_selector
+                        ydl_opts["postprocessors"] = []
+
                 # Show detailed format info for debugging
                 if video_formats:
                     print("\n📹 Video formats available:")
@@ -1913,15 +3338,48 @@ def download_protected_site_video(url, site_type):
         print("Starting download...")
         print("=" * 60)
 
+        # Hash the final file for the integrity index (recorded after the move)
+        file_hashes = {}
+        ydl_opts["post_hooks"] = [make_ydl_post_hook(file_hashes)]
+
+        # Progress is rendered by the shared progress manager, not yt-dlp
+        progress_job = get_progress_manager().start_job(site_type)
+        ydl_opts["progress_hooks"] = [make_ydl_progress_hook(progress_job)]
+        ydl_opts["noprogress"] = True
+        bandwidth_job = get_bandwidth_scheduler().register(url, get_job_priority())
+
         # Now proceed with actual download
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl, progress_job, bandwidth_job:
+            # Shared bandwidth share, readjusted while downloading
+            bandwidth_job.attach_ydl(ydl)
             # Extract info for the video title
             info = ydl.extract_info(url, download=False)
+            # Job cost if it is retried (see process_queue)
+            note_job_size(estimate_job_cost(info))
             video_title = info.get("title", f"video_{site_type}")
+            progress_job.name = video_title
+
+            # Codec-aware remux: only transcode audio when MP4 can't hold it
+            # (postprocessor args are read from params when the PP runs)
+            ffmpeg_args = get_remux_postprocessor_args(info)
+            ydl.params["postprocessor_args"] = {"ffmpeg": ffmpeg_args}
+            vcodec, acodec = get_selected_codecs(info)
+            if "-c:a" in ffmpeg_args:
+                print(f"Audio codec {acodec or 'unknown'}: re-encoding to AAC")
+            else:
+                print(f"Codecs {vcodec} / {acodec}: stream copy, no re-encoding")
+
+            # Disk-space preflight (staging is on the destination volume)
+            estimated_size = estimate_download_size(info)
+            if estimated_size:
+                print(f"Estimated size: {format_bytes(estimated_size)}")
+            if not ensure_disk_space(local_path, estimated_size, options is None):
+                return
 
             print(f"\nDownloading: {video_title}")
             print(f"Format: {format_selector}")
             ydl.download([url])
+            progress_job.finish()
 
             # Find the downloaded file in temp directory
             temp_files = [
@@ -1983,8 +3441,11 @@ def download_protected_site_video(url, site_type):
                     print(f"\n✅ Downloaded file appears to be VIDEO ({file_ext})")
 
                 # Validate the download
+                # A clip is shorter than the full video: no duration check then
                 is_valid, message = validate_downloaded_file(
-                    temp_file_path, expected_min_size_mb=3
+                    temp_file_path,
+                    expected_min_size_mb=3,
+                    expected_duration=info.get("duration") if clip is None else None,
                 )
 
                 if is_valid or file_ext == ".m4a":  # Accept audio files for now
@@ -1996,8 +3457,11 @@ def download_protected_site_video(url, site_type):
                         except Exception as e:
                             print(f"Warning: Cannot remove existing file: {e}")
 
-                    # Move file from temp to final destination
-                    shutil.move(temp_file_path, final_path)
+                    # Same volume: the move is an atomic rename
+                    os.replace(temp_file_path, final_path)
+                    digest = file_hashes.get(os.path.abspath(temp_file_path))
+                    if digest:
+                        record_file_hash(final_path, digest)
 
                     print("\n" + "=" * 60)
                     if file_ext == ".m4a":
@@ -2012,20 +3476,27 @@ def download_protected_site_video(url, site_type):
                     open_file_explorer(final_path)
                 else:
                     print(f"\n⚠ File validation failed: {message}")
+                    note_job_error(f"File validation failed: {message}")
                     failed_filename = re.sub(
                         r'[<>:"/\\|?*]', "_", f"{video_title}_FAILED.mp4"
                     )
                     final_path = os.path.join(local_path, failed_filename)
-                    shutil.move(temp_file_path, final_path)
+                    os.replace(temp_file_path, final_path)
                     print(f"Saved for inspection: {final_path}")
-                    open_file_explorer(final_path)
+                    # Not a job output: a queued job fails and is retried
+                    if get_current_job() is None:
+                        open_file_explorer(final_path)
             else:
-                print("\n❌ ERROR: No file found in temporary directory!")
+                print("\n❌ ERROR: No file found in staging directory!")
                 print("Download completely failed.")
+                note_job_error("No file found in staging directory")
 
     except Exception as e:
         error_msg = str(e)
         print(f"\n❌ ERROR: {error_msg}")
+        note_job_error(error_msg)
+        # Queued job: keep the partial download so the retry resumes it
+        keep_staging = staging_key() is not None
 
         # Handle specific yt-dlp errors
         if "Unknown algorithm ID" in error_msg:
@@ -2046,61 +3517,77 @@ def download_protected_site_video(url, site_type):
 
     finally:
         # Cleanup
-        if temp_dir and os.path.exists(temp_dir):
+        if temp_dir and os.path.exists(temp_dir) and not keep_staging:
             try:
                 shutil.rmtree(temp_dir)
-                print("\n🧹 Cleaned up temp directory")
+                print("\n🧹 Cleaned up staging directory")
             except Exception as e:
                 print(f"Warning: Cleanup failed: {e}")
 
 
-def download_generic_video_with_fallback(url):
+@register_site(
+    "m6",
+    ["m6.fr", "m6plus.fr", "6play.fr"],
+    capabilities=("clip",),
+    label="M6",
+)
+@register_site(
+    "tf1", ["tf1.fr", "tf1play.fr"], capabilities=("clip",), label="TF1"
+)
+@register_site(
+    "francetv",
+    ["france.tv", "francetvinfo.fr", "pluzz.francetv.fr"],
+    capabilities=("clip",),
+    label="France TV",
+)
+@register_site(
+    "twitter",
+    ["twitter.com", "x.com"],
+    capabilities=("clip",),
+    label="X (Twitter)",
+)
+def download_protected_site(url, options=None):
     """
-    Download video from generic URL with fallback to yt-dlp if generic method fails
-    OPTIMIZED: Skip generic method for protected sites
+    Download from a registered protected site: specialized yt-dlp only,
+    the generic method would just waste time
     """
-    # Check if it's a protected site FIRST - don't waste time with generic method
-    site_type = detect_protected_sites(url)
+    site = find_site(url)
+    clip = get_time_range(options)
+    print(f"\nProtected site detected: {site.name} ({url})")
+    print("Skipping generic method - using specialized yt-dlp...")
 
-    if site_type != "generic":
-        print(f"\nProtected site detected: {site_type} ({url})")
-        print("Skipping generic method - using specialized yt-dlp...")
+    try:
+        download_protected_site_video(url, site.name, clip, options)
+    except Exception as e:
+        print(f"Download failed for protected site: {str(e)}")
+        note_job_error(e)
+        print("Please check:")
+        print("1. The URL is valid and accessible")
+        print("2. Cookies are properly configured")
+        print("3. Internet connection is stable")
 
-        # Use specialized handler for each protected site
-        try:
-            if site_type == "rumble":
-                # Rumble requires special CLI-based impersonation
-                download_rumble_video(url)
-            else:
-                # Other protected sites use the standard handler
-                download_protected_site_video(url, site_type)
-        except Exception as e:
-            print(f"Download failed for protected site: {str(e)}")
-            print("Please check:")
-            print("1. The URL is valid and accessible")
-            print("2. Cookies are properly configured")
-            print("3. Internet connection is stable")
-        return
 
-    # Only use generic method for truly generic/unprotected sites
+def download_generic_video_with_fallback(url, clip=None, options=None):
+    """
+    Download video from generic URL with fallback to yt-dlp if generic method fails
+    (registered protected sites are routed to their own handler by download_url)
+    """
     print("\nAttempting download with generic method...")
-    local_path = get_download_path("generic")
 
     try:
         # Try the original generic download method
-        download_generic_video(url)
+        video_path = download_generic_video(url, clip, options)
 
         # Check if the downloaded file is valid
-        files = [f for f in os.listdir(local_path) if f.endswith(".mp4")]
-        if files:
-            latest_file = os.path.join(
-                local_path,
-                max(files, key=lambda x: os.path.getctime(os.path.join(local_path, x))),
+        if video_path:
+            # A clip is only a fraction of the full video size
+            is_valid, message = validate_downloaded_file(
+                video_path, expected_min_size_mb=1 if clip else 10
             )
-            is_valid, message = validate_downloaded_file(latest_file)
 
             if is_valid:
                 print(f"Generic download successful: {message}")
+                note_job_output(video_path)
                 return
             else:
                 print(f"Generic download failed validation: {message}")
@@ -2115,18 +3602,23 @@ def download_generic_video_with_fallback(url):
     # Fallback to yt-dlp for generic sites that failed
     try:
         print("\nAttempting download with yt-dlp...")
-        site_type = detect_protected_sites(url)
-        download_protected_site_video(url, site_type)
+        download_protected_site_video(url, "generic", clip, options)
     except Exception as e:
         print(f"All download methods failed. Final error: {str(e)}")
+        note_job_error(e)
         print("Please check:")
         print("1. The URL is valid and accessible")
         print("2. Cookies are properly configured")
         print("3. Internet connection is stable")
 
 
-def download_generic_video(url):
-    """Télécharge une vidéo depuis une URL générique"""
+def download_generic_video(url, clip=None, options=None):
+    """
+    Télécharge une vidéo depuis une URL générique (options=None: mode interactif)
+
+    Returns:
+        str: Fichier obtenu (fichier existant conservé compris), None en cas d'échec
+    """
     print("\nTéléchargement de la vidéo depuis une URL générique...")
     local_path = get_download_path("generic")
     # Note: get_download_path crée déjà le dossier s'il n'existe pas
@@ -2140,7 +3632,10 @@ def download_generic_video(url):
         soup = BeautifulSoup(response.content, "html.parser")
 
         title = soup.find("title")
-        video_name = (title.text if title else "video") + ".mp4"
+        video_name = title.text if title else "video"
+        if clip is not None:
+            video_name = f"{video_name} {format_clip_label(clip)}"
+        video_name += ".mp4"
         video_name = re.sub(r'[<>:"/\\|?*]', "_", video_name)
         video_path = os.path.join(local_path, video_name)
 
@@ -2148,21 +3643,12 @@ def download_generic_video(url):
             print(
                 f"\nAttention: Le fichier '{video_name}' existe déjà dans '{local_path}'."
             )
-            while True:
-                choice = input("Voulez-vous remplacer ce fichier ? (o/n): ").lower()
-                if choice in ["o", "oui", "y", "yes"]:
-                    try:
-                        os.remove(video_path)
-                        print(f"Fichier existant supprimé: {video_name}")
-                        break
-                    except Exception as e:
-                        print(f"Impossible de supprimer le fichier existant: {e}")
-                        return
-                elif choice in ["n", "non", "no"]:
-                    print("Téléchargement annulé.")
-                    return
-                else:
-                    print("Veuillez répondre par 'o' (oui) ou 'n' (non).")
+            resolved_path = resolve_existing_file(video_path, options)
+            if resolved_path is None:
+                # Fichier existant conservé
+                return video_path
+            video_path = resolved_path
+            video_name = os.path.basename(video_path)
 
         # Chercher toutes les sources vidéo possibles
         video_sources = []
@@ -2232,33 +3718,49 @@ def download_generic_video(url):
             selected_quality = "meilleure disponible"
 
         print(f"Téléchargement en qualité {selected_quality}...")
+        note_job_format(str(selected_quality))
+
+        # Mode extrait: ffmpeg ne lit que les octets de la plage demandée
+        if clip is not None:
+            if not download_clip_with_ffmpeg(selected_url, video_path, clip, headers):
+                raise Exception("Échec du téléchargement de l'extrait")
+            print(f"Fichier enregistré dans: {video_path}")
+            return video_path
 
         response = requests.get(selected_url, headers=headers, stream=True)
         total_size = int(response.headers.get("content-length", 0))
 
-        block_size = 1024 * 1024  # 1 MB
+        if not ensure_disk_space(local_path, total_size, options is None):
+            return
 
-        with open(video_path, "wb") as f:
+        # Écriture dans un .part renommé à la fin: un arrêt brutal ne laisse
+        # pas de fichier préalloué (complété de zéros) sous le nom définitif
+        part_path = video_path + ".part"
+        with open(part_path, "wb") as f:
             try:
-                with tqdm(
-                    total=total_size, unit="B", unit_scale=True, desc=video_name
-                ) as pbar:
-                    start_time = time.time()
-                    bytes_downloaded = 0
-
-                    for data in response.iter_content(block_size):
-                        if not data:
-                            break
-                        f.write(data)
-                        bytes_downloaded += len(data)
-                        pbar.update(len(data))
-
-                        elapsed_time = time.time() - start_time
-                        if elapsed_time > 0:
-                            speed = bytes_downloaded / (
-                                1024 * 1024 * elapsed_time
-                            )  # MB/s
-                            pbar.set_postfix(speed=f"{speed:.2f} MB/s")
+                # Réserver la taille annoncée: écriture contiguë, disque plein détecté tout de suite
+                preallocate_file(f, total_size)
+
+                start_time = time.time()
+                # Empreinte calculée au fil de l'écriture (pas de relecture)
+                hasher = new_hasher()
+
+                # Lecture réseau et écriture disque dans deux threads; la
+                # progression est affichée à fréquence fixe par le gestionnaire
+                job = get_progress_manager().start_job(video_name, total_size)
+                bandwidth_job = get_bandwidth_scheduler().register(
+                    selected_url, get_job_priority()
+                )
+                try:
+                    stream_to_file(
+                        response, f, hasher, job.update, bandwidth_job.throttle
+                    )
+                finally:
+                    bandwidth_job.close()
+                    job.finish()
+
+                # Ramener le fichier à la taille réellement reçue
+                f.truncate()
 
                 print(f"\nTéléchargement terminé avec succès : {video_name}")
                 print(f"Fichier enregistré dans: {video_path}")
@@ -2268,45 +3770,504 @@ def download_generic_video(url):
                 # The fallback method will open explorer only if the final download succeeds
 
             except Exception as e:
+                # Le .part est supprimé une fois le fichier fermé (ci-dessous)
                 print(f"Erreur pendant le téléchargement : {e}")
-                # Supprime le fichier partiellement téléchargé en cas d'erreur
-                if os.path.exists(video_path):
-                    os.remove(video_path)
                 raise
 
+        os.replace(part_path, video_path)
+        # Fichier fermé: taille et date définitives pour l'index d'intégrité
+        record_file_hash(video_path, hasher.hexdigest())
+        return video_path
+
     except Exception as e:
         print(f"Erreur lors du téléchargement générique : {str(e)}")
         # Nettoyer en cas d'erreur
+        if "part_path" in locals() and os.path.exists(part_path):
+            os.remove(part_path)
         if "video_path" in locals() and os.path.exists(video_path):
             os.remove(video_path)
 
 
+def download_url(type_url, url, options=None):
+    """
+    Lance le téléchargement adapté au type d'URL (voir classify_url)
+
+    Args:
+        type_url (str): Type retourné par classify_url
+        url (str): URL ou chemin local
+        options (dict): Options de téléchargement (None: mode interactif)
+    """
+    if type_url == "local":
+        download_local_audio(url, options)
+        return
+
+    # Site enregistré (voir site_registry), sinon méthode générique
+    site = find_site(url)
+    if site is None:
+        # (clip mode: only download the requested time range)
+        download_generic_video_with_fallback(url, get_time_range(options), options)
+        return
+
+    # Options que le site ne sait pas appliquer (voir site_registry)
+    if get_download_option(options, "type") == "audio" and not site.supports("audio"):
+        print(f"Audio seul non disponible pour {site.label}: téléchargement de la vidéo.")
+    if get_download_option(options, "clip") and not site.supports("clip"):
+        print(f"Mode extrait non disponible pour {site.label}: téléchargement de la vidéo entière.")
+    if get_download_option(options, "quality") != "best" and not site.supports("quality"):
+        print(f"Choix de la qualité non disponible pour {site.label}: qualité par défaut du site.")
+    site.download(url, options)
+
+
+def read_url_list(sources):
+    """
+    Lit les URL à ajouter à la file: URL directes ou fichiers texte.
+
+    Toutes les URL d'un fichier texte sont relevées, quel que soit son
+    format; une ligne sans URL est prise comme un chemin local (lignes vides
+    et commentaires '#' ignorés). Les URL sont normalisées et dédoublonnées.
+    """
+    entries = []
+    for source in sources:
+        if os.path.isfile(source) and not source.lower().endswith(VIDEO_EXTENSIONS):
+            with open(source, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    entries.extend(extract_urls(line) or [line])
+        else:
+            entries.extend(extract_urls(source) or [source])
+    return list(dict.fromkeys(entries))
+
+
+def print_queue_status(queue):
+    """Affiche le contenu de la file de téléchargements"""
+    for job in queue.list_jobs():
+        line = f"[{job['state']:>7}] #{job['id']} {job['url']}"
+        if job["state"] == "done" and job["output_path"]:
+            line += f" -> {job['output_path']}"
+        elif job["error"]:
+            line += f" ({job['attempts']} essai(s): {job['error']})"
+        print(line)
+    counts = queue.count_by_state()
+    print(
+        f"\nEn attente: {counts['pending']}, en cours: {counts['running']}, "
+        f"terminées: {counts['done']}, en échec: {counts['failed']}"
+    )
+
+
+def get_local_size(type_url, path):
+    """Taille d'un fichier local à traiter (None pour une URL ou un dossier)"""
+    if type_url == "local" and os.path.isfile(path):
+        return os.path.getsize(path)
+    return None
+
+
+def run_download_queue(
+    sources=(), workers=1, options=None, force=False, priority=BATCH, own_jobs_only=False
+):
+    """
+    Mode lot: ajoute les URL à la file persistante puis la traite.
+
+    La file survit à un arrêt brutal: relancer le mode lot (même sans
+    argument) reprend les tâches interrompues et ignore celles déjà
+    terminées. Les tâches de la file sont traitées sans questions, avec les
+    options enregistrées à leur ajout.
+
+    Args:
+        sources (list): URL ou fichiers texte contenant des URL
+        workers (int): Nombre de téléchargements simultanés
+        options (dict): Options de téléchargement des URL ajoutées
+        force (bool): Télécharger de nouveau les URL déjà terminées
+        priority (str): Priorité des URL ajoutées (INTERACTIVE ou BATCH)
+        own_jobs_only (bool): Ne traiter que les URL ajoutées, pas le reste
+            de la file (téléchargement ponctuel hors mode lot)
+
+    Returns:
+        bool: True si toutes les URL ajoutées ont abouti
+    """
+    queue = JobQueue()
+    added = []
+    try:
+        resumed = queue.recover_interrupted()
+        if resumed:
+            print(f"{resumed} tâche(s) interrompue(s) reprise(s).")
+
+        for url in read_url_list(sources):
+            type_url = classify_url(url)
+            if type_url is None:
+                print(f"Ignoré (ni URL ni chemin local): {url}")
+                continue
+            job_id, queued = queue.add(
+                url,
+                type_url,
+                options,
+                force=force,
+                priority=priority,
+                estimated_size=get_local_size(type_url, url),
+            )
+            added.append(job_id)
+            if not queued:
+                print(f"Déjà dans la file (#{job_id}): {url}")
+
+        process_queue(queue, workers, job_ids=added if own_jobs_only else None)
+
+        print()
+        print_queue_status(queue)
+        return all(queue.get(job_id)["state"] == "done" for job_id in added)
+    finally:
+        queue.close()
+
+
+# Intervalle de consultation de la file quand le service n'a rien à faire
+QUEUE_POLL_SECONDS = 0.5
+
+# Tâches en attente confiées à l'ordonnanceur en plus des tâches en cours:
+# il choisit parmi elles la plus courte (avec vieillissement)
+SCHEDULING_WINDOW = 8
+
+
+def process_queue(queue, workers=1, stop_event=None, job_ids=None):
+    """
+    Exécute les tâches de la file.
+
+    Args:
+        queue (JobQueue): File à traiter
+        workers (int): Nombre de téléchargements simultanés
+        stop_event (threading.Event): Mode service: attendre les nouvelles
+            tâches jusqu'à ce que l'événement soit positionné (sans: s'arrêter
+            quand la file est vide)
+        job_ids (list): Ne traiter que ces tâches (None: toute la file)
+    """
+
+    def process(job_id):
+        job = queue.claim(job_id)
+        if job is None:
+            # Réclamée entre-temps par un autre processus
+            return
+        print(f"\n===== Tâche #{job['id']} (essai {job['attempts']}): {job['url']} =====")
+        if run_job(
+            queue, job, lambda url, options: download_url(job["handler"], url, options)
+        ):
+            print(f"Tâche #{job['id']} terminée.")
+        else:
+            print(f"Tâche #{job['id']} en échec: {queue.get(job['id'])['error']}")
+
+    # Les tâches sont soumises à l'ordonnanceur avec leur coût estimé et leur
+    # priorité, mais réclamées seulement au moment de leur exécution: une
+    # tâche réclamée puis abandonnée par un arrêt brutal est reprise au
+    # redémarrage (recover_interrupted), une fois son bail expiré
+    scheduler = JobScheduler(workers)
+    try:
+        scheduled = {}
+        last_heartbeat = time.monotonic()
+        while stop_event is None or not stop_event.is_set():
+            scheduled = {
+                job_id: f for job_id, f in scheduled.items() if not f.done()
+            }
+            if scheduled and time.monotonic() - last_heartbeat >= HEARTBEAT_SECONDS:
+                queue.heartbeat()
+                last_heartbeat = time.monotonic()
+
+            room = workers + SCHEDULING_WINDOW - len(scheduled)
+            pending = (
+                queue.pending_jobs(room, exclude=scheduled, ids=job_ids)
+                if room > 0
+                else []
+            )
+            for job in pending:
+                scheduled[job["id"]] = scheduler.submit(
+                    process,
+                    job["id"],
+                    cost=estimate_job_cost(size=job["estimated_size"]),
+                    priority=job["priority"],
+                )
+
+            if stop_event is None:
+                if not scheduled:
+                    # Attendre les nouvelles tentatives avant de s'arrêter
+                    due = queue.next_retry_at(job_ids)
+                    if due is None:
+                        break
+                    delay = max(0, due - time.time())
+                    print(f"Nouvel essai dans {delay:.0f} s...")
+                    time.sleep(delay)
+                    continue
+                time.sleep(0.2)
+            else:
+                stop_event.wait(QUEUE_POLL_SECONDS if not scheduled else 0.2)
+    finally:
+        # Les tâches planifiées mais pas commencées restent en attente en base
+        scheduler.shutdown(wait=True, cancel_pending=True)
+
+
+def queue_clipboard_text(queue, text, options=None):
+    """Ajoute à la file toutes les URL d'un texte copié"""
+    for url in extract_urls(text):
+        queue_clipboard_url(queue, url, options)
+
+
+def queue_clipboard_url(queue, url, options=None):
+    """
+    Ajoute à la file une URL copiée (mode surveillance du presse-papier).
+
+    Les URL déjà en file ou déjà téléchargées sont ignorées; une URL dont le
+    fichier a été supprimé depuis est téléchargée de nouveau.
+    """
+    type_url = classify_url(url)
+    # Un chemin local copié n'est pas une demande de téléchargement
+    if type_url is None or type_url == "local":
+        return
+
+    job = queue.find(url)
+    force = False
+    if job and job["state"] == "done":
+        if job["output_path"] and os.path.exists(job["output_path"]):
+            print(f"Déjà téléchargé: {url} -> {job['output_path']}")
+            return
+        force = True
+
+    # L'utilisateur vient de copier l'URL: elle passe avant le lot
+    job_id, queued = queue.add(url, type_url, options, force=force, priority=INTERACTIVE)
+    if queued:
+        print(f"{get_url_type_message(type_url)} Ajoutée à la file (#{job_id}): {url}")
+    else:
+        print(f"Déjà dans la file (#{job_id}): {url}")
+
+
+def watch_clipboard(workers=1, options=None):
+    """
+    Surveille le presse-papier: chaque URL copiée est ajoutée à la file et
+    téléchargée en arrière-plan (avec options), sans relancer le script.
+    """
+    queue = JobQueue()
+    stop_event = threading.Event()
+    resumed = queue.recover_interrupted()
+    if resumed:
+        print(f"{resumed} tâche(s) interrompue(s) reprise(s).")
+
+    watcher = ClipboardWatcher(lambda text: queue_clipboard_text(queue, text, options))
+    watcher_thread = threading.Thread(
+        target=watcher.run, args=(stop_event,), name="clipboard", daemon=True
+    )
+    watcher_thread.start()
+
+    print("Surveillance du presse-papier: copiez des URL pour les télécharger.")
+    print("Appuyez sur Ctrl+C pour arrêter.")
+    try:
+        process_queue(queue, workers, stop_event)
+    except KeyboardInterrupt:
+        print("\nArrêt de la surveillance du presse-papier...")
+    finally:
+        stop_event.set()
+        watcher_thread.join()
+        queue.close()
+
+
+def run_daemon(workers=1, options=None):
+    """
+    Service résident: garde les modules chargés et reçoit les URL par
+    l'API locale (voir daemon.py). Les URL reçues sont téléchargées sans
+    questions, avec options (complétées par celles de la requête).
+    """
+    check_and_export_cookies()
+
+    queue = JobQueue()
+    stop_event = threading.Event()
+    try:
+        server = start_api_server(queue, classify_url, stop_event, options)
+    except OSError as e:
+        print(f"Impossible de démarrer le service (déjà lancé ?): {e}")
+        queue.close()
+        return
+
+    host, port = server.server_address[:2]
+    resumed = queue.recover_interrupted()
+    if resumed:
+        print(f"{resumed} tâche(s) interrompue(s) reprise(s).")
+    print(f"Service en écoute sur http://{host}:{port} (Ctrl+C pour arrêter)")
+
+    try:
+        process_queue(queue, workers, stop_event)
+    except KeyboardInterrupt:
+        print("\nArrêt du service...")
+    finally:
+        server.shutdown()
+        queue.close()
+
+
+def _quality_arg(value):
+    value = value.lower().rstrip("p")
+    if value in ("best", "worst") or value.isdigit():
+        return value
+    raise argparse.ArgumentTypeError('"best", "worst" ou une hauteur (ex: 720)')
+
+
+def _clip_arg(value):
+    try:
+        parse_time_range(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def _jobs_arg(value):
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError("nombre entier supérieur à 0 attendu")
+    return int(value)
+
+
+def parse_download_args(argv):
+    """Analyse les arguments du mode sans questions (voir README)"""
+    parser = argparse.ArgumentParser(
+        prog="download_video_audio.py",
+        description=(
+            "Télécharge les URL données (ou celles du presse-papier) sans poser "
+            "de questions. Sans argument: mode interactif."
+        ),
+    )
+    parser.add_argument(
+        "sources", nargs="*", help="URL, fichiers texte d'URL ou fichiers vidéo locaux"
+    )
+    parser.add_argument("--type", choices=DOWNLOAD_TYPES, help="défaut: video")
+    parser.add_argument(
+        "--quality", type=_quality_arg, help="best, worst ou hauteur maximale (ex: 720)"
+    )
+    parser.add_argument(
+        "--audio-bitrate",
+        dest="audio_bitrate",
+        choices=[option["bitrate"] for option in AUDIO_QUALITY_OPTIONS],
+        help="défaut: paramètres audio_quality / audio_renditions",
+    )
+    parser.add_argument(
+        "--on-exists",
+        dest="on_exists",
+        choices=ON_EXISTS_CHOICES,
+        help="fichier déjà présent (défaut: skip)",
+    )
+    parser.add_argument(
+        "--clip", type=_clip_arg, help="plage à télécharger, ex: 1:00:00-1:05:00"
+    )
+    parser.add_argument(
+        "--jobs", type=_jobs_arg, default=1, help="téléchargements simultanés"
+    )
+    parser.add_argument("--preset", help="préréglage nommé (paramètre presets)")
+    parser.add_argument(
+        "--status", action="store_true", help="mode batch: afficher la file"
+    )
+    parser.add_argument(
+        "--watch-clipboard",
+        dest="watch_clipboard",
+        action="store_true",
+        help="télécharger chaque URL copiée",
+    )
+    return parser.parse_args(argv)
+
+
+def build_download_options(args):
+    """
+    Options de téléchargement: préréglage (paramètre presets) complété
+    par les options de la ligne de commande, prioritaires.
+
+    Raises:
+        ValueError: Préréglage inconnu
+    """
+    options = {}
+    if args.preset:
+        presets = get_setting("presets") or {}
+        if args.preset not in presets:
+            known = ", ".join(sorted(presets)) or "aucun"
+            raise ValueError(f"Préréglage inconnu: {args.preset} (disponibles: {known})")
+        options.update(presets[args.preset])
+
+    for key in DOWNLOAD_OPTION_DEFAULTS:
+        value = getattr(args, key)
+        if value is not None:
+            options[key] = value
+    return options
+
+
 def main():
     print("\n===== Début du processus =====\n")
 
+    cleanup_orphaned_staging_dirs()
+
+    # Mode surveillance: extraction audio automatique des nouvelles vidéos
+    if "--watch" in sys.argv[1:]:
+        watch_video_folder()
+        return
+
+    # Vérification de l'intégrité: verify [dossier] [--full]
+    if sys.argv[1:2] == ["verify"]:
+        args = [a for a in sys.argv[2:] if a != "--full"]
+        root = args[0] if args else get_windows_downloads_folder()
+        print(f"Vérification de l'intégrité des fichiers dans: {root}")
+        if not verify_library(root, full="--full" in sys.argv[2:]):
+            sys.exit(1)
+        return
+
+    # Sous-commandes batch et daemon, suivies des options de téléchargement
+    argv = sys.argv[1:]
+    command = argv[0] if argv[:1] in (["batch"], ["daemon"]) else None
+    args = parse_download_args(argv[1:] if command else argv)
+    try:
+        options = build_download_options(args)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    # Surveillance du presse-papier: chaque URL copiée est téléchargée
+    if args.watch_clipboard:
+        watch_clipboard(args.jobs, options)
+        return
+
+    # Service résident: daemon [options]
+    if command == "daemon":
+        run_daemon(args.jobs, options)
+        return
+
+    # Mode lot: batch [fichier.txt | URL ...] [--status] [options]
+    if command == "batch":
+        if args.status:
+            queue = JobQueue()
+            print_queue_status(queue)
+            queue.close()
+        elif not run_download_queue(args.sources, args.jobs, options):
+            sys.exit(1)
+        return
+
+    # URL ou fichiers en arguments: téléchargés sans questions, même déjà
+    # téléchargés (on_exists décide du sort des fichiers présents)
+    if args.sources:
+        if not run_download_queue(
+            args.sources,
+            args.jobs,
+            options,
+            force=True,
+            priority=INTERACTIVE,
+            own_jobs_only=True,
+        ):
+            sys.exit(1)
+        print("\n===== Processus terminé =====")
+        return
+
     result = get_url_from_clipboard()
     if not result:
         return
 
     type_url, url = result
+    if type_url == "batch":
+        # Plusieurs URL copiées: téléchargées par la file du mode lot (sans
+        # traiter les autres tâches en attente)
+        run_download_queue(url, args.jobs, options, own_jobs_only=True)
+        print("\n===== Processus terminé =====")
+        return
+
     print(f"\nTraitement de la vidéo depuis l'URL : {url}")
 
     try:
-        if type_url == "youtube":
-            download_youtube_video(url)
-        elif type_url == "odysee":
-            download_odysee_video(url)
-        elif type_url == "instagram":
-            download_instagram_video(url)
-        elif type_url == "local":
-            download_local_audio(url)
-        else:
-            # Vérifier d'abord si c'est un site KVS
-            if detect_kvs_sites(url):
-                download_kvs_video(url)
-            else:
-                # Use the new fallback method for generic URLs
-                download_generic_video_with_fallback(url)
+        # Sans option en ligne de commande: questions au clavier
+        download_url(type_url, url, options or None)
     except Exception as e:
         print(f"Erreur lors du traitement : {e}")
 
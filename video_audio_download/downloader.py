@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Interface de programmation du téléchargeur
+
+Pour utiliser les téléchargements depuis un autre programme:
+
+    from downloader import Downloader
+
+    with Downloader(workers=3) as downloader:
+        job = downloader.submit("https://...", {"type": "audio"})
+        result = job.result()
+        print(result.output_path, result.size, result.timings)
+
+Chaque tâche s'exécute dans un thread du pool avec son propre contexte
+(job_queue.job_context): les fonctions de téléchargement y signalent le
+fichier produit, le format retenu, le début de chaque étape et leurs
+erreurs (note_job_*) au lieu d'ouvrir l'explorateur. Les questions sont
+posées au rappel on_prompt s'il est fourni; sinon la tâche s'exécute sans
+questions, avec ses options (voir DOWNLOAD_OPTION_DEFAULTS).
+
+La sortie console des tâches n'est pas détournée: sys.stdout et sys.stderr
+restent ceux du programme appelant.
+"""
+
+import itertools
+import os
+import time
+
+from bandwidth import BATCH
+from download_video_audio import classify_url, download_url, get_local_size
+from job_queue import job_context, note_job_error
+from job_scheduler import JobScheduler, estimate_job_cost
+
+
+def _phase_timings(phases, finished_at):
+    """Durée cumulée de chaque étape à partir de leurs instants de début"""
+    timings = {}
+    ends = [start for _, start in phases[1:]] + [finished_at]
+    for (phase, start), end in zip(phases, ends):
+        timings[phase] = timings.get(phase, 0) + end - start
+    timings["total"] = finished_at - phases[0][1]
+    return {phase: round(seconds, 3) for phase, seconds in timings.items()}
+
+
+class JobResult:
+    """
+    Résultat d'une tâche.
+
+    Attributes:
+        url (str): URL ou chemin local traité
+        handler (str): Type d'URL (voir classify_url)
+        output_path (str): Fichier produit (dossier pour une extraction par
+            lot), None en cas d'échec
+        size (int): Taille du fichier produit en octets (None pour un dossier)
+        format (str): Format retenu (qualité vidéo, débits audio...)
+        timings (dict): Durée en secondes de chaque étape (analysis,
+            download, postprocess) et durée totale (total)
+        errors (list): Erreurs signalées par la tâche (note_job_error,
+            exception levée comprise)
+    """
+
+    def __init__(self, url, handler, output_path, fmt, timings, errors):
+        self.url = url
+        self.handler = handler
+        self.output_path = output_path
+        self.size = (
+            os.path.getsize(output_path)
+            if output_path and os.path.isfile(output_path)
+            else None
+        )
+        self.format = fmt
+        self.timings = timings
+        self.errors = errors
+
+    @property
+    def ok(self):
+        # Le fichier signalé doit exister (pas de succès sans résultat)
+        return self.output_path is not None and os.path.exists(self.output_path)
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "handler": self.handler,
+            "ok": self.ok,
+            "output_path": self.output_path,
+            "size": self.size,
+            "format": self.format,
+            "timings": self.timings,
+            "errors": self.errors,
+        }
+
+    def __repr__(self):
+        return f"JobResult(ok={self.ok}, output_path={self.output_path!r})"
+
+
+class Job:
+    """Tâche soumise à Downloader.submit (interface d'un Future)"""
+
+    def __init__(self, job_id, url, handler, options, future):
+        self.id = job_id
+        self.url = url
+        self.handler = handler
+        self.options = options
+        self.future = future
+
+    def done(self):
+        return self.future.done()
+
+    def cancel(self):
+        """Annule la tâche si elle n'a pas encore commencé"""
+        return self.future.cancel()
+
+    def result(self, timeout=None):
+        """JobResult de la tâche (attend sa fin)"""
+        return self.future.result(timeout)
+
+    def add_done_callback(self, fn):
+        """Appelle fn(job) à la fin de la tâche"""
+        self.future.add_done_callback(lambda _future: fn(self))
+
+    def __repr__(self):
+        return f"Job(id={self.id}, url={self.url!r}, done={self.done()})"
+
+
+class Downloader:
+    """
+    Exécute des téléchargements en parallèle, utilisable depuis plusieurs
+    threads.
+
+    Args:
+        workers (int): Nombre de téléchargements simultanés
+        on_prompt (callable): Reçoit chaque question et retourne la réponse
+            (None: tâches sans questions)
+        on_output (callable): Appelée avec le fichier produit par chaque
+            tâche réussie (ex: open_file_explorer)
+    """
+
+    def __init__(self, workers=1, on_prompt=None, on_output=None):
+        self.on_prompt = on_prompt
+        self.on_output = on_output
+        self.scheduler = JobScheduler(workers)
+        self._ids = itertools.count(1)
+
+    def submit(self, url, options=None, priority=BATCH):
+        """
+        Ajoute un téléchargement.
+
+        Args:
+            url (str): URL ou chemin local
+            options (dict): Options de téléchargement (None: valeurs par
+                défaut, ou questions posées à on_prompt s'il est fourni)
+            priority (str): INTERACTIVE ou BATCH (voir JobScheduler)
+
+        Returns:
+            Job: Tâche, dont result() retourne un JobResult
+
+        Raises:
+            ValueError: URL non reconnue
+        """
+        handler = classify_url(url)
+        if handler is None:
+            raise ValueError(f"URL non reconnue: {url!r}")
+        if options is None and self.on_prompt is None:
+            options = {}
+
+        # Taille connue d'avance seulement pour un fichier local
+        cost = estimate_job_cost(size=get_local_size(handler, url))
+        future = self.scheduler.submit(
+            self._run, url, handler, options, priority, cost=cost, priority=priority
+        )
+        return Job(next(self._ids), url, handler, options, future)
+
+    def download(self, url, options=None, timeout=None):
+        """Télécharge url et attend le résultat (voir submit)"""
+        return self.submit(url, options).result(timeout)
+
+    def _run(self, url, handler, options, priority):
+        context = {
+            "priority": priority,
+            "output_path": None,
+            "format": None,
+            "phases": [("analysis", time.time())],
+            "errors": [],
+            "prompt": self.on_prompt,
+        }
+        with job_context(context):
+            try:
+                download_url(handler, url, options)
+            except Exception as e:
+                print(f"Erreur lors du traitement : {e}")
+                note_job_error(e)
+
+        errors = context["errors"]
+        if context["output_path"] is None and not errors:
+            errors.append("Aucun fichier produit")
+
+        result = JobResult(
+            url,
+            handler,
+            context["output_path"],
+            context["format"],
+            _phase_timings(context["phases"], time.time()),
+            errors,
+        )
+        if result.ok and self.on_output:
+            self.on_output(result.output_path)
+        return result
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        self.scheduler.shutdown(wait, cancel_pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True)
+        return False
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Surveillance d'un dossier pour détecter les nouveaux fichiers vidéo
+Utilise inotify sous Linux, sinon un balayage périodique du dossier
+"""
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import sys
+import time
+
+# Fichiers intermédiaires de yt-dlp: formats avant fusion (titre.f137.mp4),
+# fichiers temporaires (titre.temp.mp4), téléchargements partiels (.part)
+TEMPORARY_NAME_PATTERN = re.compile(
+    r"\.(f\d+|temp)\.[^.]+$|\.part(-Frag\d+)?$|\.ytdl$", re.IGNORECASE
+)
+
+
+def is_temporary_file(name):
+    """Vrai pour un fichier intermédiaire qui sera renommé ou supprimé"""
+    return bool(TEMPORARY_NAME_PATTERN.search(name))
+
+
+class _Inotify:
+    """Réveil sur événement inotify (Linux), sans analyse des événements"""
+
+    # Pas de IN_MODIFY: un fichier en cours d'écriture réveillerait la boucle
+    # à chaque bloc; sa stabilité est vérifiée par le délai d'attente
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 a échoué")
+        self.watched = set()
+
+    def watch(self, directory):
+        """Ajoute un dossier à surveiller (non récursif)"""
+        if directory in self.watched:
+            return
+        if self._add_watch(self.fd, os.fsencode(directory), self.MASK) >= 0:
+            self.watched.add(directory)
+
+    def wait(self, timeout):
+        """Attend un événement; plusieurs événements rapprochés n'en font qu'un"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Détecte les fichiers nouvellement apparus dans une arborescence et les
+    signale une fois complètement écrits (taille stable pendant N secondes).
+    """
+
+    def __init__(
+        self,
+        root,
+        on_file_ready,
+        extensions,
+        stable_seconds=10,
+        poll_interval=5,
+    ):
+        self.root = root
+        self.on_file_ready = on_file_ready
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+
+        # chemin -> (taille, date de modification, instant du dernier changement)
+        self.pending = {}
+        self.known = set()
+
+        self.inotify = None
+        if sys.platform.startswith("linux"):
+            try:
+                self.inotify = _Inotify()
+            except Exception as e:
+                print(f"inotify indisponible, balayage périodique: {e}")
+
+    def list_files(self):
+        """Parcourt l'arborescence et retourne les fichiers surveillés"""
+        files = []
+        for root, dirs, names in os.walk(self.root):
+            # Ignorer les dossiers cachés (.staging...)
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            if self.inotify:
+                self.inotify.watch(root)
+            for name in names:
+                if name.lower().endswith(self.extensions) and not is_temporary_file(
+                    name
+                ):
+                    files.append(os.path.join(root, name))
+        return files
+
+    def snapshot(self):
+        """Mémorise les fichiers déjà présents pour ne signaler que les nouveaux"""
+        self.known = set(self.list_files())
+
+    def scan(self):
+        """Met à jour l'état des fichiers et signale ceux dont la taille est stable"""
+        now = time.time()
+
+        for path in self.list_files():
+            if path in self.known:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            state = (stat.st_size, stat.st_mtime)
+            previous = self.pending.get(path)
+            if previous is None or previous[:2] != state:
+                self.pending[path] = state + (now,)
+
+        for path, (size, _mtime, changed_at) in list(self.pending.items()):
+            if not os.path.exists(path):
+                del self.pending[path]
+            elif size > 0 and now - changed_at >= self.stable_seconds:
+                del self.pending[path]
+                self.known.add(path)
+                self.on_file_ready(path)
+
+    def run(self):
+        """Boucle de surveillance (Ctrl+C pour arrêter)"""
+        self.snapshot()
+        try:
+            while True:
+                # Sans fichier en cours d'écriture, inotify peut attendre longtemps
+                if self.inotify and not self.pending:
+                    self.inotify.wait(60)
+                elif self.inotify:
+                    self.inotify.wait(min(self.poll_interval, self.stable_seconds))
+                else:
+                    time.sleep(self.poll_interval)
+                self.scan()
+        finally:
+            if self.inotify:
+                self.inotify.close()
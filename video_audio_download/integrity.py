@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Index d'intégrité des fichiers téléchargés
+
+Chaque dossier de destination contient un index (.integrity.json) associant
+à chaque fichier sa taille, sa date de modification et l'empreinte BLAKE2b
+de son contenu. L'empreinte est calculée pendant le téléchargement, au fil
+des octets écrits, pour les téléchargements directs (KVS, vidéos génériques).
+Les fichiers écrits par yt-dlp sont relus une fois après le post-traitement
+(voir make_ydl_post_hook). Le paramètre "integrity_hashes" désactive l'index
+et ces relectures.
+
+La vérification compare d'abord taille et date (simple appel à stat) et ne
+relit le fichier que si elles ont changé, ou si l'on demande une
+vérification complète.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from settings import get_setting
+
+INTEGRITY_INDEX_NAME = ".integrity.json"
+HASH_ALGORITHM = "blake2b"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Plusieurs téléchargements peuvent enregistrer leur empreinte en même temps
+_index_lock = threading.Lock()
+
+
+def hashing_enabled():
+    """Indique si les empreintes doivent être calculées et indexées"""
+    return bool(get_setting("integrity_hashes"))
+
+
+def new_hasher():
+    """Empreinte incrémentale à alimenter avec update() pendant l'écriture"""
+    return hashlib.blake2b(digest_size=32)
+
+
+def hash_file(path):
+    """Empreinte complète d'un fichier existant (relecture intégrale)"""
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def get_index_path(directory):
+    """Chemin de l'index d'intégrité d'un dossier"""
+    return os.path.join(directory, INTEGRITY_INDEX_NAME)
+
+
+def load_index(directory):
+    """Charge l'index d'un dossier (dictionnaire vide si absent)"""
+    index_path = get_index_path(directory)
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Index d'intégrité illisible, il sera recréé: {e}")
+        return {}
+
+
+def save_index(directory, index):
+    """Enregistre l'index de manière atomique"""
+    index_path = get_index_path(directory)
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, index_path)
+
+
+def _stat_entry(path, digest):
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": digest,
+        "algorithm": HASH_ALGORITHM,
+        "verified_at": int(time.time()),
+    }
+
+
+def record_file_hash(path, digest):
+    """Enregistre l'empreinte d'un fichier dans l'index de son dossier"""
+    if not hashing_enabled():
+        return
+    directory, name = os.path.split(os.path.abspath(path))
+    try:
+        with _index_lock:
+            index = load_index(directory)
+            index[name] = _stat_entry(path, digest)
+            save_index(directory, index)
+    except Exception as e:
+        print(f"Impossible d'enregistrer l'empreinte de {name}: {e}")
+
+
+def make_ydl_post_hook(hashes=None):
+    """
+    Crée un post_hook yt-dlp qui calcule l'empreinte du fichier final.
+
+    yt-dlp écrit lui-même le fichier (et le réécrit lors des fusions): son
+    contenu final n'est connu qu'après le post-traitement, le fichier est
+    alors relu une fois, encore en cache. Si hashes est fourni, l'empreinte
+    y est stockée (fichier encore en dossier temporaire) au lieu d'être
+    enregistrée dans l'index. Aucune relecture si les empreintes sont
+    désactivées (paramètre "integrity_hashes").
+    """
+    enabled = hashing_enabled()
+
+    def post_hook(filepath):
+        if not enabled:
+            return
+        try:
+            digest = hash_file(filepath)
+        except OSError as e:
+            print(f"Empreinte impossible pour {filepath}: {e}")
+            return
+        if hashes is None:
+            record_file_hash(filepath, digest)
+        else:
+            hashes[os.path.abspath(filepath)] = digest
+
+    return post_hook
+
+
+def verify_directory(directory, full=False):
+    """
+    Vérifie les fichiers d'un dossier indexé.
+
+    Args:
+        directory (str): Dossier contenant un index d'intégrité
+        full (bool): Relire tous les fichiers, même ceux dont stat n'a pas changé
+
+    Returns:
+        dict: Compteurs 'ok', 'rehashed', 'corrupt', 'missing'
+    """
+    counts = {"ok": 0, "rehashed": 0, "corrupt": 0, "missing": 0}
+
+    with _index_lock:
+        index = load_index(directory)
+    updates = {}
+
+    for name, entry in sorted(index.items()):
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            print(f"MANQUANT  {path}")
+            counts["missing"] += 1
+            continue
+
+        unchanged = (
+            stat.st_size == entry.get("size")
+            and stat.st_mtime_ns == entry.get("mtime_ns")
+        )
+        if unchanged and not full:
+            counts["ok"] += 1
+            continue
+
+        # Taille ou date différente (ou vérification complète): relire
+        digest = hash_file(path)
+        if digest != entry.get("hash"):
+            print(f"CORROMPU  {path}")
+            counts["corrupt"] += 1
+            continue
+
+        counts["rehashed"] += 1
+        if not unchanged:
+            # Contenu identique, seule la date a changé: mettre l'index à jour
+            updates[name] = _stat_entry(path, digest)
+
+    if updates:
+        with _index_lock:
+            current = load_index(directory)
+            current.update(updates)
+            save_index(directory, current)
+
+    return counts
+
+
+def verify_library(root, full=False):
+    """
+    Vérifie tous les dossiers indexés sous root.
+
+    Returns:
+        bool: True si aucun fichier n'est corrompu ni manquant
+    """
+    totals = {"ok": 0, "rehashed": 0, "corrupt": 0, "missing": 0}
+    start_time = time.time()
+
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        if INTEGRITY_INDEX_NAME not in names:
+            continue
+        for key, value in verify_directory(directory, full).items():
+            totals[key] += value
+
+    checked = sum(totals.values())
+    print("\n" + "=" * 60)
+    print(f"Fichiers vérifiés: {checked} en {time.time() - start_time:.1f} s")
+    print(f"  Intacts (stat inchangé): {totals['ok']}")
+    print(f"  Intacts (relus): {totals['rehashed']}")
+    print(f"  Corrompus: {totals['corrupt']}")
+    print(f"  Manquants: {totals['missing']}")
+    print("=" * 60)
+
+    return totals["corrupt"] == 0 and totals["missing"] == 0
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+File de téléchargements persistante (SQLite)
+
+Chaque URL à traiter est une ligne de la table jobs: type de site, options,
+état, nombre de tentatives, fichier produit et horodatages. La file survit à
+un arrêt brutal du processus ou de la machine:
+
+- les tâches terminées ne sont jamais refaites;
+- une tâche interrompue (état "running" dont le processus a disparu) repasse
+  en attente et reprend là où elle s'était arrêtée: elle réutilise le même
+  dossier de staging (voir staging_key), où yt-dlp retrouve ses fichiers
+  .part et ses fragments.
+
+Plusieurs processus peuvent partager la file (mode lot, service, surveillance
+du presse-papier): chaque tâche réclamée porte l'identifiant de son
+processus (owner), qui renouvelle régulièrement son bail (heartbeat). Seules
+les tâches dont le bail a expiré sont considérées comme interrompues.
+
+Le mode journal WAL avec synchronous=FULL garantit qu'une transaction validée
+résiste à une coupure de courant.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from bandwidth import BATCH, INTERACTIVE
+
+JOB_QUEUE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.db")
+
+# Une tâche en échec est retentée jusqu'à ce nombre de tentatives, après un
+# délai qui double à chaque échec (30 s, puis 60 s...)
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 30
+
+# Une tâche "running" dont le bail n'a pas été renouvelé depuis ce délai est
+# considérée comme abandonnée; les processus le renouvellent bien plus souvent
+JOB_LEASE_SECONDS = 60
+HEARTBEAT_SECONDS = 15
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+JOB_STATES = (PENDING, RUNNING, DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    handler TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    output_path TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL,
+    owner TEXT,
+    heartbeat_at REAL,
+    priority TEXT NOT NULL DEFAULT 'batch',
+    estimated_size INTEGER,
+    not_before REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE INDEX IF NOT EXISTS jobs_url ON jobs (url);
+"""
+
+# Colonnes ajoutées depuis la première version du schéma
+_MIGRATIONS = {
+    "owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+    "heartbeat_at": "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL",
+    "priority": "ALTER TABLE jobs ADD COLUMN priority TEXT NOT NULL DEFAULT 'batch'",
+    "estimated_size": "ALTER TABLE jobs ADD COLUMN estimated_size INTEGER",
+    "not_before": "ALTER TABLE jobs ADD COLUMN not_before REAL",
+}
+
+# Ordre de service: tâches interactives d'abord, nouvelles tentatives en dernier
+_PENDING_ORDER = (
+    f"CASE priority WHEN '{INTERACTIVE}' THEN 0 ELSE 1 END, attempts, id"
+)
+
+# Tâche exécutée par le thread courant (voir job_context)
+_current = threading.local()
+
+
+class JobQueue:
+    """File de tâches persistante, partageable entre threads"""
+
+    def __init__(self, path=JOB_QUEUE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.db.executescript(_SCHEMA)
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(jobs)")}
+        for column, sql in _MIGRATIONS.items():
+            if column not in columns:
+                self.db.execute(sql)
+        # Identifie les tâches réclamées par cette instance (voir heartbeat)
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def _transaction(self, sql, params=()):
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self.db.execute(sql, params)
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+            return cursor
+
+    def add(
+        self, url, handler, options=None, force=False, priority=BATCH, estimated_size=None
+    ):
+        """
+        Ajoute une URL à la file.
+
+        Une URL déjà en attente ou en cours n'est pas ajoutée deux fois; une
+        URL déjà téléchargée est ignorée sauf si force est vrai. Une URL en
+        échec est remise en attente avec un nouveau compteur de tentatives.
+
+        Args:
+            priority (str): INTERACTIVE ou BATCH (voir job_scheduler)
+            estimated_size (int): Taille attendue en octets, si connue
+
+        Returns:
+            tuple: (id de la tâche, True si elle est (re)mise en attente)
+        """
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.db.execute(
+                    "SELECT id, state FROM jobs WHERE url = ? AND handler = ? "
+                    "ORDER BY id DESC LIMIT 1",
+                    (url, handler),
+                ).fetchone()
+                skip = row and (
+                    row["state"] in (PENDING, RUNNING)
+                    or (row["state"] == DONE and not force)
+                )
+                if skip:
+                    self.db.execute("COMMIT")
+                    return row["id"], False
+                if row and row["state"] == FAILED:
+                    self.db.execute(
+                        "UPDATE jobs SET state = ?, attempts = 0, error = NULL, "
+                        "not_before = NULL, options = ?, priority = ?, "
+                        "estimated_size = COALESCE(?, estimated_size), "
+                        "updated_at = ? WHERE id = ?",
+                        (
+                            PENDING,
+                            json.dumps(options or {}),
+                            priority,
+                            estimated_size,
+                            now,
+                            row["id"],
+                        ),
+                    )
+                    job_id = row["id"]
+                else:
+                    job_id = self.db.execute(
+                        "INSERT INTO jobs (url, handler, options, priority, "
+                        "estimated_size, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            url,
+                            handler,
+                            json.dumps(options or {}),
+                            priority,
+                            estimated_size,
+                            now,
+                            now,
+                        ),
+                    ).lastrowid
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        return job_id, True
+
+    def recover_interrupted(self):
+        """
+        Remet en attente les tâches "running" dont le bail a expiré: le
+        processus qui les exécutait s'est arrêté sans les terminer. Les
+        tâches d'un autre processus toujours actif ne sont pas touchées.
+
+        Returns:
+            int: Nombre de tâches reprises
+        """
+        now = time.time()
+        cursor = self._transaction(
+            "UPDATE jobs SET state = ?, owner = NULL, updated_at = ? "
+            "WHERE state = ? AND (owner IS NULL OR owner != ?) "
+            "AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+            (PENDING, now, RUNNING, self.owner, now - JOB_LEASE_SECONDS),
+        )
+        return cursor.rowcount
+
+    def heartbeat(self):
+        """Renouvelle le bail des tâches en cours de cette instance"""
+        now = time.time()
+        self._transaction(
+            "UPDATE jobs SET heartbeat_at = ? WHERE state = ? AND owner = ?",
+            (now, RUNNING, self.owner),
+        )
+
+    def pending_jobs(self, limit, exclude=(), ids=None):
+        """
+        Prochaines tâches en attente, sans les réclamer (interactives
+        d'abord, puis les plus anciennes, les nouvelles tentatives en dernier).
+        Une tâche en échec n'y figure qu'une fois son délai écoulé (fail).
+
+        Args:
+            limit (int): Nombre maximal de tâches
+            exclude (iterable): Identifiants à ignorer (déjà planifiés)
+            ids (iterable): Se limiter à ces identifiants (None: toute la file)
+        """
+        exclude = list(exclude)
+        sql = "SELECT * FROM jobs WHERE state = ?"
+        sql += " AND (not_before IS NULL OR not_before <= ?)"
+        params = [PENDING, time.time()]
+        if exclude:
+            sql += f" AND id NOT IN ({', '.join('?' * len(exclude))})"
+            params += exclude
+        if ids is not None:
+            ids = list(ids)
+            sql += f" AND id IN ({', '.join('?' * len(ids))})"
+            params += ids
+        with self.lock:
+            rows = self.db.execute(
+                f"{sql} ORDER BY {_PENDING_ORDER} LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def next_retry_at(self, ids=None):
+        """
+        Heure (time.time) de la prochaine tâche en attente de son délai
+        de nouvel essai (None s'il n'y en a pas)
+
+        Args:
+            ids (iterable): Se limiter à ces identifiants (None: toute la file)
+        """
+        sql = "SELECT MIN(not_before) AS due FROM jobs WHERE state = ? AND not_before > ?"
+        params = [PENDING, time.time()]
+        if ids is not None:
+            ids = list(ids)
+            sql += f" AND id IN ({', '.join('?' * len(ids))})"
+            params += ids
+        with self.lock:
+            row = self.db.execute(sql, params).fetchone()
+        return row["due"]
+
+    def claim(self, job_id):
+        """
+        Passe une tâche en attente à l'état "running" et la retourne (None si
+        elle n'est plus en attente: réclamée entre-temps par un autre processus)
+        """
+        now = time.time()
+        cursor = self._transaction(
+            "UPDATE jobs SET state = ?, attempts = attempts + 1, owner = ?, "
+            "heartbeat_at = ?, started_at = ?, finished_at = NULL, "
+            "updated_at = ? WHERE id = ? AND state = ?",
+            (RUNNING, self.owner, now, now, now, job_id, PENDING),
+        )
+        return self.get(job_id) if cursor.rowcount else None
+
+    def set_estimated_size(self, job_id, size):
+        """Enregistre la taille attendue d'une tâche (coût des prochains essais)"""
+        self._transaction(
+            "UPDATE jobs SET estimated_size = ?, updated_at = ? WHERE id = ?",
+            (size, time.time(), job_id),
+        )
+
+    def complete(self, job_id, output_path=None):
+        now = time.time()
+        self._transaction(
+            "UPDATE jobs SET state = ?, output_path = ?, error = NULL, "
+            "finished_at = ?, updated_at = ? WHERE id = ?",
+            (DONE, output_path, now, now, job_id),
+        )
+
+    def fail(self, job_id, error):
+        """
+        Enregistre un échec; la tâche est retentée tant que MAX_ATTEMPTS n'est
+        pas atteint, après RETRY_BACKOFF_SECONDS doublé à chaque tentative
+        """
+        now = time.time()
+        self._transaction(
+            "UPDATE jobs SET state = CASE WHEN attempts < ? THEN ? ELSE ? END, "
+            "not_before = CASE WHEN attempts < ? "
+            "THEN ? + ? * (1 << (attempts - 1)) ELSE NULL END, "
+            "error = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+            (
+                MAX_ATTEMPTS,
+                PENDING,
+                FAILED,
+                MAX_ATTEMPTS,
+                now,
+                RETRY_BACKOFF_SECONDS,
+                str(error),
+                now,
+                now,
+                job_id,
+            ),
+        )
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def find(self, url):
+        """Dernière tâche enregistrée pour cette URL (None si inconnue)"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT * FROM jobs WHERE url = ? ORDER BY id DESC LIMIT 1", (url,)
+            ).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list_jobs(self, state=None):
+        with self.lock:
+            if state:
+                rows = self.db.execute(
+                    "SELECT * FROM jobs WHERE state = ? ORDER BY id", (state,)
+                ).fetchall()
+            else:
+                rows = self.db.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def count_by_state(self):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"
+            ).fetchall()
+        counts = dict.fromkeys(JOB_STATES, 0)
+        counts.update({row["state"]: row["n"] for row in rows})
+        return counts
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def _row_to_job(row):
+    job = dict(row)
+    try:
+        job["options"] = json.loads(job["options"] or "{}")
+    except ValueError:
+        job["options"] = {}
+    return job
+
+
+def get_current_job():
+    """Tâche exécutée par le thread courant (None hors tâche)"""
+    return getattr(_current, "job", None)
+
+
+@contextmanager
+def job_context(job):
+    """
+    Associe une tâche (dict) au thread courant le temps du bloc: les
+    fonctions de téléchargement y signalent leur résultat (note_job_*).
+    Utilisé par run_job et par downloader.Downloader.
+    """
+    previous = get_current_job()
+    _current.job = job
+    try:
+        yield job
+    finally:
+        _current.job = previous
+
+
+def staging_key():
+    """
+    Nom stable du dossier de staging de la tâche courante, pour reprendre
+    un téléchargement interrompu (None hors file: dossier unique)
+    """
+    job = get_current_job()
+    # Seules les tâches de la file (identifiant en base) sont reprises
+    return f"job{job['id']}" if job and job.get("id") else None
+
+
+def get_job_priority():
+    """
+    Priorité de bande passante de la tâche courante (voir bandwidth):
+    celle de la tâche, BATCH pour la file, INTERACTIVE hors tâche
+    """
+    job = get_current_job()
+    if job is None:
+        return INTERACTIVE
+    return job.get("priority") or BATCH
+
+
+def note_job_output(path):
+    """
+    Signale le fichier produit par la tâche courante.
+
+    Returns:
+        bool: True si le thread exécute une tâche de la file
+    """
+    job = get_current_job()
+    if job is None:
+        return False
+    job["output_path"] = path
+    return True
+
+
+def note_job_error(error):
+    """
+    Signale une erreur de la tâche courante: les fonctions de
+    téléchargement affichent leurs erreurs sans les lever
+    """
+    job = get_current_job()
+    if job is not None:
+        job.setdefault("errors", []).append(str(error))
+
+
+def note_job_size(size):
+    """
+    Signale la taille attendue du fichier de la tâche courante, une fois
+    connue (informations yt-dlp): elle sert de coût aux essais suivants
+    """
+    job = get_current_job()
+    if job is not None and size:
+        job["estimated_size"] = int(size)
+
+
+def note_job_format(description):
+    """Signale le format retenu (qualité vidéo, débit audio...) par la tâche courante"""
+    job = get_current_job()
+    if job is not None:
+        job["format"] = description
+
+
+def note_job_phase(phase):
+    """
+    Signale le début d'une étape (analysis, download, postprocess) de la
+    tâche courante, pour mesurer la durée de chaque étape
+    """
+    job = get_current_job()
+    phases = job.get("phases") if job else None
+    if phases is not None and (not phases or phases[-1][0] != phase):
+        phases.append((phase, time.time()))
+
+
+def ask_user(message):
+    """
+    Pose une question au clavier, ou au rappel "prompt" de la tâche
+    courante (voir downloader.Downloader)
+    """
+    job = get_current_job()
+    prompt = job.get("prompt") if job else None
+    return prompt(message) if prompt else input(message)
+
+
+def run_job(queue, job, handler):
+    """
+    Exécute une tâche réclamée (claim) et enregistre son résultat.
+
+    Les fonctions de téléchargement affichent leurs erreurs sans les lever:
+    une tâche qui ne signale aucun fichier produit (note_job_output) est
+    considérée comme un échec, avec la dernière erreur signalée
+    (note_job_error).
+
+    Args:
+        queue (JobQueue): File d'origine
+        job (dict): Tâche retournée par claim
+        handler (callable): Appelée avec (url, options)
+
+    Returns:
+        bool: True si la tâche a abouti
+    """
+    job["output_path"] = None
+    job["errors"] = []
+    estimated_size = job.get("estimated_size")
+    try:
+        with job_context(job):
+            handler(job["url"], job["options"])
+    except Exception as e:
+        queue.fail(job["id"], e)
+        return False
+    finally:
+        if job.get("estimated_size") != estimated_size:
+            queue.set_estimated_size(job["id"], job["estimated_size"])
+
+    if not job["output_path"]:
+        queue.fail(job["id"], job["errors"][-1] if job["errors"] else "Aucun fichier produit")
+        return False
+    queue.complete(job["id"], job["output_path"])
+    return True
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Ordonnancement des tâches par lot: le plus court d'abord, avec vieillissement
+
+Une tâche coûteuse (une émission TF1 de 5 Go) ne doit pas bloquer une file de
+petits extraits audio de quelques Mo: les tâches sont servies par coût
+estimé croissant (octets). Pour éviter qu'une grosse tâche attende
+indéfiniment, son score diminue avec le temps passé en file. Les tâches
+interactives passent toujours avant les tâches par lot.
+
+L'interface reprend celle de concurrent.futures (submit() retourne un
+Future), pour remplacer directement un ThreadPoolExecutor.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+from bandwidth import BATCH, INTERACTIVE
+
+# Vieillissement: chaque seconde d'attente retire 10 Mo au coût d'une tâche
+AGING_BYTES_PER_SECOND = 10 * 1024 * 1024
+
+# Débit supposé d'une vidéo quand seule sa durée est connue (~2,5 Mbit/s)
+DEFAULT_BYTES_PER_SECOND = 320 * 1024
+
+PRIORITY_CLASSES = {INTERACTIVE: 0, BATCH: 1}
+
+
+def estimate_job_cost(info=None, size=None):
+    """
+    Coût estimé d'une tâche, en octets.
+
+    Args:
+        info (dict): Informations yt-dlp (filesize, filesize_approx, duration)
+        size (int): Taille connue (fichier local, Content-Length)
+    """
+    if size:
+        return size
+    if info:
+        estimated = info.get("filesize") or info.get("filesize_approx")
+        if not estimated:
+            formats = info.get("requested_formats") or []
+            estimated = sum(
+                f.get("filesize") or f.get("filesize_approx") or 0 for f in formats
+            )
+        if estimated:
+            return estimated
+        if info.get("duration"):
+            return int(info["duration"] * DEFAULT_BYTES_PER_SECOND)
+    # Coût inconnu: ni prioritaire ni pénalisé
+    return 100 * 1024 * 1024
+
+
+class _ScheduledJob:
+    def __init__(self, sequence, fn, args, kwargs, cost, priority):
+        self.sequence = sequence
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cost = cost
+        self.priority = priority
+        self.submitted_at = time.monotonic()
+        self.future = Future()
+
+    def score(self, now, aging_rate):
+        """Clé de tri: classe de priorité, puis coût diminué du temps d'attente"""
+        waited = now - self.submitted_at
+        return (
+            PRIORITY_CLASSES.get(self.priority, 1),
+            self.cost - waited * aging_rate,
+            self.sequence,
+        )
+
+
+class JobScheduler:
+    """Pool de threads servant les tâches par priorité et coût estimé"""
+
+    def __init__(self, max_workers, aging_bytes_per_second=AGING_BYTES_PER_SECOND):
+        self.max_workers = max_workers
+        self.aging_bytes_per_second = aging_bytes_per_second
+        self.pending = []
+        self.condition = threading.Condition()
+        self.shutting_down = False
+        self._sequence = itertools.count()
+        self.workers = [
+            threading.Thread(target=self._worker, name=f"job-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, fn, *args, cost=None, priority=BATCH, **kwargs):
+        """
+        Ajoute une tâche.
+
+        Args:
+            fn (callable): Fonction à exécuter
+            cost (int): Coût estimé en octets (voir estimate_job_cost)
+            priority (str): INTERACTIVE ou BATCH
+
+        Returns:
+            Future: Résultat de fn
+        """
+        job = _ScheduledJob(
+            next(self._sequence),
+            fn,
+            args,
+            kwargs,
+            cost if cost is not None else estimate_job_cost(),
+            priority,
+        )
+        with self.condition:
+            if self.shutting_down:
+                raise RuntimeError("Ordonnanceur arrêté")
+            self.pending.append(job)
+            self.condition.notify()
+        return job.future
+
+    def _next_job(self):
+        """Retire la tâche au plus petit score (parcours linéaire: le
+        vieillissement change les scores en continu, un tas serait périmé)"""
+        now = time.monotonic()
+        best = min(
+            self.pending, key=lambda job: job.score(now, self.aging_bytes_per_second)
+        )
+        self.pending.remove(best)
+        return best
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.shutting_down:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                job = self._next_job()
+
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        with self.condition:
+            self.shutting_down = True
+            if cancel_pending:
+                for job in self.pending:
+                    job.future.cancel()
+                self.pending.clear()
+            self.condition.notify_all()
+        if wait:
+            for worker in self.workers:
+                worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True)
+        return False
@@ -15,6 +15,12 @@ import http.cookiejar
 import os
 import subprocess
 import sys
+from disk_space import ensure_disk_space, preallocate_file
+from download_pipeline import stream_to_file
+from integrity import new_hasher, record_file_hash
+from progress import get_progress_manager
+from bandwidth import get_bandwidth_scheduler
+from job_queue import get_job_priority
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -200,8 +206,21 @@ class KVSExtractor:
         
         return None
     
-    def download_video(self, video_info, output_dir='.'):
-        """Télécharge la vidéo"""
+    def get_request_headers(self, video_url, referer=None):
+        """En-têtes (User-Agent, cookies) pour accéder à la vidéo hors de la session"""
+        prepared = self.session.prepare_request(requests.Request('GET', video_url))
+        headers = {'User-Agent': prepared.headers.get('User-Agent')}
+        if 'Cookie' in prepared.headers:
+            headers['Cookie'] = prepared.headers['Cookie']
+        if referer:
+            headers['Referer'] = referer
+        return headers
+
+    def download_video(self, video_info, output_dir='.', interactive=True):
+        """
+        Télécharge la vidéo (interactive=False: aucune question).
+        Retourne le fichier téléchargé, False en cas d'échec.
+        """
         if not video_info or not video_info['sources']:
             print("Aucune source vidéo trouvée")
             return False
@@ -225,23 +244,42 @@ class KVSExtractor:
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            percent = (downloaded / total_size) * 100
-                            print(f"\rProgrès: {percent:.1f}%", end='', flush=True)
-            
-            print(f"\nTéléchargement terminé: {filepath}")
-            return True
+            hasher = new_hasher()
+
+            if not ensure_disk_space(output_dir, total_size, interactive):
+                return False
+
+            # Écriture dans un .part renommé à la fin: un arrêt brutal ne laisse
+            # pas de fichier préalloué (complété de zéros) sous le nom définitif
+            part_path = filepath + '.part'
+            with open(part_path, 'wb') as f:
+                # Réserve la taille annoncée (disque plein signalé immédiatement)
+                preallocate_file(f, total_size)
+                # Tampons de plusieurs Mo écrits par un thread dédié, progression
+                # affichée à fréquence fixe (et non à chaque morceau reçu)
+                job = get_progress_manager().start_job(filename, total_size)
+                bandwidth_job = get_bandwidth_scheduler().register(
+                    video_url, get_job_priority()
+                )
+                try:
+                    downloaded = stream_to_file(
+                        response, f, hasher, job.update, bandwidth_job.throttle
+                    )
+                finally:
+                    bandwidth_job.close()
+                    job.finish()
+                f.truncate()
+            os.replace(part_path, filepath)
+
+            # Empreinte calculée pendant l'écriture, pour la vérification ultérieure
+            record_file_hash(filepath, hasher.hexdigest())
+            print(f"Téléchargement terminé: {filepath} ({downloaded / (1024 * 1024):.1f} Mo)")
+            return filepath
             
         except Exception as e:
             print(f"Erreur lors du téléchargement: {e}")
+            if os.path.exists(filepath + '.part'):
+                os.remove(filepath + '.part')
             return False
 
 
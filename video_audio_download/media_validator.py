@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Validation structurelle des fichiers MP4/MOV/M4A et MKV/WebM
+
+Le fichier est projeté en mémoire (mmap) et seuls les en-têtes des boîtes
+MP4 ou des éléments EBML sont lus: les données audio/vidéo (mdat, Cluster)
+sont sautées grâce à leur taille, sans être lues ni décodées. Le temps de
+validation dépend du nombre de boîtes, pas de la taille du fichier.
+"""
+
+import mmap
+import os
+import struct
+
+# Identifiants EBML (Matroska/WebM)
+EBML_HEADER = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_CLUSTER = 0x1F43B675
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+
+# Une durée plus courte que prévu de plus de 2 % (et de 2 s) signale une troncature
+DURATION_TOLERANCE_RATIO = 0.02
+DURATION_TOLERANCE_SECONDS = 2.0
+
+# Fichier préalloué jamais complété: la fin n'est faite que de zéros
+ZERO_TAIL_BYTES = 64 * 1024
+
+
+class MediaValidationError(Exception):
+    """Structure du conteneur invalide ou fichier tronqué"""
+
+
+def _iter_mp4_boxes(data, start, end):
+    """Parcourt les boîtes MP4 entre start et end: (type, début des données, fin)"""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise MediaValidationError(f"Truncated '{box_type.decode('latin-1')}' header")
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            # La boîte s'étend jusqu'à la fin du fichier
+            size = end - offset
+        if size < header:
+            raise MediaValidationError(f"Invalid box size at offset {offset}")
+        if offset + size > end:
+            raise MediaValidationError(
+                f"Truncated '{box_type.decode('latin-1')}' box: "
+                f"{offset + size - end} bytes missing"
+            )
+        yield box_type, offset + header, offset + size
+        offset += size
+    if offset != end and end - offset < 8:
+        raise MediaValidationError(f"{end - offset} trailing bytes after the last box")
+
+
+def _read_mvhd(data, start):
+    """Échelle de temps et durée brute d'une boîte mvhd"""
+    if data[start] == 1:
+        return struct.unpack_from(">IQ", data, start + 20)
+    return struct.unpack_from(">II", data, start + 12)
+
+
+def inspect_mp4(data):
+    """
+    Vérifie la structure d'un MP4: boîtes complètes, moov et mdat présents
+    (ou moof pour un MP4 fragmenté).
+
+    Returns:
+        float: Durée en secondes (None si elle n'est pas indiquée)
+    """
+    top_level = {}
+    timescale = raw_duration = 0
+
+    for box_type, body_start, box_end in _iter_mp4_boxes(data, 0, len(data)):
+        top_level.setdefault(box_type, box_end - body_start)
+        if box_type != b"moov":
+            continue
+        for child, child_start, child_end in _iter_mp4_boxes(data, body_start, box_end):
+            if child == b"mvhd":
+                timescale, duration = _read_mvhd(data, child_start)
+                raw_duration = raw_duration or duration
+            elif child == b"mvex":
+                # MP4 fragmenté: la durée totale est dans mehd
+                for sub, sub_start, _ in _iter_mp4_boxes(data, child_start, child_end):
+                    if sub == b"mehd":
+                        fmt = ">Q" if data[sub_start] == 1 else ">I"
+                        raw_duration = struct.unpack_from(fmt, data, sub_start + 4)[0]
+
+    if b"moov" not in top_level:
+        raise MediaValidationError("Missing 'moov' box (index not written)")
+    if b"mdat" not in top_level and b"moof" not in top_level:
+        raise MediaValidationError("Missing 'mdat' box (no media data)")
+    if top_level.get(b"mdat") == 0 and b"moof" not in top_level:
+        raise MediaValidationError("Empty 'mdat' box")
+
+    if not timescale or raw_duration in (0, 0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+        return None
+    return raw_duration / timescale
+
+
+def _read_ebml_id(data, offset):
+    """Lit un identifiant EBML: (valeur, longueur)"""
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 4 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 4:
+        raise MediaValidationError(f"Invalid EBML ID at offset {offset}")
+    return int.from_bytes(data[offset:offset + length], "big"), length
+
+
+def _read_ebml_size(data, offset):
+    """Lit une taille EBML: (valeur ou None si inconnue, longueur)"""
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise MediaValidationError(f"Invalid EBML size at offset {offset}")
+    value = first & (mask - 1)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    if value == (1 << (7 * length)) - 1:
+        return None, length  # Taille inconnue (flux en direct)
+    return value, length
+
+
+def _iter_ebml_elements(data, start, end):
+    """Parcourt les éléments EBML: (id, début des données, fin ou None si inconnue)"""
+    offset = start
+    while offset < end:
+        if end - offset < 2:
+            raise MediaValidationError("Truncated EBML element header")
+        element_id, id_length = _read_ebml_id(data, offset)
+        size, size_length = _read_ebml_size(data, offset + id_length)
+        body_start = offset + id_length + size_length
+        if size is None:
+            yield element_id, body_start, None
+            return
+        body_end = body_start + size
+        if body_end > end:
+            raise MediaValidationError(
+                f"Truncated EBML element 0x{element_id:X}: {body_end - end} bytes missing"
+            )
+        yield element_id, body_start, body_end
+        offset = body_end
+
+
+def inspect_mkv(data):
+    """
+    Vérifie la structure d'un MKV/WebM: en-tête EBML, segment complet,
+    présence de clusters.
+
+    Returns:
+        float: Durée en secondes (None si elle n'est pas indiquée)
+    """
+    elements = _iter_ebml_elements(data, 0, len(data))
+    element_id = next(elements, (None,))[0]
+    if element_id != EBML_HEADER:
+        raise MediaValidationError("Missing EBML header")
+
+    segment = next((e for e in elements if e[0] == MKV_SEGMENT), None)
+    if segment is None:
+        raise MediaValidationError("Missing Matroska segment")
+
+    _, segment_start, segment_end = segment
+    if segment_end is None:
+        segment_end = len(data)
+
+    scale = 1000000
+    raw_duration = None
+    has_cluster = False
+    for element_id, body_start, body_end in _iter_ebml_elements(
+        data, segment_start, segment_end
+    ):
+        if element_id == MKV_CLUSTER:
+            has_cluster = True
+            if body_end is None:
+                break  # Clusters de taille inconnue: impossible de les sauter
+        elif element_id == MKV_INFO:
+            for child_id, child_start, child_end in _iter_ebml_elements(
+                data, body_start, body_end
+            ):
+                value = data[child_start:child_end]
+                if child_id == MKV_TIMECODE_SCALE:
+                    scale = int.from_bytes(value, "big")
+                elif child_id == MKV_DURATION:
+                    raw_duration = struct.unpack(">f" if len(value) == 4 else ">d", value)[0]
+
+    if not has_cluster:
+        raise MediaValidationError("No Cluster element (no media data)")
+
+    return raw_duration * scale / 1e9 if raw_duration else None
+
+
+def inspect_media_file(filepath):
+    """
+    Valide la structure d'un fichier vidéo/audio.
+
+    Returns:
+        tuple: (type de conteneur, durée en secondes ou None);
+            le type est None si le conteneur n'est pas reconnu
+
+    Raises:
+        MediaValidationError: Structure invalide ou fichier tronqué
+    """
+    if os.path.getsize(filepath) == 0:
+        raise MediaValidationError("File is empty")
+
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # Aucun conteneur ne se termine par 64 Ko de zéros; une boîte MP4 de
+        # taille 0 ("jusqu'à la fin") accepterait sinon ce remplissage
+        if len(data) >= ZERO_TAIL_BYTES and not data[-ZERO_TAIL_BYTES:].strip(b"\0"):
+            raise MediaValidationError("Zero-filled tail (preallocated file not fully written)")
+        try:
+            if len(data) >= 8 and data[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide"):
+                return "mp4", inspect_mp4(data)
+            if data[:4] == b"\x1a\x45\xdf\xa3":
+                return "mkv", inspect_mkv(data)
+        except (IndexError, struct.error):
+            # Lecture d'un en-tête au-delà de la fin du fichier
+            raise MediaValidationError("Truncated container header")
+        return None, None
+
+
+def check_duration(duration, expected_duration):
+    """Vérifie que la durée mesurée couvre la durée attendue (info['duration'])"""
+    if not duration or not expected_duration:
+        return True
+    missing = expected_duration - duration
+    return missing <= max(
+        DURATION_TOLERANCE_SECONDS, expected_duration * DURATION_TOLERANCE_RATIO
+    )
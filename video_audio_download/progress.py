@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Affichage de la progression des téléchargements
+
+Les téléchargements (générique, KVS, yt-dlp) se contentent de signaler les
+octets reçus; un thread d'affichage unique rafraîchit la progression à
+fréquence fixe, quel que soit le nombre de morceaux reçus. Plusieurs
+téléchargements simultanés sont regroupés sur une seule barre.
+
+Modes (paramètre progress_mode):
+    console  barre de progression (tqdm), rafraîchie toutes les 0,5 s
+    json     une ligne JSON par rafraîchissement, pour les traitements par lot
+    quiet    aucun affichage de progression
+"""
+
+import json
+import sys
+import threading
+import time
+
+from tqdm import tqdm
+
+from job_queue import note_job_phase
+from settings import get_setting
+
+REFRESH_INTERVAL = 0.5
+PROGRESS_MODES = ("console", "json", "quiet")
+
+
+class ProgressJob:
+    """Progression d'un téléchargement (mise à jour depuis n'importe quel thread)"""
+
+    def __init__(self, manager, name, total=None):
+        self.manager = manager
+        self.name = name
+        self.total = total or 0
+        self.downloaded = 0
+        self.started_at = time.time()
+        self.finished = False
+        self.ok = True
+        # Fichiers d'un même téléchargement yt-dlp (vidéo + audio): octets par fichier
+        self._parts = {}
+
+    def update(self, length):
+        """Ajoute des octets reçus"""
+        with self.manager.lock:
+            self.downloaded += length
+
+    def set_total(self, total):
+        with self.manager.lock:
+            self.total = total or 0
+
+    def set_part(self, part, downloaded, total):
+        """Progression absolue d'une partie (fichier) du téléchargement"""
+        with self.manager.lock:
+            self._parts[part] = (downloaded or 0, total or 0)
+            self.downloaded = sum(d for d, _ in self._parts.values())
+            self.total = sum(max(d, t) for d, t in self._parts.values())
+
+    def finish(self, ok=True):
+        self.manager.finish_job(self, ok)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(ok=exc_type is None)
+        return False
+
+
+class ProgressManager:
+    """Regroupe les téléchargements en cours et les affiche à fréquence fixe"""
+
+    def __init__(self, mode="console", refresh_interval=REFRESH_INTERVAL, stream=None):
+        self.mode = mode if mode in PROGRESS_MODES else "console"
+        self.refresh_interval = refresh_interval
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+        self.jobs = []
+        self._bar = None
+        self._thread = None
+        self._stop = None
+        # Octets des téléchargements terminés depuis l'ouverture de la barre:
+        # la barre regroupée ne doit pas reculer quand l'un d'eux se termine
+        self._done_bytes = 0
+        self._done_total = 0
+
+    def start_job(self, name, total=None):
+        """Déclare un nouveau téléchargement et retourne son suivi"""
+        note_job_phase("download")
+        job = ProgressJob(self, name, total)
+        with self.lock:
+            self.jobs.append(job)
+            if self._thread is None and self.mode != "quiet":
+                self._done_bytes = self._done_total = 0
+                self._stop = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._render_loop,
+                    args=(self._stop,),
+                    name="progress",
+                    daemon=True,
+                )
+                self._thread.start()
+        return job
+
+    def finish_job(self, job, ok=True):
+        note_job_phase("postprocess")
+        with self.lock:
+            if job.finished:
+                return
+            job.finished = True
+            job.ok = ok
+        if self.mode == "json":
+            self._emit_json("finished", [job])
+        thread = stop = None
+        with self.lock:
+            if job in self.jobs:
+                self.jobs.remove(job)
+                self._done_bytes += job.downloaded
+                self._done_total += max(job.total, job.downloaded)
+            if not self.jobs:
+                thread, stop = self._thread, self._stop
+                self._thread = self._stop = None
+        if thread is not None:
+            # Dernier téléchargement terminé: affichage final et arrêt du thread
+            stop.set()
+            thread.join()
+
+    def _render_loop(self, stop):
+        while not stop.wait(self.refresh_interval):
+            self._render()
+        self._render(final=True)
+
+    def _render(self, final=False):
+        if self.mode == "json":
+            if not final:
+                self._emit_json("progress")
+            return
+
+        with self.lock:
+            names = [job.name for job in self.jobs]
+            downloaded = self._done_bytes + sum(job.downloaded for job in self.jobs)
+            total = self._done_total + sum(job.total for job in self.jobs)
+
+        if not names and (not final or self._bar is None):
+            return
+        desc = names[0] if len(names) == 1 else f"{len(names)} téléchargements"
+
+        if self._bar is None:
+            self._bar = tqdm(
+                total=total or None,
+                unit="B",
+                unit_scale=True,
+                unit_divisor=1024,
+                desc=desc[:40],
+                file=self.stream,
+                mininterval=0,
+            )
+        if names:
+            self._bar.set_description(desc[:40], refresh=False)
+        if total and self._bar.total != total:
+            self._bar.total = total
+        # update() calcule aussi le débit affiché
+        self._bar.update(downloaded - self._bar.n)
+
+        if final:
+            self._bar.close()
+            self._bar = None
+
+    def _emit_json(self, event, jobs=None):
+        now = time.time()
+        with self.lock:
+            if jobs is None:
+                jobs = list(self.jobs)
+            records = [
+                {
+                    "event": event,
+                    "name": job.name,
+                    "downloaded": job.downloaded,
+                    "total": job.total or None,
+                    "elapsed": round(now - job.started_at, 1),
+                    "ok": job.ok if job.finished else None,
+                }
+                for job in jobs
+            ]
+        for record in records:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_progress_manager():
+    """Gestionnaire de progression partagé par tous les téléchargements"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ProgressManager(get_setting("progress_mode"))
+        return _manager
+
+
+def set_progress_mode(mode):
+    """Change le mode d'affichage (console, json, quiet)"""
+    get_progress_manager().mode = mode if mode in PROGRESS_MODES else "console"
+
+
+def make_ydl_progress_hook(job):
+    """
+    Crée un progress_hook yt-dlp qui alimente job.
+    À utiliser avec l'option noprogress pour masquer la barre de yt-dlp.
+    """
+
+    def hook(d):
+        if d.get("status") not in ("downloading", "finished"):
+            return
+        # Fusion et conversions de yt-dlp suivent la fin de chaque fichier
+        note_job_phase("download" if d["status"] == "downloading" else "postprocess")
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        downloaded = d.get("downloaded_bytes") or 0
+        if d["status"] == "finished":
+            total = total or downloaded
+        job.set_part(d.get("filename"), downloaded, total)
+
+    return hook
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Paramètres utilisateur du téléchargeur vidéo/audio.
+
+Les valeurs par défaut peuvent être surchargées par un fichier settings.json
+placé à côté du script, par exemple:
+
+    {"audio_quality": "native"}
+"""
+
+import json
+import os
+
+SETTINGS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "settings.json"
+)
+
+DEFAULT_SETTINGS = {
+    # Qualité audio par défaut: "192", "128", "96" (MP3) ou "native" (sans réencodage)
+    "audio_quality": "192",
+    # Télécharger et encoder le MP3 en flux continu (yt-dlp -> ffmpeg)
+    "stream_audio": False,
+    # Plusieurs rendus produits en une passe, ex: ["192", "96", "native"]
+    # (vide: une seule qualité, audio_quality en ligne et MP3 192 en local)
+    "audio_renditions": [],
+    # Extraction locale par lot: ne traiter que les vidéos nouvelles ou modifiées
+    "incremental_audio": False,
+    # Mode --watch: délai sans changement de taille avant de traiter une vidéo
+    "watch_stable_seconds": 10,
+    # Choix de la qualité vidéo: écarter les options dont la taille estimée
+    # (Mo) ou le débit total (kbit/s) dépasse ce budget (null: pas de limite)
+    "video_size_budget_mb": None,
+    "video_bitrate_budget_kbps": None,
+    # Préférer les formats à 30 images/s plutôt que 60 (ex: 30; null: pas de limite)
+    "max_fps": None,
+    # Préférer un format progressif (audio+vidéo déjà réunis) de même qualité:
+    # pas de fusion ffmpeg qui relit et réécrit tout le fichier
+    "prefer_progressive": True,
+    # Affichage de la progression: "console" (barre), "json" (une ligne JSON
+    # par rafraîchissement, pour les traitements par lot) ou "quiet"
+    "progress_mode": "console",
+    # Index d'intégrité (.integrity.json): empreinte de chaque fichier téléchargé.
+    # Les fichiers écrits par yt-dlp sont relus une fois après téléchargement
+    # pour calculer la leur; false évite cette relecture (pas d'index)
+    "integrity_hashes": True,
+    # Bande passante partagée par tous les téléchargements, en Kio/s (null: illimité)
+    "bandwidth_limit_kib_s": None,
+    # Limites par site en Kio/s, ex: {"rumble.com": 2000}
+    "bandwidth_host_limits": {},
+    # Limite globale selon l'heure, ex:
+    # [{"start": "08:00", "end": "19:00", "limit_kib_s": 3000}]
+    "bandwidth_profiles": [],
+    # Port de l'API locale du service résident (mode daemon)
+    "daemon_port": 8765,
+    # Préréglages de la ligne de commande (--preset), ex:
+    # {"podcast": {"type": "audio", "audio_bitrate": "96", "on_exists": "skip"}}
+    "presets": {},
+}
+
+_settings = None
+
+
+def load_settings(path=SETTINGS_FILE):
+    """Charge settings.json par-dessus les valeurs par défaut"""
+    settings = dict(DEFAULT_SETTINGS)
+
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                user_settings = json.load(f)
+            if isinstance(user_settings, dict):
+                settings.update(user_settings)
+            else:
+                print(f"Paramètres ignorés: {path} doit contenir un objet JSON")
+        except Exception as e:
+            print(f"Erreur lors de la lecture de {path}: {e}")
+
+    return settings
+
+
+def get_setting(key):
+    """Retourne la valeur d'un paramètre (chargé une seule fois)"""
+    global _settings
+    if _settings is None:
+        _settings = load_settings()
+    return _settings.get(key, DEFAULT_SETTINGS.get(key))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Registre des sites pris en charge
+
+Chaque site déclare ses domaines, sa fonction de téléchargement et ses
+capacités, à côté de cette fonction:
+
+    @register_site("odysee", ["odysee.com"], capabilities=("audio", "clip"))
+    def download_odysee_video(url, options=None):
+        ...
+
+Un domaine couvre aussi ses sous-domaines (tf1.fr couvre lci.tf1.fr). La
+recherche part du nom d'hôte complet et retire un label à chaque essai
+(a.b.tf1.fr, b.tf1.fr, tf1.fr, fr): une consultation de dictionnaire par
+label, quel que soit le nombre de sites enregistrés. Le domaine le plus
+long l'emporte.
+
+Capacités (la vidéo est toujours disponible), consultées par download_url
+pour signaler les options que le site ignore:
+    audio      téléchargement de l'audio seul (--type audio)
+    quality    choix de la qualité (--quality)
+    clip       téléchargement d'une plage (--clip)
+"""
+
+import re
+from urllib.parse import urlsplit
+
+CAPABILITIES = ("audio", "quality", "clip")
+
+
+class SiteHandler:
+    """Site pris en charge par une fonction de téléchargement"""
+
+    def __init__(
+        self, name, domains, download, capabilities=(), url_pattern=None, label=None
+    ):
+        unknown = set(capabilities) - set(CAPABILITIES)
+        if unknown:
+            raise ValueError(f"Capacités inconnues pour {name}: {sorted(unknown)}")
+        self.name = name
+        self.domains = tuple(domain.lower().strip(".") for domain in domains)
+        # Appelée avec (url, options), options=None: mode interactif
+        self.download = download
+        self.capabilities = frozenset(capabilities)
+        # Forme d'URL exigée en plus du domaine (ex: lien vers une vidéo)
+        self.url_pattern = re.compile(url_pattern) if url_pattern else None
+        self.label = label or name
+
+    def supports(self, capability):
+        return capability in self.capabilities
+
+    def matches(self, url):
+        return self.url_pattern is None or bool(self.url_pattern.match(url))
+
+    def __repr__(self):
+        return f"SiteHandler({self.name!r}, {list(self.domains)!r})"
+
+
+class SiteRegistry:
+    """Sites indexés par nom et par domaine"""
+
+    def __init__(self):
+        self._by_name = {}
+        self._by_domain = {}
+
+    def register(self, handler):
+        if handler.name in self._by_name:
+            raise ValueError(f"Site déjà enregistré: {handler.name}")
+        for domain in handler.domains:
+            if domain in self._by_domain:
+                raise ValueError(
+                    f"Domaine {domain} déjà attribué à {self._by_domain[domain].name}"
+                )
+        self._by_name[handler.name] = handler
+        for domain in handler.domains:
+            self._by_domain[domain] = handler
+        return handler
+
+    def get(self, name):
+        """Site enregistré sous ce nom (None sinon)"""
+        return self._by_name.get(name)
+
+    def find(self, url):
+        """
+        Site chargé de url: domaine le plus long couvrant son nom d'hôte,
+        si l'URL a la forme attendue par ce site (None sinon)
+        """
+        try:
+            host = (urlsplit(url).hostname or "").strip(".")
+        except ValueError:
+            return None
+        labels = host.split(".")
+        for i in range(len(labels)):
+            handler = self._by_domain.get(".".join(labels[i:]))
+            if handler is not None:
+                return handler if handler.matches(url) else None
+        return None
+
+    def handlers(self):
+        return list(self._by_name.values())
+
+
+_registry = SiteRegistry()
+
+
+def get_site_registry():
+    """Registre partagé par tout le script"""
+    return _registry
+
+
+def register_site(name, domains, capabilities=(), url_pattern=None, label=None):
+    """
+    Décorateur: enregistre la fonction de téléchargement d'un site.
+
+    Args:
+        name (str): Nom du site (type d'URL, voir classify_url)
+        domains (list): Domaines couverts, sous-domaines compris
+        capabilities (tuple): Voir CAPABILITIES
+        url_pattern (str): Expression régulière que l'URL doit vérifier
+        label (str): Nom affiché (défaut: name)
+    """
+
+    def decorator(download):
+        _registry.register(
+            SiteHandler(name, domains, download, capabilities, url_pattern, label)
+        )
+        return download
+
+    return decorator
+
+
+def find_site(url):
+    """Site enregistré chargé de url (None: site générique)"""
+    return _registry.find(url)
+
+
+def get_site(name):
+    return _registry.get(name)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Extraction des URL d'un texte quelconque (presse-papier, fichier)
+
+Un seul passage d'une expression régulière précompilée relève toutes les
+URL d'un texte collé: conversation, page HTML, markdown. Chaque URL est
+ensuite normalisée pour que deux liens vers la même vidéo soient reconnus
+comme identiques:
+
+- vidéo YouTube ramenée à https://www.youtube.com/watch?v=<id>, quelle que
+  soit la forme du lien (youtu.be, shorts, embed, mobile, paramètres t, list...);
+- paramètres de suivi retirés (utm_*, fbclid, si sur YouTube...), le reste
+  de la requête étant conservé tel quel;
+- doublons supprimés en gardant l'ordre d'apparition.
+"""
+
+import html
+import re
+from urllib.parse import parse_qsl, unquote_plus, urlsplit, urlunsplit
+
+# S'arrête aux espaces, guillemets et chevrons (attributs HTML, <url>)
+URL_PATTERN = re.compile(r"""https?://[^\s<>"'`]+""", re.IGNORECASE)
+
+# Ponctuation de fin de phrase collée à l'URL
+TRAILING_PUNCTUATION = ".,;:!?"
+
+# Paramètres de suivi sans effet sur le contenu
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "twclid", "igshid", "igsh",
+    "mc_cid", "mc_eid", "_ga",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+# Paramètres de suivi propres à un site (sous-domaines compris): ailleurs,
+# un paramètre du même nom peut servir à désigner le contenu
+_YOUTUBE_TRACKING = {"si", "feature", "pp"}
+_TWITTER_TRACKING = {"ref_src", "ref_url"}
+SITE_TRACKING_PARAMS = {
+    "youtube.com": _YOUTUBE_TRACKING,
+    "youtu.be": _YOUTUBE_TRACKING,
+    "youtube-nocookie.com": _YOUTUBE_TRACKING,
+    "twitter.com": _TWITTER_TRACKING,
+    "x.com": _TWITTER_TRACKING,
+}
+
+YOUTUBE_HOSTS = {
+    "youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com",
+    "youtube-nocookie.com", "www.youtube-nocookie.com",
+}
+YOUTUBE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+# Chemins contenant l'identifiant de la vidéo: /shorts/<id>, /embed/<id>...
+YOUTUBE_PATH_PATTERN = re.compile(r"^/(?:shorts|embed|v|live|e)/([A-Za-z0-9_-]{11})")
+
+
+def _trim_url(url):
+    """Retire la ponctuation et les parenthèses fermantes qui ne font pas partie de l'URL"""
+    while url:
+        if url[-1] in TRAILING_PUNCTUATION:
+            url = url[:-1]
+        # [titre](https://...) en markdown: parenthèse fermante sans ouvrante
+        elif url[-1] == ")" and url.count("(") < url.count(")"):
+            url = url[:-1]
+        elif url[-1] == "]" and url.count("[") < url.count("]"):
+            url = url[:-1]
+        else:
+            break
+    return url
+
+
+def get_youtube_id(url):
+    """Identifiant de la vidéo YouTube désignée par url (None sinon)"""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+
+    if host == "youtu.be":
+        video_id = parts.path.strip("/").split("/")[0]
+        return video_id if YOUTUBE_ID_PATTERN.match(video_id) else None
+    if host not in YOUTUBE_HOSTS:
+        return None
+
+    if parts.path == "/watch":
+        video_id = dict(parse_qsl(parts.query)).get("v", "")
+        return video_id if YOUTUBE_ID_PATTERN.match(video_id) else None
+    match = YOUTUBE_PATH_PATTERN.match(parts.path)
+    return match.group(1) if match else None
+
+
+def _site_tracking_params(host):
+    labels = host.split(".")
+    for i in range(len(labels) - 1):
+        params = SITE_TRACKING_PARAMS.get(".".join(labels[i:]))
+        if params:
+            return params
+    return set()
+
+
+def _is_tracking_param(key, site_params):
+    key = key.lower()
+    return (
+        key in TRACKING_PARAMS
+        or key in site_params
+        or key.startswith(TRACKING_PREFIXES)
+    )
+
+
+def strip_tracking_params(url):
+    """
+    Retire les paramètres de suivi de la chaîne de requête. Les autres
+    paramètres restent tels quels (encodage et ordre): l'URL n'est réécrite
+    que si un paramètre est retiré.
+    """
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    site_params = _site_tracking_params((parts.hostname or "").lower())
+    segments = parts.query.split("&")
+    kept = [
+        segment
+        for segment in segments
+        if not _is_tracking_param(unquote_plus(segment.split("=", 1)[0]), site_params)
+    ]
+    if len(kept) == len(segments):
+        return url
+    return urlunsplit(parts._replace(query="&".join(kept)))
+
+
+def normalize_url(url):
+    """Forme canonique d'une URL (voir le docstring du module)"""
+    video_id = get_youtube_id(url)
+    if video_id:
+        return f"https://www.youtube.com/watch?v={video_id}"
+    return strip_tracking_params(url)
+
+
+def extract_urls(text):
+    """
+    Relève, normalise et dédoublonne les URL d'un texte.
+
+    Args:
+        text (str): Texte quelconque (HTML, markdown, conversation...)
+
+    Returns:
+        list: URL normalisées, dans l'ordre d'apparition
+    """
+    # &amp; dans les liens HTML
+    if "&amp;" in text or "&#" in text:
+        text = html.unescape(text)
+
+    urls = {}
+    for match in URL_PATTERN.finditer(text):
+        url = _trim_url(match.group(0))
+        if url:
+            urls.setdefault(normalize_url(url), None)
+    return list(urls)
@@ -20,6 +20,16 @@ if errorlevel 1 (
     exit /b 1
 )
 
+REM If the resident service is running (download_video_audio.py daemon),
+REM just hand it the clipboard URL: no sync, no heavy imports
+if exist .venv (
+    uv run --no-sync python daemon.py
+    if not errorlevel 2 (
+        timeout /t 2 >nul
+        exit /b 0
+    )
+)
+
 REM Sync dependencies (creates venv if needed, installs/updates packages)
 echo Installing/updating dependencies...
 uv sync